@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Peak memory of every job is recorded by sampling the process resident set size while it
+# runs. TRACK_JOB_MEMORY=true measures Python/NumPy allocations with tracemalloc instead,
+# which is more precise but hooks every allocation in the process (requests included)
+TRACK_JOB_MEMORY = os.getenv("TRACK_JOB_MEMORY", "false").lower() == "true"
+
+# How often the resident set size is sampled while jobs run
+MEMORY_SAMPLE_SECONDS = float(os.getenv("MEMORY_SAMPLE_SECONDS", "0.05"))
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_lock = threading.Lock()
+_watching = 0
+_watches = set()
+_sampler = None
+
+def thread_cpu():
+    """User and system CPU seconds used so far by the calling thread"""
+    if resource is None:
+        return 0.0, 0.0
+    usage = resource.getrusage(getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF))
+    return usage.ru_utime, usage.ru_stime
+
+def process_cpu():
+    """User and system CPU seconds used so far by the whole process, including BLAS/OpenMP workers"""
+    times = os.times()
+    return times.user, times.system
+
+def max_rss_bytes():
+    """High-water mark of the process resident set size"""
+    if resource is None:
+        return None
+    # Reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def rss_bytes():
+    """Current resident set size of the process (Linux), or None where we cannot tell"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _sample():
+    """Raise the peak of every running watch to the current resident set size, until none is left"""
+    global _sampler
+    while True:
+        rss = rss_bytes()
+        with _lock:
+            if not _watches:
+                _sampler = None
+                return
+            for watch in _watches:
+                watch.peak = max(watch.peak, rss)
+        time.sleep(MEMORY_SAMPLE_SECONDS)
+
+class MemoryWatch:
+    """Peak memory a job adds while it runs.
+
+    By default the process resident set size is sampled in the background
+    (on Linux; elsewhere the growth of ``ru_maxrss`` is used). With
+    ``TRACK_JOB_MEMORY`` the allocations are traced with tracemalloc, which
+    is switched off again once no job is being watched. Both are
+    process-wide, so when jobs overlap their peaks are shared and each job's
+    figure is an upper bound.
+    """
+
+    def __init__(self):
+        global _watching, _sampler
+
+        self.active = True
+        self.tracing = TRACK_JOB_MEMORY
+        if self.tracing:
+            with _lock:
+                if _watching == 0:
+                    if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                    tracemalloc.reset_peak()
+                _watching += 1
+                self.baseline = tracemalloc.get_traced_memory()[0]
+            return
+
+        self.baseline = rss_bytes()
+        if self.baseline is None:
+            self.baseline = max_rss_bytes()
+            return
+        self.peak = self.baseline
+        with _lock:
+            _watches.add(self)
+            if _sampler is None:
+                _sampler = threading.Thread(target=_sample, name="memory-sampler", daemon=True)
+                _sampler.start()
+
+    def stop(self):
+        """Peak bytes above the memory in use when the job started (None if it cannot be measured)"""
+        global _watching
+
+        if not self.active:
+            return None
+        self.active = False
+        if self.tracing:
+            with _lock:
+                peak = tracemalloc.get_traced_memory()[1]
+                _watching -= 1
+                if _watching == 0:
+                    tracemalloc.stop()
+            return max(peak - self.baseline, 0)
+
+        if self.baseline is None:
+            return None
+        rss = rss_bytes()
+        if rss is None:
+            # No /proc: how far the process high-water mark rose while the job ran
+            return max(max_rss_bytes() - self.baseline, 0)
+        with _lock:
+            _watches.discard(self)
+            peak = max(self.peak, rss)
+        return max(peak - self.baseline, 0)
@@ -0,0 +1,101 @@
+import hashlib
+import hmac
+import os
+import secrets
+import string
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, update
+
+from . import models
+from .database import engine
+
+# Keys look like pk_<32 letters and digits>; the first PREFIX_LENGTH characters are
+# stored in clear (and indexed) to find the row, the whole key only as a SHA-256
+KEY_PREFIX = "pk_"
+KEY_LENGTH = 32
+PREFIX_LENGTH = 12
+
+# Usage counters are kept in memory and written out this often, in one batch
+API_KEY_USAGE_FLUSH_SECONDS = float(os.getenv("API_KEY_USAGE_FLUSH_SECONDS", "10"))
+
+def generate_key():
+    alphabet = string.ascii_letters + string.digits
+    return KEY_PREFIX + "".join(secrets.choice(alphabet) for _ in range(KEY_LENGTH))
+
+def hash_key(key):
+    # Keys are long and random, so a fast hash is enough (unlike passwords)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def key_prefix(key):
+    return key[:PREFIX_LENGTH]
+
+def matches(key_hash, stored_hash):
+    return stored_hash is not None and hmac.compare_digest(key_hash, stored_hash)
+
+def looks_like_api_key(token):
+    """API keys never contain dots; JWTs always do"""
+    return "." not in token
+
+class UsageBuffer:
+    """Per-key request counts and last-use times, accumulated in memory and flushed in batches"""
+
+    def __init__(self, flush_seconds):
+        self.flush_seconds = flush_seconds
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, api_key_id):
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._pending.get(api_key_id)
+            if entry is None:
+                self._pending[api_key_id] = [1, now]
+            else:
+                entry[0] += 1
+                entry[1] = now
+            self._start()
+
+    def flush(self):
+        """Write the pending counts with a single executemany UPDATE; returns the number of keys written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        table = models.APIKey.__table__
+        statement = update(table).where(table.c.id == bindparam("key_id")).values(
+            usage_count=func.coalesce(table.c.usage_count, 0) + bindparam("uses"),
+            last_used_at=bindparam("used_at"),
+        )
+        try:
+            with engine.begin() as connection:
+                connection.execute(statement, [
+                    {"key_id": key_id, "uses": uses, "used_at": used_at}
+                    for key_id, (uses, used_at) in pending.items()
+                ])
+        except Exception as e:
+            print(f"Could not flush API key usage: {str(e)}")
+            # Merge the counts back so they go out with the next batch
+            with self._lock:
+                for key_id, (uses, used_at) in pending.items():
+                    entry = self._pending.setdefault(key_id, [0, used_at])
+                    entry[0] += uses
+                    entry[1] = max(entry[1], used_at)
+            return 0
+        return len(pending)
+
+    def _start(self):
+        # Started lazily, so pre-forked workers each get their own flusher
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="api-key-usage", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+usage = UsageBuffer(API_KEY_USAGE_FLUSH_SECONDS)
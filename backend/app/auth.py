@@ -1,14 +1,20 @@
+import asyncio
+import hashlib
+import math
 import os
 import bcrypt
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from . import api_keys, principals
 from .database import get_db
-from .models import User
+from .models import APIKey, User
 from .schemas import TokenData
 
 # JWT Configuration
@@ -16,8 +22,23 @@ SECRET_KEY = os.getenv("JWT_SECRET", "mysecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
+# Demo account seeded by init_db.py with a published password; it is never an administrator
+DEMO_ACCOUNT_EMAIL = "admin@packageml.com"
+
+# Users allowed to call admin endpoints (comma-separated emails); nobody unless configured
+ADMIN_EMAILS = {email.strip() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+if DEMO_ACCOUNT_EMAIL in ADMIN_EMAILS:
+    print(f"Ignoring {DEMO_ACCOUNT_EMAIL} in ADMIN_EMAILS: the demo account's password is public")
+    ADMIN_EMAILS.discard(DEMO_ACCOUNT_EMAIL)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt is deliberately slow (and releases the GIL), so it runs on its own small
+# pool: a login storm queues here instead of stalling the event loop or starving
+# the threadpool that serves other requests
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth-hash")
+
 def get_password_hash(password: str):
     """Generate a salted password hash using bcrypt"""
     salt = bcrypt.gensalt()
@@ -31,12 +52,26 @@ def verify_password(plain_password: str, hashed_password: str, salt: str):
         hashed_password.encode()
     )
 
-def authenticate_user(db: Session, email: str, password: str):
+async def hash_password(password: str):
+    """``get_password_hash`` on the hashing pool"""
+    return await asyncio.get_running_loop().run_in_executor(hash_executor, get_password_hash, password)
+
+async def check_password(plain_password: str, hashed_password: str, salt: str):
+    """``verify_password`` on the hashing pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        hash_executor, verify_password, plain_password, hashed_password, salt
+    )
+
+def password_fingerprint(hashed_password: str):
+    """Short digest of the password hash, put in tokens so a password change revokes them"""
+    return hashlib.sha256(hashed_password.encode()).hexdigest()[:16]
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     """Authenticate a user with email and password"""
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user or not user.is_active:
         return False
-    if not verify_password(password, user.password_hash, user.salt):
+    if not await check_password(password, user.password_hash, user.salt):
         return False
     return user
 
@@ -51,8 +86,64 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current user from JWT token"""
+def cached_principal(token: str):
+    """Principal for a JWT or API key that was validated recently, without touching the database.
+
+    Does not count API key usage; callers that serve a request without going
+    through ``get_current_user`` call ``record_api_key_use`` themselves.
+    """
+    if not principals.AUTH_CACHE_ENABLED:
+        return None
+    if not api_keys.looks_like_api_key(token):
+        return principals.cache.get(token)
+    return principals.api_key_cache.get(api_keys.hash_key(token))
+
+def record_api_key_use(principal):
+    """Count a request made with an API key (JWT sessions are not counted)"""
+    if principal.api_key_id is not None:
+        api_keys.usage.record(principal.api_key_id)
+
+async def authenticate_api_key(db: AsyncSession, key: str):
+    """Principal for an API key, or None; verified from memory for keys seen recently"""
+    key_hash = api_keys.hash_key(key)
+    principal = principals.api_key_cache.get(key_hash) if principals.AUTH_CACHE_ENABLED else None
+    if principal is None:
+        epoch = principals.api_key_cache.epoch
+        candidates = (await db.execute(select(APIKey, User).join(User, User.id == APIKey.user_id).where(
+            APIKey.prefix == api_keys.key_prefix(key)
+        ))).all()
+        match = next(((api_key, user) for api_key, user in candidates if api_keys.matches(key_hash, api_key.key_hash)), None)
+        if match is None:
+            return None
+        api_key, user = match
+        expires_at = math.inf
+        if api_key.expires_at is not None:
+            expires = api_key.expires_at
+            expires_at = (expires if expires.tzinfo else expires.replace(tzinfo=timezone.utc)).timestamp()
+        if not user.is_active or expires_at <= datetime.now(timezone.utc).timestamp():
+            return None
+        principal = principals.Principal(user, api_key_id=api_key.id)
+        if principals.AUTH_CACHE_ENABLED:
+            principals.api_key_cache.put(key_hash, principal, expires_at, epoch)
+    # Counted in memory and written out in batches, not with an UPDATE per request
+    api_keys.usage.record(principal.api_key_id)
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    """Get the current user from a JWT or an API key, as a ``principals.Principal``"""
+    if api_keys.looks_like_api_key(token):
+        principal = await authenticate_api_key(db, token)
+        if principal is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return principal
+    if principals.AUTH_CACHE_ENABLED:
+        principal = principals.cache.get(token)
+        if principal is not None:
+            return principal
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,7 +157,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
+    epoch = principals.cache.epoch
+    user = await db.scalar(select(User).where(User.email == token_data.email))
+    if user is None or not user.is_active:
+        raise credentials_exception
+    # Tokens issued before the last password change are no longer valid
+    if "pwd" in payload and payload["pwd"] != password_fingerprint(user.password_hash):
         raise credentials_exception
-    return user 
\ No newline at end of file
+    principal = principals.Principal(user)
+    if principals.AUTH_CACHE_ENABLED:
+        principals.cache.put(token, principal, payload["exp"], epoch)
+    return principal
+
+async def get_current_admin(current_user: User = Depends(get_current_user)):
+    """Get the current user, requiring them to be an administrator"""
+    if current_user.email not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required"
+        )
+    return current_user
@@ -0,0 +1,81 @@
+import functools
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    # Installed with scikit-learn
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+from .scheduler import CPU_CORES, SCHEDULER_WORKERS
+
+# BLAS/OpenMP threads per fit: the cores divided evenly between the scheduler's slots, so
+# SCHEDULER_WORKERS concurrent fits together use every core once (CORES_PER_SLOT each by default)
+FIT_THREADS = max(1, CPU_CORES // max(1, SCHEDULER_WORKERS))
+
+# Pin each fit to its own FIT_THREADS cores so concurrent fits do not migrate across each other's caches
+PIN_FIT_CPUS = os.getenv("PIN_FIT_CPUS", "false").lower() == "true"
+
+_lock = threading.Lock()
+_limited = False
+_limits = None
+_process_cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+_free_cpus = list(_process_cpus)
+_local = threading.local()
+
+def _limit_threads():
+    """Cap the BLAS/OpenMP pools at FIT_THREADS, once per process (the limit is process-wide)"""
+    global _limited, _limits
+    with _lock:
+        if not _limited:
+            _limited = True
+            if threadpool_limits is not None:
+                # Kept referenced so the limit stays in place
+                _limits = threadpool_limits(limits=FIT_THREADS)
+
+@contextmanager
+def thread_budget():
+    """Run a fit within its slot's share of the cores (``FIT_THREADS``), which it yields.
+
+    Nested use inside a fit that already has a budget reuses it.
+    """
+    if getattr(_local, "threads", None):
+        yield _local.threads
+        return
+
+    _limit_threads()
+    pinned = []
+    if PIN_FIT_CPUS:
+        with _lock:
+            if len(_free_cpus) >= FIT_THREADS:
+                pinned = [_free_cpus.pop(0) for _ in range(FIT_THREADS)]
+
+    if pinned:
+        # Pins the calling thread; threads it starts from here on (including new BLAS workers) inherit this
+        os.sched_setaffinity(0, pinned)
+    _local.threads = FIT_THREADS
+    try:
+        yield FIT_THREADS
+    finally:
+        _local.threads = None
+        if pinned:
+            os.sched_setaffinity(0, _process_cpus)
+            with _lock:
+                _free_cpus.extend(pinned)
+                _free_cpus.sort()
+
+def budgeted(func):
+    """Run a training function inside a thread budget"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with thread_budget():
+            return func(*args, **kwargs)
+    return wrapper
+
+def apply_n_jobs(estimator, hyperparams, threads):
+    """Give estimators with their own process/thread pool (``n_jobs``) the same budget, unless the user set one"""
+    if 'n_jobs' in estimator.get_params() and hyperparams.get('n_jobs') is None:
+        estimator.set_params(n_jobs=threads)
+    return estimator
@@ -1,5 +1,6 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
@@ -11,29 +12,74 @@ DB_USER = os.getenv("DB_USER", "packageml")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "packageml")
 DB_NAME = os.getenv("DB_NAME", "packageml")
 
-# Create the database URL
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-# Create the engine with connection pooling optimizations
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=1800  # Recycle connections after 30 minutes
+# Create the database URL; a full DATABASE_URL (e.g. sqlite:///./packageml.db) overrides the MySQL settings
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
-# Create a session factory
+# Connections all server processes together may open (MySQL allows 151 by default). Each of the
+# DB_POOL_PROCESSES processes (serve.py: the workers plus the training process) gets an even share:
+# a third for the sync engine (training threads, usage flushes), the rest for the async engine
+# (endpoints). 0 keeps the fixed per-process pools
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+DB_POOL_PROCESSES = max(1, int(os.getenv("DB_POOL_PROCESSES", os.getenv("WEB_CONCURRENCY", "1"))))
+
+def pool_settings(connections):
+    """Pool arguments for an engine allowed ``connections``: half kept open, the rest opened on demand.
+
+    Only the kept half stays open when idle, so a worker being replaced and its
+    replacement together stay within the budget while traffic is normal.
+    """
+    pool_size = max(1, connections // 2)
+    return {"pool_size": pool_size, "max_overflow": max(0, connections - pool_size)}
+
+if DB_CONNECTION_BUDGET > 0:
+    _share = max(2, DB_CONNECTION_BUDGET // DB_POOL_PROCESSES)
+    SYNC_POOL = pool_settings(max(1, _share // 3))
+    ASYNC_POOL = pool_settings(_share - max(1, _share // 3))
+else:
+    SYNC_POOL = {"pool_size": 10, "max_overflow": 20}
+    ASYNC_POOL = {"pool_size": 20, "max_overflow": 40}
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    # Local stand-in for benchmarks and load tests; sessions are shared with training threads
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+else:
+    # Create the engine with connection pooling optimizations
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        poolclass=QueuePool,
+        pool_timeout=30,
+        pool_recycle=1800,  # Recycle connections after 30 minutes
+        **SYNC_POOL
+    )
+
+# Create a session factory (used by training workers, scripts and migrations)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The API endpoints use an async engine with the matching asyncio driver (aiomysql / aiosqlite)
+ASYNC_DRIVERS = {"mysql+pymysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+_scheme, _rest = SQLALCHEMY_DATABASE_URL.split("://", 1)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", f"{ASYNC_DRIVERS.get(_scheme, _scheme)}://{_rest}")
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_timeout=30,
+        pool_recycle=1800,
+        **ASYNC_POOL
+    )
+
+# Objects stay readable after commit; endpoints refresh what the database generates
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependency to get an async DB session
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
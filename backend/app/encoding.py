@@ -0,0 +1,155 @@
+import os
+import zlib
+
+# Categorical columns with at most this many distinct values are one-hot encoded
+ONEHOT_MAX_CATEGORIES = int(os.getenv("ONEHOT_MAX_CATEGORIES", "20"))
+
+# Columns where nearly every value is distinct (customer_id, order_id, ...) carry no signal
+IDENTIFIER_UNIQUE_RATIO = float(os.getenv("IDENTIFIER_UNIQUE_RATIO", "0.9"))
+
+# Width of the block that all high-cardinality columns are hashed into
+HASHING_FEATURES = int(os.getenv("HASHING_FEATURES", "64"))
+
+# Stop tracking exact distinct values past this point; the column is high-cardinality either way
+DISTINCT_TRACK_LIMIT = 10000
+
+def hash_bucket(column, value, n_features=HASHING_FEATURES):
+    """Stable bucket for a categorical value (crc32, so it can be reproduced without scikit-learn)"""
+    return zlib.crc32(f"{column}={value}".encode()) % n_features
+
+class FeatureEncoder:
+    """Turns the feature columns of a DataFrame into a model matrix.
+
+    Numeric columns are standardized with running statistics. Categorical
+    columns are one-hot encoded when they have few categories, hashed into a
+    fixed-width block when they have many, and dropped when almost every value
+    is unique. The categorical blocks are sparse, and the matrix is only
+    densified for estimators that need it (``dense=True``).
+
+    Categories are collected with ``observe`` (which can be called once per
+    chunk) and the strategy for each column is fixed on the first
+    ``transform``, so the matrix width never changes afterwards.
+    """
+
+    def __init__(self, columns, dense=False):
+        self.columns = list(columns)
+        self.dense = dense
+        self.numeric_columns = None
+        self.categorical_columns = None
+        self.onehot = {}
+        self.hashed = []
+        self.dropped = []
+        self.planned = False
+        self.scaler = None
+        self._distinct = {}
+        self._capped = {}
+        self._rows = 0
+
+    def observe(self, df):
+        """Collect category statistics from a batch of rows"""
+        if self.categorical_columns is None:
+            self.categorical_columns = [c for c in self.columns if df[c].dtype == 'object']
+            self.numeric_columns = [c for c in self.columns if c not in self.categorical_columns]
+            self._distinct = {c: set() for c in self.categorical_columns}
+        self._rows += len(df)
+        for column in self.categorical_columns:
+            if column in self._capped:
+                continue
+            distinct = self._distinct[column]
+            distinct.update(df[column].astype(str).unique().tolist())
+            if len(distinct) > DISTINCT_TRACK_LIMIT:
+                # Remember how unique the column looked when we stopped counting
+                self._capped[column] = len(distinct) / self._rows
+                self._distinct[column] = None
+        return self
+
+    def plan(self):
+        """Fix the encoding strategy of every categorical column"""
+        for column in self.categorical_columns:
+            distinct = self._distinct[column]
+            if distinct is not None and len(distinct) <= ONEHOT_MAX_CATEGORIES:
+                self.onehot[column] = sorted(distinct)
+                continue
+            ratio = self._capped.get(column)
+            if ratio is None:
+                ratio = len(distinct) / max(self._rows, 1)
+            if ratio >= IDENTIFIER_UNIQUE_RATIO:
+                self.dropped.append(column)
+            else:
+                self.hashed.append(column)
+        self._distinct = {}
+        self.planned = True
+
+    def fit_scaler(self, df):
+        """Fit fresh scaling statistics on the numeric columns"""
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
+        return self.partial_fit(df)
+
+    def partial_fit(self, df):
+        """Update the running scaling statistics with a batch of rows"""
+        from sklearn.preprocessing import StandardScaler
+
+        if self.scaler is None:
+            self.scaler = StandardScaler()
+        if self.numeric_columns and len(df):
+            self.scaler.partial_fit(df[self.numeric_columns])
+        return self
+
+    @property
+    def n_features(self):
+        """Width of the model matrix"""
+        if not self.planned:
+            self.plan()
+        return (len(self.numeric_columns)
+                + sum(len(categories) for categories in self.onehot.values())
+                + (HASHING_FEATURES if self.hashed else 0))
+
+    def transform(self, df):
+        """Build the model matrix for a batch of rows"""
+        import numpy as np
+        import scipy.sparse as sp
+
+        if not self.planned:
+            self.plan()
+
+        n_rows = len(df)
+        blocks = []
+        if self.numeric_columns:
+            blocks.append(self.scaler.transform(df[self.numeric_columns]))
+
+        # Categorical block, built directly in sparse coordinate form
+        rows, cols = [], []
+        offset = 0
+        for column, categories in self.onehot.items():
+            lookup = {value: index for index, value in enumerate(categories)}
+            codes = df[column].astype(str).map(lookup).to_numpy(dtype=float)
+            known = ~np.isnan(codes)  # Categories first seen after fitting are left all-zero
+            rows.append(np.flatnonzero(known))
+            cols.append(codes[known].astype(np.int64) + offset)
+            offset += len(categories)
+        for column in self.hashed:
+            values = df[column].astype(str)
+            buckets = {value: hash_bucket(column, value) for value in values.unique()}
+            rows.append(np.arange(n_rows))
+            cols.append(values.map(buckets).to_numpy(dtype=np.int64) + offset)
+        if self.hashed:
+            offset += HASHING_FEATURES
+
+        if not rows:
+            return blocks[0] if blocks else np.zeros((n_rows, 0))
+
+        rows = np.concatenate(rows)
+        categorical = sp.csr_matrix((np.ones(len(rows)), (rows, np.concatenate(cols))), shape=(n_rows, offset))
+        if self.dense:
+            return np.hstack(blocks + [categorical.toarray()])
+        return sp.hstack([sp.csr_matrix(block) for block in blocks] + [categorical], format='csr')
+
+    def summary(self):
+        """Per-strategy column lists, recorded with the job results"""
+        return {
+            'onehot_columns': list(self.onehot),
+            'hashed_columns': list(self.hashed),
+            'dropped_columns': list(self.dropped),
+        }
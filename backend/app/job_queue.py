@@ -0,0 +1,227 @@
+import os
+import socket
+import threading
+import uuid
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.sql import func
+
+from . import models, principals
+from .database import SessionLocal
+from .scheduler import SCHEDULER_DRAIN_SECONDS, scheduler
+
+# Where queued jobs are trained. "local": in this process (a single uvicorn process).
+# serve.py sets "process" in its API workers and trains in one dedicated process instead
+TRAINING_DISPATCHER = os.getenv("TRAINING_DISPATCHER", "local")
+
+# How often the dispatcher looks for newly queued jobs when nobody wakes it up
+DISPATCH_POLL_SECONDS = float(os.getenv("DISPATCH_POLL_SECONDS", "1"))
+
+# The dispatcher refreshes the heartbeat of the jobs it holds this often. Jobs whose heartbeat
+# is older than RUNNER_TIMEOUT_SECONDS (their training process crashed, or was stopped before
+# they finished) are queued again, or failed once they have been started MAX_JOB_ATTEMPTS times
+RUNNER_HEARTBEAT_SECONDS = float(os.getenv("RUNNER_HEARTBEAT_SECONDS", "10"))
+RUNNER_TIMEOUT_SECONDS = float(os.getenv("RUNNER_TIMEOUT_SECONDS", "60"))
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+
+# Stored start estimates are only rewritten when they move by more than this
+ESTIMATE_TOLERANCE = timedelta(seconds=5)
+
+QUEUE_CHANNEL = "packageml:jobs:queued"
+
+WAITING = (models.JobStatus.PENDING, models.JobStatus.IN_PROGRESS)
+
+def queue(jobs):
+    """Mark jobs for the dispatcher; they run as one batch. Commit, then call ``notify``"""
+    for job in jobs:
+        job.queued_at = func.now()
+        job.batch_id = jobs[0].id
+
+def notify():
+    """Tell the dispatcher that jobs were queued (the dedicated process also polls)"""
+    if TRAINING_DISPATCHER == "local":
+        dispatcher.start()
+        dispatcher.wake()
+    else:
+        principals.publish(QUEUE_CHANNEL, "")
+
+class Dispatcher:
+    """Hands queued jobs from the database to this process's fair scheduler.
+
+    Endpoints only mark jobs as queued. The dispatcher claims them by writing
+    its runner id, so each job runs once even when several training processes
+    (replicas) share the database, and it writes the queue position and
+    estimated start of each waiting job to its row, where every API worker
+    reads them. Jobs cancelled while they wait are withdrawn from the
+    scheduler. It also takes over the jobs of runners that stopped
+    heartbeating, including, at start, those of the process it replaces.
+    """
+
+    def __init__(self):
+        # Set by main.py: called with the ids of a batch of jobs to train
+        self.run_jobs = None
+        self.runner_id = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._estimates = {}
+        self._next_heartbeat = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                # Created after any fork, so the id names the process that actually runs the jobs
+                self.runner_id = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+                self._stopping = False
+                self._next_heartbeat = 0.0
+                self._thread = threading.Thread(target=self._loop, name="dispatcher", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stopping:
+            try:
+                db = SessionLocal()
+                try:
+                    if time.monotonic() >= self._next_heartbeat:
+                        self._next_heartbeat = time.monotonic() + RUNNER_HEARTBEAT_SECONDS
+                        self._heartbeat(db)
+                        self._recover(db)
+                    self._claim(db)
+                    self._withdraw_cancelled(db)
+                    self._write_estimates(db)
+                finally:
+                    db.close()
+            except Exception as e:
+                print(f"Dispatcher error: {str(e)}")
+            self._wake.wait(DISPATCH_POLL_SECONDS)
+            self._wake.clear()
+
+    def _claim(self, db):
+        queued = select(models.Job.id).where(
+            models.Job.queued_at.isnot(None),
+            models.Job.runner.is_(None),
+            models.Job.status.in_(WAITING)
+        )
+        job_ids = db.scalars(queued).all()
+        if not job_ids:
+            return
+        # Whoever updates the row first owns the job
+        db.execute(update(models.Job).where(
+            models.Job.id.in_(job_ids),
+            models.Job.runner.is_(None)
+        ).values(runner=self.runner_id, heartbeat_at=datetime.utcnow()))
+        db.commit()
+        claimed = db.execute(select(models.Job.id, models.Job.user_id, models.Job.batch_id).where(
+            models.Job.id.in_(job_ids),
+            models.Job.runner == self.runner_id
+        ).order_by(models.Job.queued_at, models.Job.id)).all()
+        batches = {}
+        for job_id, user_id, batch_id in claimed:
+            batches.setdefault((user_id, batch_id or job_id), []).append(job_id)
+        for (user_id, _), batch in batches.items():
+            scheduler.submit(user_id, batch, self.run_jobs)
+
+    def _withdraw_cancelled(self, db):
+        """Take jobs that were cancelled (or deleted) while they waited out of the scheduler's queue"""
+        waiting = scheduler.waiting()
+        if not waiting:
+            return
+        still_waiting = set(db.scalars(select(models.Job.id).where(
+            models.Job.id.in_(waiting),
+            models.Job.status.in_(WAITING)
+        )).all())
+        withdrawn = scheduler.cancel([job_id for job_id in waiting if job_id not in still_waiting])
+        if withdrawn:
+            print(f"Withdrew cancelled jobs {withdrawn} from the queue")
+
+    def _heartbeat(self, db):
+        db.execute(update(models.Job).where(
+            models.Job.runner == self.runner_id,
+            models.Job.status.in_(WAITING)
+        ).values(heartbeat_at=datetime.utcnow()))
+        db.commit()
+
+    def _recover(self, db):
+        """Queue again, or fail, the jobs held by runners that stopped heartbeating"""
+        stale = (
+            models.Job.runner.isnot(None),
+            models.Job.runner != self.runner_id,
+            models.Job.status.in_(WAITING),
+            or_(
+                models.Job.heartbeat_at.is_(None),
+                models.Job.heartbeat_at < datetime.utcnow() - timedelta(seconds=RUNNER_TIMEOUT_SECONDS)
+            )
+        )
+        # Another dispatcher may be recovering too; only clear a claim nobody has renewed
+        requeued = db.execute(update(models.Job).where(
+            *stale,
+            or_(models.Job.attempts.is_(None), models.Job.attempts < MAX_JOB_ATTEMPTS)
+        ).values(runner=None, queue_position=None, estimated_start=None)).rowcount
+        # Through the ORM, so the response cache sees the status change
+        failed = db.scalars(select(models.Job).where(*stale, models.Job.attempts >= MAX_JOB_ATTEMPTS)).all()
+        for job in failed:
+            job.status = models.JobStatus.FAILED
+            job.error_message = f"Training was interrupted {job.attempts} times (its training process stopped)"
+            job.completed_at = func.now()
+            job.queue_position = None
+            job.estimated_start = None
+        db.commit()
+        if requeued or failed:
+            print(f"Recovered jobs of stopped runners: {requeued} queued again, {len(failed)} failed")
+
+    def _write_estimates(self, db):
+        estimates = scheduler.estimates()
+        changed = {
+            job_id: estimate for job_id, estimate in estimates.items()
+            if job_id not in self._estimates
+            or self._estimates[job_id][0] != estimate[0]
+            or abs(self._estimates[job_id][1] - estimate[1]) > ESTIMATE_TOLERANCE
+        }
+        # Jobs that started (or were withdrawn) no longer wait
+        changed.update({job_id: (None, None) for job_id in self._estimates if job_id not in estimates})
+        if not changed:
+            return
+        # Through the ORM, so the response cache sees the change
+        for job in db.scalars(select(models.Job).where(models.Job.id.in_(changed))):
+            job.queue_position, job.estimated_start = changed[job.id]
+        db.commit()
+        # Compare later estimates with what is stored, not with the previous (unwritten) ones
+        self._estimates = {job_id: changed.get(job_id, self._estimates.get(job_id)) for job_id in estimates}
+
+    def stop(self, timeout=SCHEDULER_DRAIN_SECONDS):
+        """Stop claiming, hand back the jobs not started yet, and wait for the running ones.
+
+        Returns False if runs were still going after ``timeout`` seconds.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return True
+        self._stopping = True
+        self._wake.set()
+        thread.join()
+
+        released = scheduler.withdraw()
+        if released:
+            db = SessionLocal()
+            try:
+                db.execute(update(models.Job).where(
+                    models.Job.id.in_(released),
+                    models.Job.runner == self.runner_id
+                ).values(runner=None, queue_position=None, estimated_start=None))
+                db.commit()
+            finally:
+                db.close()
+            print(f"Released {len(released)} queued jobs for another training process")
+        return scheduler.drain(timeout)
+
+dispatcher = Dispatcher()
+
+principals.handlers[QUEUE_CHANNEL] = lambda message: dispatcher.wake()
@@ -0,0 +1,84 @@
+import numpy as np
+
+from . import encoding, scoring
+
+# Estimators whose prediction is a linear function of the model matrix
+LINEAR_CLASSIFIERS = {"LogisticRegression", "SGDClassifier"}
+LINEAR_REGRESSORS = {"LinearRegression", "SGDRegressor"}
+PROJECTIONS = {"PCA", "IncrementalPCA"}
+CENTROID_CLUSTERERS = {"KMeans", "MiniBatchKMeans"}
+
+def affine_map(estimator):
+    """``(kind, weights, bias, classes)`` such that the estimator's scores are ``X @ weights + bias``"""
+    name = type(estimator).__name__
+    if name in LINEAR_CLASSIFIERS:
+        return "classifier", np.asarray(estimator.coef_, dtype=float).T, np.ravel(estimator.intercept_), estimator.classes_
+    if name in LINEAR_REGRESSORS:
+        weights = np.asarray(estimator.coef_, dtype=float).reshape(-1, 1)
+        return "regressor", weights, np.ravel(estimator.intercept_).astype(float), None
+    if name in PROJECTIONS:
+        weights = np.asarray(estimator.components_, dtype=float).T
+        bias = -np.asarray(estimator.mean_, dtype=float) @ weights
+        if getattr(estimator, "whiten", False):
+            scale = np.sqrt(estimator.explained_variance_)
+            weights, bias = weights / scale, bias / scale
+        return "projection", weights, bias, None
+    if name in CENTROID_CLUSTERERS:
+        # argmin |x - c|^2 = argmin (|c|^2 - 2 x.c), dropping the |x|^2 term every cluster shares
+        centers = np.asarray(estimator.cluster_centers_, dtype=float)
+        return "nearest_centroid", -2 * centers.T, (centers ** 2).sum(axis=1), None
+    return None
+
+def export(artifact):
+    """Compile a training artifact into a NumPy-only ``scoring.Kernel``, or None if the model is not linear.
+
+    The standard scaler of the numeric columns is folded into the weights and
+    bias, so the kernel works on raw values. Class labels are mapped back
+    through the target encoder.
+    """
+    if not artifact or artifact.get("feature_map") is not None:
+        return None
+    encoder = artifact["encoder"]
+    mapped = affine_map(artifact["estimator"])
+    if mapped is None or not encoder.planned:
+        return None
+    kind, weights, bias, classes = mapped
+    if weights.shape[0] != encoder.n_features:
+        return None
+
+    weights = weights.copy()
+    bias = np.asarray(bias, dtype=float).copy()
+    n_numeric = len(encoder.numeric_columns)
+    if n_numeric:
+        # (x - mean) / scale @ W  ==  x @ (W / scale) - (mean / scale) @ W
+        scaler = encoder.scaler
+        scale = np.asarray(scaler.scale_, dtype=float) if scaler.scale_ is not None else np.ones(n_numeric)
+        mean = np.asarray(scaler.mean_, dtype=float) if scaler.mean_ is not None else np.zeros(n_numeric)
+        bias -= (mean / scale) @ weights[:n_numeric]
+        weights[:n_numeric] /= scale[:, None]
+
+    if classes is not None:
+        target_classes = artifact.get("encoders", {}).get(artifact.get("target_column"))
+        if target_classes:
+            classes = [target_classes[int(value)] for value in classes]
+        else:
+            classes = np.asarray(classes).tolist()
+
+    meta = {
+        "version": scoring.KERNEL_FORMAT_VERSION,
+        "kind": kind,
+        "model_type": artifact["model_type"].value,
+        "task_type": artifact["task_type"].value,
+        "feature_columns": artifact["feature_columns"],
+        "numeric_columns": list(encoder.numeric_columns),
+        "onehot": [[column, list(categories)] for column, categories in encoder.onehot.items()],
+        "hashed": list(encoder.hashed),
+        "hashing_features": encoding.HASHING_FEATURES,
+        "classes": classes,
+    }
+    return scoring.Kernel(meta, weights, bias)
+
+def export_blob(artifact):
+    """Serialized kernel for an artifact, or None when the model cannot be compiled"""
+    kernel = export(artifact)
+    return kernel.dump() if kernel is not None else None
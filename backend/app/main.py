@@ -1,71 +1,47 @@
 from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
-from datetime import timedelta
+from datetime import datetime, timedelta
+import itertools
 import json
-import random
-import string
-from typing import List
-from sqlalchemy import text
+import os
+import numpy as np
+from typing import List, Optional
+from sqlalchemy import delete, insert, select
 
-from . import models, schemas, auth
-from .database import engine, get_db
+from . import models, schemas, auth, api_keys, compression, job_queue, kernels, memo, pagination, pipeline, principals, response_cache, scoring, serialization, storage, synthetic, tracing, training, warmup
+from .database import SessionLocal, async_engine, get_db
 
-# Create tables in the database
-models.Base.metadata.create_all(bind=engine)
-
-# Function to check and add missing columns to the jobs table
-def migrate_jobs_table():
-    try:
-        with engine.connect() as connection:
-            # Check if columns exist
-            result = connection.execute(text("SHOW COLUMNS FROM jobs"))
-            columns = [row[0] for row in result.fetchall()]
-            
-            # Add target_column if missing
-            if 'target_column' not in columns:
-                print("Adding target_column to jobs table...")
-                connection.execute(text("ALTER TABLE jobs ADD COLUMN target_column VARCHAR(255) NULL"))
-                print("Added target_column column to jobs table")
-            
-            # Add feature_columns if missing
-            if 'feature_columns' not in columns:
-                print("Adding feature_columns to jobs table...")
-                connection.execute(text("ALTER TABLE jobs ADD COLUMN feature_columns JSON NULL"))
-                print("Added feature_columns column to jobs table")
-    except Exception as e:
-        print(f"Migration error: {str(e)}")
-
-# Run migrations
-try:
-    migrate_jobs_table()
-    print("Database migrations completed successfully.")
-except Exception as e:
-    print(f"Error running migrations: {str(e)}")
+# The schema is managed by Alembic (run_migrations.py, once per deploy); nothing is created at import
 
 app = FastAPI(title="PackageML API")
 
+# Serve unchanged list and detail responses from memory, with ETags and precompressed bodies
+app.add_middleware(response_cache.ResponseCacheMiddleware)
+
 # Add CORS middleware with specific origins
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost", "http://frontend", "https://packageml.htnminh.com"],  # Specific origins for better security
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    expose_headers=["ETag", pagination.NEXT_CURSOR_HEADER],
 )
 
-# Add compression middleware for better performance
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Add compression middleware for better performance (zstd, brotli or gzip; cached responses come precompressed)
+app.add_middleware(compression.CompressionMiddleware)
 
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,20 +50,20 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.email},
+        data={"sub": user.email, "pwd": auth.password_fingerprint(user.password_hash)},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash the password
-    hashed_password, salt = auth.get_password_hash(user.password)
+    hashed_password, salt = await auth.hash_password(user.password)
     
     # Create new user
     db_user = models.User(
@@ -96,23 +72,89 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         salt=salt
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @app.get("/users/me/", response_model=schemas.User)
 def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
     return current_user
 
+@app.put("/users/me/password")
+async def change_password(
+    password_change: schemas.PasswordChange,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    user = await auth.authenticate_user(db, current_user.email, password_change.current_password)
+    if not user:
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+    
+    user.password_hash, user.salt = await auth.hash_password(password_change.new_password)
+    await db.commit()
+    
+    # Tokens issued with the old password stop working, including cached ones in every worker
+    principals.invalidate_user(user.email)
+    return {"message": "Password changed successfully"}
+
+@app.on_event("startup")
+def start_shared_cache_listener():
+    # Runs in every worker, so each one subscribes to the shared invalidation channels
+    principals.start_listener()
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    # No more requests; hand the endpoints' connections back for the worker replacing this one
+    await async_engine.dispose()
+
+@app.on_event("startup")
+def start_training_dispatcher():
+    # A single uvicorn process trains queued jobs itself; serve.py uses a dedicated training process
+    if job_queue.TRAINING_DISPATCHER == "local":
+        job_queue.dispatcher.start()
+
+@app.on_event("shutdown")
+def finish_training_runs():
+    # Queued jobs go back to the queue; running ones are given time to finish
+    if not job_queue.dispatcher.stop():
+        print("Stopping with training runs still in progress")
+
+@app.on_event("shutdown")
+def flush_api_key_usage():
+    # Write out the usage counted since the last batch
+    api_keys.usage.flush()
+
+@app.on_event("startup")
+def start_warmup():
+    # Import and exercise the ML stack off the request path; already done when started by serve.py
+    if warmup.WARMUP_ON_STARTUP:
+        warmup.warm_in_background()
+    else:
+        warmup.state["ready"] = True
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to PackageML API"}
 
+@app.get("/ready")
+def read_ready():
+    # Readiness probe: 503 until the ML stack has been imported and warmed up in this process
+    body = {
+        "ready": warmup.state["ready"],
+        "pid": os.getpid(),
+        "warmed_in_pid": warmup.state["pid"],
+        "warmup_seconds": warmup.state["seconds"],
+        "warmup_error": warmup.state["error"],
+    }
+    if not warmup.state["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
 # Dataset Endpoints
 @app.post("/datasets/", response_model=schemas.Dataset)
-def create_dataset(
+async def create_dataset(
     dataset: schemas.DatasetCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Validate dataset size limits
@@ -122,10 +164,10 @@ def create_dataset(
             detail="Dataset exceeds column limit. Maximum 20 columns allowed."
         )
     
-    if len(dataset.data) > 5000:
+    if len(dataset.data) > storage.MAX_DATASET_ROWS:
         raise HTTPException(
             status_code=400, 
-            detail="Dataset exceeds row limit. Maximum 5000 rows allowed."
+            detail=f"Dataset exceeds row limit. Maximum {storage.MAX_DATASET_ROWS} rows allowed."
         )
     
     # Generate schema from the dataset
@@ -164,7 +206,6 @@ def create_dataset(
         name=dataset.name,
         filename=dataset.filename,
         description=dataset.description or "",
-        data=dataset.data,
         schema=schema,
         rows=len(dataset.data),
         columns=len(schema),
@@ -172,18 +213,21 @@ def create_dataset(
         file_type=dataset.file_type,
         tags=dataset.tags or "",
         missing_values=sum(col["missing"] for col in schema),
+        content_hash=await run_in_threadpool(memo.canonical_hash, dataset.data),
         user_id=current_user.id
     )
     
     db.add(db_dataset)
-    db.commit()
-    db.refresh(db_dataset)
+    await db.flush()
+    await db.execute(insert(models.DatasetChunk), storage.chunk_rows(db_dataset.id, dataset.data))
+    await db.commit()
+    await db.refresh(db_dataset)
     return db_dataset
 
 @app.post("/datasets/randomize/", response_model=schemas.Dataset)
-def create_random_dataset(
+async def create_random_dataset(
     request: schemas.RandomDatasetCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Validate number of rows
@@ -193,144 +237,29 @@ def create_random_dataset(
             detail="Number of rows must be between 1 and 2000"
         )
     
-    # Define dataset schemas based on type
-    dataset_schemas = {
-        "Customer Data": {
-            "columns": [
-                {"name": "customer_id", "type": "string"},
-                {"name": "age", "type": "integer"},
-                {"name": "gender", "type": "string"},
-                {"name": "subscription_length", "type": "integer"},
-                {"name": "monthly_charges", "type": "float"},
-                {"name": "total_charges", "type": "float"},
-                {"name": "churn", "type": "boolean"}
-            ],
-            "filename": "customer_data.csv",
-            "file_type": "CSV"
-        },
-        "Sales Data": {
-            "columns": [
-                {"name": "order_id", "type": "string"},
-                {"name": "date", "type": "string"},
-                {"name": "customer_name", "type": "string"},
-                {"name": "product_id", "type": "string"},
-                {"name": "quantity", "type": "integer"},
-                {"name": "unit_price", "type": "float"},
-                {"name": "total", "type": "float"},
-                {"name": "discount", "type": "float"}
-            ],
-            "filename": "sales_data.csv",
-            "file_type": "CSV"
-        },
-        "Product Catalog": {
-            "columns": [
-                {"name": "product_id", "type": "string"},
-                {"name": "name", "type": "string"},
-                {"name": "category", "type": "string"},
-                {"name": "subcategory", "type": "string"},
-                {"name": "price", "type": "float"},
-                {"name": "stock_quantity", "type": "integer"},
-                {"name": "rating", "type": "float"},
-                {"name": "is_available", "type": "boolean"},
-                {"name": "description", "type": "string"},
-                {"name": "created_date", "type": "string"},
-                {"name": "last_updated", "type": "string"},
-                {"name": "weight", "type": "float"}
-            ],
-            "filename": "product_catalog.csv",
-            "file_type": "CSV"
-        }
-    }
-    
     # Check if the requested dataset type exists
-    if request.dataset_type not in dataset_schemas:
+    if request.dataset_type not in synthetic.DATASET_SCHEMAS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unknown dataset type. Available types: {', '.join(dataset_schemas.keys())}"
+            detail=f"Unknown dataset type. Available types: {', '.join(synthetic.DATASET_SCHEMAS.keys())}"
         )
     
-    dataset_schema = dataset_schemas[request.dataset_type]
+    dataset_schema = synthetic.DATASET_SCHEMAS[request.dataset_type]
     
     # Generate random data based on schema
-    data = []
-    for i in range(request.num_rows):
-        row = {}
-        for column in dataset_schema["columns"]:
-            if column["type"] == "string":
-                if "id" in column["name"]:
-                    row[column["name"]] = f"{column['name'].split('_')[0].upper()}{i+1:04d}"
-                elif "name" in column["name"]:
-                    row[column["name"]] = random.choice([
-                        "Smith", "Johnson", "Williams", "Jones", "Brown", 
-                        "Davis", "Miller", "Wilson", "Moore", "Taylor",
-                        "Anderson", "Thomas", "Jackson", "White", "Harris"
-                    ])
-                elif "gender" in column["name"]:
-                    row[column["name"]] = random.choice(["Male", "Female", "Other"])
-                elif "category" in column["name"]:
-                    row[column["name"]] = random.choice([
-                        "Electronics", "Clothing", "Books", "Home", "Food", 
-                        "Sports", "Beauty", "Toys", "Automotive", "Garden"
-                    ])
-                elif "subcategory" in column["name"]:
-                    row[column["name"]] = random.choice([
-                        "Phones", "T-shirts", "Fiction", "Kitchen", "Snacks", 
-                        "Outdoor", "Skincare", "Games", "Tools", "Plants"
-                    ])
-                elif "date" in column["name"]:
-                    row[column["name"]] = f"2023-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-                elif "description" in column["name"]:
-                    row[column["name"]] = "This is a sample product description."
-                else:
-                    row[column["name"]] = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            elif column["type"] == "integer":
-                if "age" in column["name"]:
-                    row[column["name"]] = random.randint(18, 80)
-                elif "quantity" in column["name"] or "stock" in column["name"]:
-                    row[column["name"]] = random.randint(1, 100)
-                elif "subscription" in column["name"]:
-                    row[column["name"]] = random.choice([1, 3, 6, 12, 24])
-                else:
-                    row[column["name"]] = random.randint(1, 1000)
-            elif column["type"] == "float":
-                if "price" in column["name"] or "charges" in column["name"]:
-                    row[column["name"]] = round(random.uniform(10, 200), 2)
-                elif "discount" in column["name"]:
-                    row[column["name"]] = round(random.uniform(0, 0.3), 2)
-                elif "total" in column["name"]:
-                    row[column["name"]] = round(random.uniform(50, 1000), 2)
-                elif "rating" in column["name"]:
-                    row[column["name"]] = round(random.uniform(1, 5), 1)
-                elif "weight" in column["name"]:
-                    row[column["name"]] = round(random.uniform(0.1, 10), 2)
-                else:
-                    row[column["name"]] = round(random.uniform(0, 100), 2)
-            elif column["type"] == "boolean":
-                if "churn" in column["name"]:
-                    row[column["name"]] = random.random() > 0.7  # 30% churn rate
-                else:
-                    row[column["name"]] = random.choice([True, False])
-        data.append(row)
+    data = synthetic.random_rows(dataset_schema["columns"], request.num_rows)
     
     # Calculate size in bytes (approximate)
     size = len(json.dumps(data))
     
     # Calculate schema with missing values
-    schema = []
-    for column in dataset_schema["columns"]:
-        schema.append({
-            "name": column["name"],
-            "type": column["type"],
-            "missing": 0,  # No missing values in random data
-            "example": str(data[0][column["name"]])
-        })
+    schema = synthetic.column_schema(dataset_schema["columns"], data)
     
     # Create new dataset
     db_dataset = models.Dataset(
         name=f"Random {request.dataset_type}",
         filename=dataset_schema["filename"],
         description=f"Randomly generated {request.dataset_type} with {request.num_rows} rows",
-        data=data,
         schema=schema,
         rows=len(data),
         columns=len(schema),
@@ -338,84 +267,217 @@ def create_random_dataset(
         file_type=dataset_schema["file_type"],
         tags=request.dataset_type.lower().replace(" ", ","),
         missing_values=0,  # No missing values in random data
+        content_hash=await run_in_threadpool(memo.canonical_hash, data),
         user_id=current_user.id
     )
     
     db.add(db_dataset)
-    db.commit()
-    db.refresh(db_dataset)
+    await db.flush()
+    await db.execute(insert(models.DatasetChunk), storage.chunk_rows(db_dataset.id, data))
+    await db.commit()
+    await db.refresh(db_dataset)
     return db_dataset
 
+# Hyperparameters the response schema fills in when a stored model lacks them
+HYPERPARAMETER_DEFAULTS = schemas.ModelHyperparameters().dict()
+
+def model_row(schema, model, **values):
+    """A model as the response dict of ``schema``, built without pydantic validation"""
+    return serialization.from_object(
+        schema, model, hyperparameters={**HYPERPARAMETER_DEFAULTS, **(model.hyperparameters or {})}, **values
+    )
+
+def job_row(job, model_name, model_type, dataset_name, **values):
+    """A job with its model and dataset names as a ``schemas.JobWithDetails`` dict"""
+    return serialization.from_object(
+        schemas.JobWithDetails, job,
+        save_output=bool(job.save_output),
+        model_name=model_name,
+        model_type=model_type,
+        dataset_name=dataset_name,
+        **values
+    )
+
 @app.get("/datasets/", response_model=List[schemas.Dataset])
-def get_user_datasets(
-    db: Session = Depends(get_db),
+async def get_user_datasets(
+    response: Response,
+    name: Optional[str] = None,
+    file_type: Optional[str] = None,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    datasets = db.query(models.Dataset).filter(models.Dataset.user_id == current_user.id).all()
-    return datasets
+    # One page of the user's datasets, optionally filtered by name prefix and file type
+    statement = select(models.Dataset).where(models.Dataset.user_id == current_user.id)
+    if name:
+        statement = statement.where(pagination.name_prefix(models.Dataset.name, name))
+    if file_type:
+        statement = statement.where(models.Dataset.file_type == file_type)
+    statement = pagination.paginate(statement, page, {
+        "created_at": models.Dataset.created_at,
+        "name": models.Dataset.name,
+        "id": models.Dataset.id,
+    }, models.Dataset.id, models.Dataset.user_id == current_user.id)
+    datasets = pagination.next_page((await db.scalars(statement)).all(), page, response)
+    return serialization.respond([serialization.from_object(schemas.Dataset, dataset) for dataset in datasets], response)
 
 @app.get("/datasets/{dataset_id}", response_model=schemas.DatasetDetails)
-def get_dataset_details(
+async def get_dataset_details(
     dataset_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    dataset = db.query(models.Dataset).filter(
+    dataset = await db.scalar(select(models.Dataset).where(
         models.Dataset.id == dataset_id,
         models.Dataset.user_id == current_user.id
-    ).first()
+    ))
     
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
     
-    # Create a response with sample data (first 10 rows)
-    result = schemas.DatasetDetails(
-        id=dataset.id,
-        name=dataset.name,
-        description=dataset.description,
-        filename=dataset.filename,
-        rows=dataset.rows,
-        columns=dataset.columns,
-        size=dataset.size,
-        file_type=dataset.file_type,
-        tags=dataset.tags,
-        missing_values=dataset.missing_values,
-        used_in_jobs=dataset.used_in_jobs,
-        user_id=dataset.user_id,
-        created_at=dataset.created_at,
-        updated_at=dataset.updated_at,
-        column_schema=dataset.schema,
-        sample_data=dataset.data[:10]  # Only return first 10 rows
+    # Create a response with sample data (first 10 rows, all in the first stored chunk)
+    first_rows = await db.scalar(
+        select(models.DatasetChunk.rows)
+        .where(models.DatasetChunk.dataset_id == dataset.id)
+        .order_by(models.DatasetChunk.start_row)
+        .limit(1)
     )
-    
-    return result
+    return serialization.respond(serialization.from_object(
+        schemas.DatasetDetails,
+        dataset,
+        column_schema=[serialization.from_mapping(schemas.ColumnSchema, column) for column in dataset.schema],
+        sample_data=(first_rows or [])[:10]
+    ))
 
 @app.delete("/datasets/{dataset_id}")
-def delete_dataset(
+async def delete_dataset(
     dataset_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    dataset = db.query(models.Dataset).filter(
+    dataset = await db.scalar(select(models.Dataset).where(
         models.Dataset.id == dataset_id,
         models.Dataset.user_id == current_user.id
-    ).first()
+    ))
     
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
     
-    db.delete(dataset)
-    db.commit()
+    # Also without foreign key enforcement (SQLite)
+    await db.execute(delete(models.DatasetChunk).where(models.DatasetChunk.dataset_id == dataset.id))
+    await db.delete(dataset)
+    await db.commit()
     
     return {"message": "Dataset deleted successfully"}
 
+@app.post("/datasets/{dataset_id}/rows", response_model=schemas.Dataset)
+async def append_dataset_rows(
+    dataset_id: int,
+    rows: schemas.DatasetAppend,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    dataset = await db.scalar(select(models.Dataset).where(
+        models.Dataset.id == dataset_id,
+        models.Dataset.user_id == current_user.id
+    ))
+
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    if not rows.data:
+        raise HTTPException(status_code=400, detail="No rows to append")
+
+    # New rows must match the existing columns so trained models can consume them
+    column_names = [col["name"] for col in dataset.schema]
+    for row in rows.data:
+        if set(row.keys()) != set(column_names):
+            raise HTTPException(status_code=400, detail="Appended rows must have the same columns as the dataset")
+
+    if dataset.rows + len(rows.data) > storage.MAX_DATASET_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dataset exceeds row limit. Maximum {storage.MAX_DATASET_ROWS} rows allowed."
+        )
+
+    # Update missing value counts in the schema
+    schema = []
+    for col in dataset.schema:
+        missing = sum(1 for row in rows.data if row[col["name"]] is None)
+        schema.append({**col, "missing": col.get("missing", 0) + missing})
+
+    # The new rows are stored as chunks after the existing ones, which are not read back
+    await db.execute(insert(models.DatasetChunk), storage.chunk_rows(dataset.id, rows.data, start_row=dataset.rows))
+
+    # Assign a new object so the JSON column is flagged as modified
+    dataset.schema = schema
+    dataset.rows = dataset.rows + len(rows.data)
+    dataset.size = dataset.size + len(json.dumps(rows.data))
+    dataset.missing_values = sum(col["missing"] for col in schema)
+    # Recomputed from the stored chunks when a job next needs it (memo.ensure_content_hash)
+    dataset.content_hash = None
+
+    await db.commit()
+    await db.refresh(dataset)
+    return dataset
+
+# Parse an uploaded CSV, JSON or Excel file into rows with cleaned-up types.
+# Runs in a worker thread: pandas would hold up the event loop for large files
+def parse_upload(content, file_extension, has_header):
+    import pandas as pd
+    import io
+    
+    if file_extension == 'csv':
+        # Pass header=None if first row is not header
+        if has_header:
+            df = pd.read_csv(io.StringIO(content.decode('utf-8')))
+        else:
+            df = pd.read_csv(io.StringIO(content.decode('utf-8')), header=None)
+            # Generate column names (Column1, Column2, etc.)
+            df.columns = [f'Column{i+1}' for i in range(len(df.columns))]
+    elif file_extension in ['json']:
+        # Convert JSON to dataframe
+        json_data = json.loads(content.decode('utf-8'))
+        
+        # Handle both array and object formats
+        if not isinstance(json_data, list):
+            json_data = [json_data]  # Convert single object to list
+            
+        df = pd.DataFrame(json_data)
+    elif file_extension in ['xlsx', 'xls']:
+        # Convert Excel to dataframe - pass header=None if first row is not header
+        if has_header:
+            df = pd.read_excel(io.BytesIO(content))
+        else:
+            df = pd.read_excel(io.BytesIO(content), header=None)
+            # Generate column names
+            df.columns = [f'Column{i+1}' for i in range(len(df.columns))]
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file type. Please upload CSV, JSON, or Excel files.")
+    
+    # Clean up and standardize data types
+    for column in df.columns:
+        # Check if column contains numeric values
+        if pd.api.types.is_numeric_dtype(df[column]):
+            # Try to convert to int if all values are whole numbers
+            if df[column].dropna().apply(lambda x: x == int(x)).all():
+                df[column] = df[column].fillna(0).astype(int)
+            else:
+                df[column] = df[column].fillna(0.0).astype(float)
+        else:
+            # Convert all non-numeric columns to string
+            df[column] = df[column].fillna('').astype(str)
+    
+    # Convert dataframe to records (list of dictionaries)
+    return df.to_dict(orient="records")
+
 @app.post("/datasets/upload/", response_model=schemas.Dataset)
 async def upload_dataset(
     file: UploadFile = File(...),
     name: str = Form(...),
     description: str = Form(None),
     first_row_is_header: str = Form("true"),  # Default to true
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Read file content
@@ -427,56 +489,9 @@ async def upload_dataset(
     # Convert first_row_is_header to boolean
     has_header = first_row_is_header.lower() == "true"
     
-    # Parse file based on detected type and convert to dataframe
+    # Parse file based on detected type, off the event loop
     try:
-        import pandas as pd
-        import numpy as np
-        import io
-        import json
-        
-        if file_extension == 'csv':
-            # Pass header=None if first row is not header
-            if has_header:
-                df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-            else:
-                df = pd.read_csv(io.StringIO(content.decode('utf-8')), header=None)
-                # Generate column names (Column1, Column2, etc.)
-                df.columns = [f'Column{i+1}' for i in range(len(df.columns))]
-        elif file_extension in ['json']:
-            # Convert JSON to dataframe
-            json_data = json.loads(content.decode('utf-8'))
-            
-            # Handle both array and object formats
-            if not isinstance(json_data, list):
-                json_data = [json_data]  # Convert single object to list
-                
-            df = pd.DataFrame(json_data)
-        elif file_extension in ['xlsx', 'xls']:
-            # Convert Excel to dataframe - pass header=None if first row is not header
-            if has_header:
-                df = pd.read_excel(io.BytesIO(content))
-            else:
-                df = pd.read_excel(io.BytesIO(content), header=None)
-                # Generate column names
-                df.columns = [f'Column{i+1}' for i in range(len(df.columns))]
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type. Please upload CSV, JSON, or Excel files.")
-        
-        # Clean up and standardize data types
-        for column in df.columns:
-            # Check if column contains numeric values
-            if pd.api.types.is_numeric_dtype(df[column]):
-                # Try to convert to int if all values are whole numbers
-                if df[column].dropna().apply(lambda x: x == int(x)).all():
-                    df[column] = df[column].fillna(0).astype(int)
-                else:
-                    df[column] = df[column].fillna(0.0).astype(float)
-            else:
-                # Convert all non-numeric columns to string
-                df[column] = df[column].fillna('').astype(str)
-        
-        # Convert dataframe to records (list of dictionaries)
-        data = df.to_dict(orient="records")
+        data = await run_in_threadpool(parse_upload, content, file_extension, has_header)
         
         # Generate a new CSV filename
         csv_filename = file.filename.rsplit(".", 1)[0] + ".csv"
@@ -494,10 +509,10 @@ async def upload_dataset(
             detail="Dataset exceeds column limit. Maximum 20 columns allowed."
         )
     
-    if len(data) > 5000:
+    if len(data) > storage.MAX_DATASET_ROWS:
         raise HTTPException(
             status_code=400, 
-            detail="Dataset exceeds row limit. Maximum 5000 rows allowed."
+            detail=f"Dataset exceeds row limit. Maximum {storage.MAX_DATASET_ROWS} rows allowed."
         )
     
     # Generate schema from the dataset
@@ -537,7 +552,6 @@ async def upload_dataset(
         name=name,
         filename=csv_filename,  # Use the CSV filename
         description=description or "",
-        data=data,
         schema=schema,
         rows=len(data),
         columns=len(schema),
@@ -545,28 +559,31 @@ async def upload_dataset(
         file_type="CSV",  # Always set to CSV
         tags="",
         missing_values=sum(col["missing"] for col in schema),
+        content_hash=await run_in_threadpool(memo.canonical_hash, data),
         user_id=current_user.id
     )
     
     db.add(db_dataset)
-    db.commit()
-    db.refresh(db_dataset)
+    await db.flush()
+    await db.execute(insert(models.DatasetChunk), storage.chunk_rows(db_dataset.id, data))
+    await db.commit()
+    await db.refresh(db_dataset)
     return db_dataset
 
 # ML Model Endpoints
 @app.post("/models/", response_model=schemas.Model)
-def create_model(
+async def create_model(
     model: schemas.ModelCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     try:
         # Only verify the dataset if dataset_id is provided
         if model.dataset_id:
-            dataset = db.query(models.Dataset).filter(
+            dataset = await db.scalar(select(models.Dataset).where(
                 models.Dataset.id == model.dataset_id,
                 models.Dataset.user_id == current_user.id
-            ).first()
+            ))
             
             if not dataset:
                 raise HTTPException(status_code=404, detail="Dataset not found or not accessible")
@@ -585,88 +602,93 @@ def create_model(
         )
         
         db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
+        await db.commit()
+        await db.refresh(db_model)
         return db_model
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error creating model: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create model: {str(e)}")
 
 @app.get("/models/", response_model=List[schemas.ModelWithDataset])
-def get_user_models(
-    db: Session = Depends(get_db),
+async def get_user_models(
+    response: Response,
+    name: Optional[str] = None,
+    model_type: Optional[models.ModelType] = None,
+    task_type: Optional[models.ModelTaskType] = None,
+    dataset_id: Optional[int] = None,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     try:
         # Get user's models with dataset names using a left join (to include models without datasets)
-        models_with_datasets = db.query(
+        statement = select(
             models.MLModel, 
             models.Dataset.name.label("dataset_name")
         ).outerjoin(
             models.Dataset, 
             models.MLModel.dataset_id == models.Dataset.id
-        ).filter(
+        ).where(
             models.MLModel.user_id == current_user.id
-        ).all()
+        )
+        if name:
+            statement = statement.where(pagination.name_prefix(models.MLModel.name, name))
+        if model_type:
+            statement = statement.where(models.MLModel.model_type == model_type)
+        if task_type:
+            statement = statement.where(models.MLModel.task_type == task_type)
+        if dataset_id is not None:
+            statement = statement.where(models.MLModel.dataset_id == dataset_id)
+        statement = pagination.paginate(statement, page, {
+            "created_at": models.MLModel.created_at,
+            "name": models.MLModel.name,
+            "id": models.MLModel.id,
+        }, models.MLModel.id, models.MLModel.user_id == current_user.id)
+        models_with_datasets = pagination.next_page((await db.execute(statement)).all(), page, response, lambda row: row[0])
         
         # Format the response
-        result = []
-        for model, dataset_name in models_with_datasets:
-            model_dict = {
-                "id": model.id,
-                "name": model.name,
-                "description": model.description,
-                "model_type": model.model_type,
-                "task_type": model.task_type,
-                "dataset_id": model.dataset_id,
-                "dataset_name": dataset_name,  # This can be None
-                "target_column": model.target_column,
-                "feature_columns": model.feature_columns,
-                "hyperparameters": model.hyperparameters,
-                "is_trained": model.is_trained,
-                "training_accuracy": model.training_accuracy,
-                "evaluation_metrics": model.evaluation_metrics,
-                "user_id": model.user_id,
-                "created_at": model.created_at,
-                "updated_at": model.updated_at
-            }
-            result.append(model_dict)
+        result = [
+            model_row(schemas.ModelWithDataset, model, dataset_name=dataset_name)  # dataset_name can be None
+            for model, dataset_name in models_with_datasets
+        ]
         
-        return result
+        return serialization.respond(result, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting models: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get models: {str(e)}")
 
 @app.get("/models/{model_id}", response_model=schemas.Model)
-def get_model_details(
+async def get_model_details(
     model_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get model by ID
-    model = db.query(models.MLModel).filter(
+    model = await db.scalar(select(models.MLModel).where(
         models.MLModel.id == model_id,
         models.MLModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
     
-    return model
+    return serialization.respond(model_row(schemas.Model, model))
 
 @app.put("/models/{model_id}", response_model=schemas.Model)
-def update_model(
+async def update_model(
     model_id: int,
     model_update: schemas.ModelUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get model by ID
-    db_model = db.query(models.MLModel).filter(
+    db_model = await db.scalar(select(models.MLModel).where(
         models.MLModel.id == model_id,
         models.MLModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not db_model:
         raise HTTPException(status_code=404, detail="Model not found")
@@ -683,7 +705,7 @@ def update_model(
     
     if model_update.target_column is not None:
         # Verify that the target column exists in the dataset
-        dataset = db.query(models.Dataset).filter(models.Dataset.id == db_model.dataset_id).first()
+        dataset = await db.scalar(select(models.Dataset).where(models.Dataset.id == db_model.dataset_id))
         column_names = [col["name"] for col in dataset.schema]
         
         if model_update.target_column not in column_names:
@@ -694,293 +716,352 @@ def update_model(
     if model_update.feature_columns is not None:
         db_model.feature_columns = model_update.feature_columns
     
-    db.commit()
-    db.refresh(db_model)
+    await db.commit()
+    await db.refresh(db_model)
     return db_model
 
 @app.delete("/models/{model_id}")
-def delete_model(
+async def delete_model(
     model_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get model by ID
-    db_model = db.query(models.MLModel).filter(
+    db_model = await db.scalar(select(models.MLModel).where(
         models.MLModel.id == model_id,
         models.MLModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not db_model:
         raise HTTPException(status_code=404, detail="Model not found")
     
     # Delete the model
-    db.delete(db_model)
-    db.commit()
+    await db.delete(db_model)
+    await db.commit()
     
     return {"message": "Model deleted successfully"}
 
 @app.post("/models/{model_id}/train", response_model=schemas.Model)
-def train_model(
+async def train_model(
     model_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    import pandas as pd
-    import numpy as np
-    from sklearn.preprocessing import LabelEncoder
-    from sklearn.model_selection import train_test_split
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.linear_model import LogisticRegression, LinearRegression
-    from sklearn.svm import SVC, SVR
-    from sklearn.neural_network import MLPClassifier, MLPRegressor
-    from sklearn.cluster import KMeans, DBSCAN
-    from sklearn.decomposition import PCA
-    from sklearn.metrics import accuracy_score, precision_score, f1_score, mean_absolute_error, mean_squared_error, r2_score, silhouette_score
-    
     # Get model by ID
-    db_model = db.query(models.MLModel).filter(
+    db_model = await db.scalar(select(models.MLModel).where(
         models.MLModel.id == model_id,
         models.MLModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not db_model:
         raise HTTPException(status_code=404, detail="Model not found")
     
     # Get the associated dataset
-    dataset = db.query(models.Dataset).filter(models.Dataset.id == db_model.dataset_id).first()
+    dataset = await db.scalar(select(models.Dataset).where(models.Dataset.id == db_model.dataset_id))
     if not dataset:
         raise HTTPException(status_code=404, detail="Associated dataset not found")
     
-    # Convert dataset to DataFrame
-    df = pd.DataFrame(dataset.data)
-    
-    # Preprocessing - Binary encoding for categorical variables
-    encoders = {}
-    for column in df.columns:
-        if df[column].dtype == 'object':
-            encoder = LabelEncoder()
-            df[column] = encoder.fit_transform(df[column].astype(str))
-            encoders[column] = encoder
-    
-    # Feature selection - use job's feature_columns if provided, otherwise fall back to model's
-    feature_columns = db_model.feature_columns or df.columns.tolist()
-    target_column = db_model.target_column or df.columns.tolist()[0]
+    # Default to the first column as the target
+    target_column = db_model.target_column or dataset.schema[0]["name"]
     
-    if target_column and target_column in feature_columns:
-        feature_columns.remove(target_column)
+    try:
+        # Training is CPU-bound; run it on the thread pool so the event loop keeps serving
+        artifact, metrics = await run_in_threadpool(
+            training.train_dataset,
+            db_model.model_type,
+            db_model.task_type,
+            db_model.hyperparameters,
+            dataset,
+            db_model.feature_columns,
+            target_column
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    X = df[feature_columns]
+    # Update model information
+    artifact.update(dataset_id=dataset.id, n_rows=dataset.rows)
+    db_model.is_trained = True
+    if training.is_supervised(db_model.task_type):
+        db_model.training_accuracy = metrics.get('accuracy') or metrics.get('r2')
+    db_model.evaluation_metrics = metrics
+    store_artifact(db_model, artifact)
     
-    # For supervised learning, prepare target variable
-    if db_model.task_type in [schemas.ModelTaskType.CLASSIFICATION, schemas.ModelTaskType.REGRESSION]:
-        if not target_column:
-            raise HTTPException(status_code=400, detail="Target column required for supervised learning")
-        
-        y = df[target_column]
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=db_model.hyperparameters.get('random_state', 42)
-        )
+    await db.commit()
+    await db.refresh(db_model)
+    return db_model
+
+async def get_model_kernel(db, model_id, user_id):
+    # Look the model up without its blobs; the kernel is only read when the cached copy is stale
+    db_model = await db.scalar(select(models.MLModel).where(
+        models.MLModel.id == model_id,
+        models.MLModel.user_id == user_id
+    ))
+    if not db_model:
+        raise HTTPException(status_code=404, detail="Model not found")
+    if not db_model.is_trained:
+        raise HTTPException(status_code=400, detail="Model is not trained")
+    
+    found, kernel = scoring.kernel_cache.lookup(db_model.id, db_model.kernel_hash)
+    if not found:
+        blob = await db.scalar(select(models.MLModel.kernel).where(models.MLModel.id == db_model.id))
+        kernel = scoring.kernel_cache.store(db_model.id, scoring.blob_hash(blob), blob)
+    if kernel is None:
+        raise HTTPException(status_code=404, detail="No scoring kernel for this model type")
+    return kernel
+
+@app.post("/models/{model_id}/score", response_model=schemas.ScoreResponse)
+async def score_model(
+    model_id: int,
+    request: schemas.ScoreRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    # Score rows with the compiled NumPy kernel (linear, PCA and k-means models), without loading scikit-learn
+    kernel = await get_model_kernel(db, model_id, current_user.id)
+    try:
+        predictions = kernel.predict(request.rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"model_id": model_id, "kind": kernel.meta["kind"], "predictions": predictions}
+
+@app.get("/models/{model_id}/kernel")
+async def export_model_kernel(
+    model_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    # Download the kernel as an .npz archive, loadable with app/scoring.py and NumPy alone
+    kernel = await get_model_kernel(db, model_id, current_user.id)
+    return Response(
+        content=kernel.dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="model-{model_id}-kernel.npz"'}
+    )
+
+# Save the trained model state, and its scoring kernel when the model compiles to one
+def store_artifact(model, artifact):
+    model.artifact = training.dump_artifact(artifact)
+    try:
+        model.kernel = kernels.export_blob(artifact)
+    except Exception as e:
+        model.kernel = None
+        print(f"Could not export scoring kernel for model {model.id}: {str(e)}")
+    model.kernel_hash = scoring.blob_hash(model.kernel)
+
+# Complete a job from the training memo if an identical run exists. Called in a worker thread
+# (it may hash the dataset, and unpickles, exports and pickles the artifact), with its own session
+def complete_from_memo(job_id):
+    db = SessionLocal()
+    try:
+        job = db.get(models.Job, job_id)
+        model = db.get(models.MLModel, job.model_id)
+        dataset = db.get(models.Dataset, job.dataset_id)
+        cached = memo.lookup(db, memo.job_key(db, job, model, dataset))
+        if not cached:
+            return False
         
-        # Normalize features
-        scaler = StandardScaler()
-        X_train = scaler.fit_transform(X_train)
-        X_test = scaler.transform(X_test)
+        # A job that writes its per-row output reuses the output dataset of the memoized run,
+        # if that run wrote one with the same pass-through columns and it still exists
+        details = {}
+        if wants_output(job, model):
+            if (
+                cached.output_dataset_id is None
+                or (cached.passthrough_columns or []) != (job.passthrough_columns or [])
+                or db.query(models.Dataset.id).filter(
+                    models.Dataset.id == cached.output_dataset_id,
+                    models.Dataset.user_id == job.user_id
+                ).first() is None
+            ):
+                return False
+            job.output_dataset_id = cached.output_dataset_id
+            details["output_dataset_id"] = cached.output_dataset_id
         
-        # Train model based on type
-        model_type = db_model.model_type
-        hyperparams = db_model.hyperparameters
+        artifact = training.load_artifact(cached.artifact)
+        artifact.update(dataset_id=dataset.id, n_rows=dataset.rows)
         
-        if db_model.task_type == schemas.ModelTaskType.CLASSIFICATION:
-            if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
-                sklearn_model = LogisticRegression(
-                    C=hyperparams.get('C', 1.0),
-                    penalty=hyperparams.get('penalty', 'l2'),
-                    solver=hyperparams.get('solver', 'lbfgs'),
-                    max_iter=hyperparams.get('max_iter', 100),
-                    random_state=hyperparams.get('random_state', 42)
-                )
-            elif model_type == schemas.ModelType.SVM:
-                sklearn_model = SVC(
-                    C=hyperparams.get('C', 1.0),
-                    kernel=hyperparams.get('kernel', 'rbf'),
-                    gamma=hyperparams.get('gamma', 'scale'),
-                    random_state=hyperparams.get('random_state', 42)
-                )
-            elif model_type == schemas.ModelType.NEURAL_NETWORK:
-                sklearn_model = MLPClassifier(
-                    hidden_layer_sizes=hyperparams.get('hidden_layer_sizes', (100,)),
-                    activation=hyperparams.get('activation', 'relu'),
-                    learning_rate=hyperparams.get('learning_rate', 'constant'),
-                    learning_rate_init=hyperparams.get('learning_rate_init', 0.001),
-                    max_iter=hyperparams.get('max_iter', 200),
-                    random_state=hyperparams.get('random_state', 42)
-                )
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported model type for classification")
-            
-            # Train model
-            sklearn_model.fit(X_train, y_train)
-            
-            # Evaluate model
-            y_pred = sklearn_model.predict(X_test)
-            metrics = {
-                'accuracy': float(accuracy_score(y_test, y_pred)),
-                'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
-                'f1': float(f1_score(y_test, y_pred, average='weighted', zero_division=0))
-            }
-            
-        elif db_model.task_type == schemas.ModelTaskType.REGRESSION:
-            if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
-                sklearn_model = LinearRegression()
-            elif model_type == schemas.ModelType.SVR:
-                sklearn_model = SVR(
-                    C=hyperparams.get('C', 1.0),
-                    kernel=hyperparams.get('kernel', 'rbf'),
-                    gamma=hyperparams.get('gamma', 'scale')
-                )
-            elif model_type == schemas.ModelType.NEURAL_NETWORK:
-                sklearn_model = MLPRegressor(
-                    hidden_layer_sizes=hyperparams.get('hidden_layer_sizes', (100,)),
-                    activation=hyperparams.get('activation', 'relu'),
-                    learning_rate=hyperparams.get('learning_rate', 'constant'),
-                    learning_rate_init=hyperparams.get('learning_rate_init', 0.001),
-                    max_iter=hyperparams.get('max_iter', 200),
-                    random_state=hyperparams.get('random_state', 42)
-                )
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported model type for regression")
-            
-            # Train model
-            sklearn_model.fit(X_train, y_train)
-            
-            # Evaluate model
-            y_pred = sklearn_model.predict(X_test)
-            metrics = {
-                'mae': float(mean_absolute_error(y_test, y_pred)),
-                'mse': float(mean_squared_error(y_test, y_pred)),
-                'r2': float(r2_score(y_test, y_pred))
-            }
-            
-        # Update model information
-        db_model.is_trained = True
-        db_model.training_accuracy = metrics.get('accuracy') or metrics.get('r2')
-        db_model.evaluation_metrics = metrics
-            
-    else:  # Unsupervised learning
-        # Normalize features
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        job.status = models.JobStatus.COMPLETED
+        job.progress = 100
+        job.started_at = func.now()
+        job.completed_at = func.now()
+        job.results = {**cached.results, **details, "memoized": True}
         
-        # No test-train split for unsupervised learning
-        if db_model.task_type == schemas.ModelTaskType.CLUSTERING:
-            if model_type == schemas.ModelType.KMEANS:
-                sklearn_model = KMeans(
-                    n_clusters=hyperparams.get('n_clusters', 8),
-                    init=hyperparams.get('init', 'k-means++'),
-                    random_state=hyperparams.get('random_state', 42)
-                )
-                sklearn_model.fit(X_scaled)
-                labels = sklearn_model.labels_
-                metrics = {
-                    'inertia': float(sklearn_model.inertia_),
-                    'n_clusters': int(hyperparams.get('n_clusters', 8)),
-                    'silhouette_score': float(silhouette_score(X_scaled, labels, sample_size=min(1000, X_scaled.shape[0])))
-                }
-                
-            elif model_type == schemas.ModelType.DBSCAN:
-                sklearn_model = DBSCAN(
-                    eps=hyperparams.get('eps', 0.5),
-                    min_samples=hyperparams.get('min_samples', 5)
-                )
-                sklearn_model.fit(X_scaled)
-                labels = sklearn_model.labels_
-                n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
-                metrics = {
-                    'n_clusters': int(n_clusters),
-                    'n_noise': int(list(labels).count(-1))
-                }
-                
-        elif db_model.task_type == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
-            if model_type == schemas.ModelType.PCA:
-                sklearn_model = PCA(
-                    n_components=hyperparams.get('n_components', 2)
-                )
-                X_transformed = sklearn_model.fit_transform(X_scaled)
-                metrics = {
-                    'explained_variance_ratio': [float(v) for v in sklearn_model.explained_variance_ratio_],
-                    'n_components': int(hyperparams.get('n_components', 2))
-                }
+        model.is_trained = True
+        model.training_accuracy = cached.results.get('accuracy') or cached.results.get('r2')
+        model.evaluation_metrics = cached.results
+        store_artifact(model, artifact)
         
-        # Update model information
-        db_model.is_trained = True
-        db_model.evaluation_metrics = metrics
-    
-    db.commit()
-    db.refresh(db_model)
-    return db_model
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+# Task types whose jobs can write their per-row output as a new dataset
+OUTPUT_TASK_TYPES = [models.ModelTaskType.DIMENSIONALITY_REDUCTION, models.ModelTaskType.CLUSTERING]
+
+def wants_output(job, model):
+    return bool(job.save_output) and model.task_type in OUTPUT_TASK_TYPES
+
+def check_passthrough_columns(dataset, passthrough_columns):
+    column_names = [col["name"] for col in dataset.schema]
+    unknown = [column for column in passthrough_columns or [] if column not in column_names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Pass-through columns not in dataset: {unknown}")
 
 # Job Endpoints
 @app.post("/jobs/", response_model=schemas.Job)
-def create_job(
+async def create_job(
     job: schemas.JobCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Verify the model exists and belongs to this user
-    model = db.query(models.MLModel).filter(
+    model = await db.scalar(select(models.MLModel).where(
         models.MLModel.id == job.model_id,
         models.MLModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not model:
         raise HTTPException(status_code=404, detail="Model not found or not accessible")
     
+    # Incremental retraining continues from a previous training run
+    if job.job_type == schemas.JobType.INCREMENTAL and not model.is_trained:
+        raise HTTPException(status_code=400, detail="Incremental retraining requires a trained model")
+    if job.job_type == schemas.JobType.INCREMENTAL and not training.supports_incremental(model.model_type, model.evaluation_metrics):
+        raise HTTPException(
+            status_code=400,
+            detail="This model cannot learn incrementally (only neural networks and models trained by streaming "
+                   "large datasets support it). Run a full training job instead."
+        )
+    
     # Make sure a dataset_id is provided
     if not job.dataset_id:
         raise HTTPException(status_code=400, detail="Dataset ID is required")
     
     # Verify dataset exists and belongs to this user
-    dataset = db.query(models.Dataset).filter(
+    dataset = await db.scalar(select(models.Dataset).where(
         models.Dataset.id == job.dataset_id,
         models.Dataset.user_id == current_user.id
-    ).first()
+    ))
     
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found or not accessible")
     
+    check_passthrough_columns(dataset, job.passthrough_columns)
+    
     # Create new job
     db_job = models.Job(
         name=job.name,
         description=job.description,
+        job_type=job.job_type or models.JobType.TRAIN,
         model_id=job.model_id,
         dataset_id=job.dataset_id,
         target_column=job.target_column,
         feature_columns=job.feature_columns,
+        save_output=job.save_output,
+        passthrough_columns=job.passthrough_columns,
+        use_cache=job.use_cache,
         status=models.JobStatus.PENDING,  # Always set to PENDING by default
         progress=0,
         user_id=current_user.id
     )
     
     db.add(db_job)
-    db.commit()
-    db.refresh(db_job)
+    await db.commit()
+    await db.refresh(db_job)
     
-    # Start the job asynchronously (in a real implementation, this would be handled by a task queue)
-    # For simplicity, we'll just kick off the training here directly
-    import threading
-    threading.Thread(target=run_training_job, args=(db_job.id,)).start()
+    # An identical earlier run (same data, model configuration, features and seed) completes the job right away
+    if job.use_cache and await run_in_threadpool(complete_from_memo, db_job.id):
+        await db.refresh(db_job)
+        return db_job
+    
+    # Queue the job; the training dispatcher's scheduler shares workers fairly between users
+    job_queue.queue([db_job])
+    await db.commit()
+    job_queue.notify()
     
     return db_job
 
+@app.post("/jobs/pipeline", response_model=List[schemas.Job])
+async def create_pipeline_jobs(
+    pipeline_job: schemas.PipelineJobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if not pipeline_job.model_ids:
+        raise HTTPException(status_code=400, detail="At least one model is required")
+    
+    # Verify dataset exists and belongs to this user
+    dataset = await db.scalar(select(models.Dataset).where(
+        models.Dataset.id == pipeline_job.dataset_id,
+        models.Dataset.user_id == current_user.id
+    ))
+    
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found or not accessible")
+    
+    # Verify every model exists and belongs to this user
+    user_models = (await db.scalars(select(models.MLModel).where(
+        models.MLModel.id.in_(pipeline_job.model_ids),
+        models.MLModel.user_id == current_user.id
+    ))).all()
+    models_by_id = {model.id: model for model in user_models}
+    missing = [model_id for model_id in pipeline_job.model_ids if model_id not in models_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Models not found or not accessible: {missing}")
+    
+    check_passthrough_columns(dataset, pipeline_job.passthrough_columns)
+    
+    # One job per model, so each can be followed and inspected on its own
+    jobs = []
+    for model_id in dict.fromkeys(pipeline_job.model_ids):
+        model = models_by_id[model_id]
+        db_job = models.Job(
+            name=f"{pipeline_job.name} - {model.name}",
+            description=pipeline_job.description,
+            job_type=models.JobType.TRAIN,
+            model_id=model.id,
+            dataset_id=dataset.id,
+            target_column=pipeline_job.target_column,
+            feature_columns=pipeline_job.feature_columns,
+            save_output=pipeline_job.save_output,
+            passthrough_columns=pipeline_job.passthrough_columns,
+            use_cache=pipeline_job.use_cache,
+            status=models.JobStatus.PENDING,
+            progress=0,
+            user_id=current_user.id
+        )
+        db.add(db_job)
+        await db.commit()
+        
+        if pipeline_job.use_cache:
+            await run_in_threadpool(complete_from_memo, db_job.id)
+        await db.refresh(db_job)
+        jobs.append(db_job)
+    
+    # The remaining jobs run as one DAG so they can share preprocessing and train concurrently
+    pending = [job for job in jobs if job.status == models.JobStatus.PENDING]
+    if pending:
+        job_queue.queue(pending)
+        await db.commit()
+        job_queue.notify()
+    
+    return jobs
+
 @app.get("/jobs/", response_model=List[schemas.JobWithDetails])
-def get_user_jobs(
-    db: Session = Depends(get_db),
+async def get_user_jobs(
+    response: Response,
+    name: Optional[str] = None,
+    status: Optional[models.JobStatus] = None,
+    model_type: Optional[models.ModelType] = None,
+    task_type: Optional[models.ModelTaskType] = None,
+    model_id: Optional[int] = None,
+    dataset_id: Optional[int] = None,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get user's jobs with model and dataset names
-    jobs_with_details = db.query(
+    statement = select(
         models.Job,
         models.MLModel.name.label("model_name"),
         models.MLModel.model_type.label("model_type"),
@@ -989,43 +1070,79 @@ def get_user_jobs(
         models.MLModel, models.Job.model_id == models.MLModel.id
     ).join(
         models.Dataset, models.Job.dataset_id == models.Dataset.id
-    ).filter(
+    ).where(
         models.Job.user_id == current_user.id
-    ).all()
+    )
+    if name:
+        statement = statement.where(pagination.name_prefix(models.Job.name, name))
+    if status:
+        statement = statement.where(models.Job.status == status)
+    if model_type:
+        statement = statement.where(models.MLModel.model_type == model_type)
+    if task_type:
+        statement = statement.where(models.MLModel.task_type == task_type)
+    if model_id is not None:
+        statement = statement.where(models.Job.model_id == model_id)
+    if dataset_id is not None:
+        statement = statement.where(models.Job.dataset_id == dataset_id)
+    statement = pagination.paginate(statement, page, {
+        "created_at": models.Job.created_at,
+        "name": models.Job.name,
+        "id": models.Job.id,
+    }, models.Job.id, models.Job.user_id == current_user.id)
+    jobs_with_details = pagination.next_page((await db.execute(statement)).all(), page, response, lambda row: row[0])
     
     # Format the response
-    result = []
-    for job, model_name, model_type, dataset_name in jobs_with_details:
-        job_dict = {
-            "id": job.id,
-            "name": job.name,
-            "description": job.description,
-            "status": job.status,
-            "progress": job.progress,
-            "error_message": job.error_message,
-            "results": job.results,
-            "model_id": job.model_id,
-            "dataset_id": job.dataset_id,
-            "model_name": model_name,
-            "model_type": model_type,
-            "dataset_name": dataset_name,
-            "user_id": job.user_id,
-            "created_at": job.created_at,
-            "started_at": job.started_at,
-            "completed_at": job.completed_at
-        }
-        result.append(job_dict)
+    result = [
+        job_row(job, model_name, model_type, dataset_name)
+        for job, model_name, model_type, dataset_name in jobs_with_details
+    ]
     
-    return result
+    return serialization.respond(result, response)
+
+# Timing percentiles per model type, to find where training time goes
+@app.get("/jobs/timings", response_model=List[schemas.StageTimingSummary])
+async def get_job_timing_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    rows = (await db.execute(select(models.MLModel.model_type, models.Job.timings).join(
+        models.MLModel, models.Job.model_id == models.MLModel.id
+    ).where(
+        models.Job.user_id == current_user.id,
+        models.Job.status == models.JobStatus.COMPLETED,
+        models.Job.timings.isnot(None)
+    ))).all()
+    
+    # Collect the samples of every stage per model type
+    samples = {}
+    for model_type, timings in rows:
+        for stage, seconds in timings.items():
+            samples.setdefault((model_type.value, stage), []).append(seconds)
+    
+    summary = []
+    for (model_type, stage), values in sorted(samples.items()):
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        summary.append({
+            "model_type": model_type,
+            "stage": stage,
+            "count": len(values),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": float(max(values))
+        })
+    return summary
 
 @app.get("/jobs/{job_id}", response_model=schemas.JobWithDetails)
-def get_job_details(
+async def get_job_details(
     job_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get job by ID with related details
-    job_with_details = db.query(
+    job_with_details = (await db.execute(select(
         models.Job,
         models.MLModel.name.label("model_name"),
         models.MLModel.model_type.label("model_type"),
@@ -1034,71 +1151,57 @@ def get_job_details(
         models.MLModel, models.Job.model_id == models.MLModel.id
     ).join(
         models.Dataset, models.Job.dataset_id == models.Dataset.id
-    ).filter(
+    ).where(
         models.Job.id == job_id,
         models.Job.user_id == current_user.id
-    ).first()
+    ))).first()
     
     if not job_with_details:
         raise HTTPException(status_code=404, detail="Job not found")
     
     job, model_name, model_type, dataset_name = job_with_details
     
-    # Format the response
-    result = {
-        "id": job.id,
-        "name": job.name,
-        "description": job.description,
-        "status": job.status,
-        "progress": job.progress,
-        "error_message": job.error_message,
-        "results": job.results,
-        "model_id": job.model_id,
-        "dataset_id": job.dataset_id,
-        "model_name": model_name,
-        "model_type": model_type,
-        "dataset_name": dataset_name,
-        "user_id": job.user_id,
-        "created_at": job.created_at,
-        "started_at": job.started_at,
-        "completed_at": job.completed_at
-    }
+    # A waiting job's queue position and estimated start (kept on its row) move without any
+    # write by its owner, so they are never served from the response cache
+    if job.status in job_queue.WAITING:
+        response.headers["Cache-Control"] = "no-store"
     
-    return result
+    # Format the response
+    return serialization.respond(job_row(job, model_name, model_type, dataset_name), response)
 
 @app.delete("/jobs/{job_id}")
-def delete_job(
+async def delete_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get job by ID
-    job = db.query(models.Job).filter(
+    job = await db.scalar(select(models.Job).where(
         models.Job.id == job_id,
         models.Job.user_id == current_user.id
-    ).first()
+    ))
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Delete the job
-    db.delete(job)
-    db.commit()
+    await db.delete(job)
+    await db.commit()
     
     return {"message": "Job deleted successfully"}
 
 # Start a job
 @app.put("/jobs/{job_id}/start", response_model=schemas.Job)
-def start_job(
+async def start_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get job by ID
-    job = db.query(models.Job).filter(
+    job = await db.scalar(select(models.Job).where(
         models.Job.id == job_id,
         models.Job.user_id == current_user.id
-    ).first()
+    ))
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -1107,47 +1210,263 @@ def start_job(
     if job.status != models.JobStatus.PENDING:
         raise HTTPException(status_code=400, detail=f"Cannot start job with status {job.status}")
     
-    # Update job status to in progress
+    # Update job status to in progress and queue it behind other users' work (fair share)
     job.status = models.JobStatus.IN_PROGRESS
     job.started_at = func.now()
-    db.commit()
-    db.refresh(job)
-    
-    # Start the job asynchronously
-    import threading
-    threading.Thread(target=run_training_job, args=(job.id,)).start()
+    job_queue.queue([job])
+    await db.commit()
+    await db.refresh(job)
+    job_queue.notify()
     
     return job
 
 @app.put("/jobs/{job_id}/cancel", response_model=schemas.Job)
-def cancel_job(
+async def cancel_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get job by ID
-    job = db.query(models.Job).filter(
+    job = await db.scalar(select(models.Job).where(
         models.Job.id == job_id,
         models.Job.user_id == current_user.id
-    ).first()
+    ))
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Only in progress jobs can be cancelled
-    if job.status != models.JobStatus.IN_PROGRESS:
+    # Waiting (queued or not yet started) and in progress jobs can be cancelled
+    if job.status not in job_queue.WAITING:
         raise HTTPException(status_code=400, detail=f"Cannot cancel job with status {job.status}")
     
-    # Update job status to failed (cancelled)
+    # Update job status to failed (cancelled); a queued job is skipped when its turn comes, and
+    # the dispatcher withdraws it from the scheduler's queue
     job.status = models.JobStatus.FAILED
     job.error_message = "Job was cancelled by user"
-    db.commit()
-    db.refresh(job)
+    job.queue_position = None
+    job.estimated_start = None
+    await db.commit()
+    await db.refresh(job)
+    if job.queued_at is not None:
+        job_queue.notify()
     
     return job
 
 # Helper function to run the training job asynchronously
 def run_training_job(job_id):
+    run_training_jobs([job_id])
+
+# Mark a job as completed and keep the trained model state for later incremental updates
+def complete_job(db, job, model, dataset, artifact, metrics, details=None, trace=None):
+    job.status = models.JobStatus.COMPLETED
+    job.progress = 100
+    job.completed_at = func.now()
+    job.results = {**metrics, **(details or {})}
+    
+    # Update the model as trained
+    artifact = {**artifact, "dataset_id": dataset.id, "n_rows": dataset.rows}
+    model.is_trained = True
+    model.training_accuracy = metrics.get('accuracy') or metrics.get('r2')
+    model.evaluation_metrics = metrics
+    with tracing.active(trace), tracing.span('save_artifact'):
+        store_artifact(model, artifact)
+    
+    record_usage(job, trace)
+    db.commit()
+    
+    # Remember the result so identical submissions can skip training
+    try:
+        memo.store(
+            db, memo.job_key(db, job, model, dataset), job.user_id, metrics, model.artifact,
+            output_dataset_id=job.output_dataset_id, passthrough_columns=job.passthrough_columns
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"Could not memoize training result: {str(e)}")
+
+# Write the per-row output of a job as a new dataset, linked to the source by row order.
+# ``outputs`` yields the model output (an array or named column arrays) for consecutive chunks of rows.
+# The output is stored chunk by chunk as it is produced, so it is never held in memory as a whole.
+def write_job_output(db, job, model, dataset, outputs):
+    passthrough = job.passthrough_columns or []
+    output_dataset = models.Dataset(
+        name=f"{model.name} output of {dataset.name}",
+        filename=f"{dataset.filename.rsplit('.', 1)[0]}_{model.model_type.value}.csv",
+        description=f"Per-row output of job {job.id} ({model.model_type.value}) on dataset {dataset.id}",
+        schema=[],
+        rows=0,
+        columns=0,
+        size=0,
+        file_type="CSV",
+        tags=model.task_type.value,
+        user_id=job.user_id
+    )
+    db.add(output_dataset)
+    db.flush()
+    
+    source_rows = itertools.chain.from_iterable(storage.iter_rows(db, dataset.id))
+    content_hash = memo.RowsHash()
+    schema, example, n_written, size = None, None, 0, 0
+    for output in outputs:
+        output = training.output_columns(model.task_type, output)
+        n_rows = len(next(iter(output.values())))
+        source = list(itertools.islice(source_rows, n_rows)) if passthrough else []
+        columns = {name: [row.get(name) for row in source] for name in passthrough}
+        columns.update(output)
+        if schema is None:
+            schema = [
+                {"name": name, "type": storage.column_type(values), "missing": 0, "example": None}
+                for name, values in columns.items()
+            ]
+        for entry in schema[:len(passthrough)]:
+            entry["missing"] += sum(value is None or value == '' for value in columns[entry["name"]])
+        for rows in storage.rows_from_columns(columns):
+            if example is None:
+                example = rows[0]
+            db.execute(insert(models.DatasetChunk), storage.chunk_rows(output_dataset.id, rows, start_row=n_written))
+            content_hash.update(rows)
+            n_written += len(rows)
+            size += len(json.dumps(rows))
+    
+    if not n_written:
+        raise ValueError("Model produced no output rows")
+    for entry in schema:
+        entry["example"] = str(example[entry["name"]])
+    
+    output_dataset.schema = schema
+    output_dataset.rows = n_written
+    output_dataset.columns = len(schema)
+    output_dataset.size = size
+    output_dataset.missing_values = sum(entry["missing"] for entry in schema)
+    output_dataset.content_hash = content_hash.hexdigest()
+    db.flush()
+    job.output_dataset_id = output_dataset.id
+    return {"output_dataset_id": output_dataset.id}
+
+def fail_job(db, job, error, trace=None):
+    job.status = models.JobStatus.FAILED
+    job.error_message = str(error)
+    record_usage(job, trace)
+    db.commit()
+
+# Store stage timings and resource usage of a finished run on its job
+def record_usage(job, trace):
+    if not trace:
+        return
+    job.timings = trace.as_dict()
+    usage = trace.usage()
+    job.cpu_user_seconds = usage["cpu_user_seconds"]
+    job.cpu_system_seconds = usage["cpu_system_seconds"]
+    job.wall_seconds = usage["wall_seconds"]
+    job.peak_memory_bytes = usage["peak_memory_bytes"]
+
+# Run a single job start to finish in the calling thread
+def run_job_directly(db, job, model, dataset, feature_columns, target_column, trace):
+    def report_progress(value):
+        job.progress = value
+        db.commit()
+    
+    try:
+        with tracing.active(trace):
+            if job.job_type == models.JobType.INCREMENTAL:
+                artifact = training.load_artifact(model.artifact)
+                if artifact is None:
+                    raise ValueError("Model has no trained state to update. Run a full training job first.")
+            
+                # Rows beyond what the model has already seen from this dataset are new;
+                # a different dataset is treated as an entirely new batch
+                start = artifact['n_rows'] if artifact.get('dataset_id') == dataset.id else 0
+                with tracing.span('load_frame'):
+                    df_new = storage.load_frame(dataset, start=start)
+                report_progress(20)
+            
+                artifact, metrics = training.incremental_train(
+                    artifact,
+                    model.hyperparameters,
+                    df_new,
+                    on_progress=report_progress
+                )
+            else:
+                # Large datasets are streamed and may be trained with a scalable substitute estimator
+                artifact, metrics = training.train_dataset(
+                    model.model_type,
+                    model.task_type,
+                    model.hyperparameters,
+                    dataset,
+                    feature_columns,
+                    target_column,
+                    on_progress=report_progress
+                )
+            
+            details = None
+            if wants_output(job, model):
+                # Score the dataset chunk by chunk with the trained model
+                with tracing.span('write_output'):
+                    details = write_job_output(db, job, model, dataset, training.score_dataset(
+                        artifact, storage.iter_frames(dataset), dataset.rows
+                    ))
+        complete_job(db, job, model, dataset, artifact, metrics, details=details, trace=trace)
+    except Exception as e:
+        # Handle any errors during training (dropping a half-written output dataset)
+        db.rollback()
+        fail_job(db, job, e, trace=trace)
+
+# Run a DAG of preprocess -> train -> evaluate stages for in-memory training jobs.
+# Stages with identical inputs run once, whether they are shared between the jobs
+# or were computed by an earlier job, and independent branches train concurrently.
+def run_job_pipelines(db, branches):
+    stage_jobs = {}
+    for job_id, (job, model, dataset, branch, trace) in branches.items():
+        for stage in branch.values():
+            stage_jobs.setdefault(stage.key, []).append(job_id)
+    reused_stages = {job_id: [] for job_id in branches}
+    stage_progress = {"preprocess": 40, "train": 80}
+    final_outputs = {job_id: {} for job_id in branches}
+    failed = set()
+    
+    def finish(job_id):
+        job, model, dataset, branch, trace = branches[job_id]
+        artifact, metrics = final_outputs[job_id]["evaluate"]
+        details = {"reused_stages": reused_stages[job_id]}
+        try:
+            if "score" in final_outputs[job_id]:
+                with tracing.active(trace), tracing.span('write_output'):
+                    details.update(write_job_output(db, job, model, dataset, [final_outputs[job_id]["score"]]))
+        except Exception as e:
+            db.rollback()
+            fail_job(db, job, e, trace=trace)
+            return
+        complete_job(db, job, model, dataset, artifact, metrics, details=details, trace=trace)
+    
+    def on_complete(stage, output, error, reused):
+        job_ids = stage_jobs[stage.key]
+        for job_id in job_ids:
+            job, model, dataset, branch, trace = branches[job_id]
+            # A stage shared by several jobs shows in each one's timings, but its CPU time is
+            # charged once, to the first of them, so /usage does not count it several times
+            trace.merge(stage.trace, cpu=job_id == job_ids[0])
+            if error is not None:
+                # Errors propagate to the final stages (evaluate, score), so fail each job only once
+                if stage.name in ("evaluate", "score") and job_id not in failed:
+                    failed.add(job_id)
+                    fail_job(db, job, error, trace=trace)
+                continue
+            if reused or len(job_ids) > 1:
+                reused_stages[job_id].append(stage.name)
+            if stage.name in ("evaluate", "score"):
+                # The job completes once every final stage of its branch is done
+                final_outputs[job_id][stage.name] = output
+                if job_id not in failed and all(name in final_outputs[job_id] for name in ("evaluate", "score") if name in branch):
+                    finish(job_id)
+            elif stage.name in stage_progress:
+                job.progress = stage_progress[stage.name]
+                db.commit()
+    
+    targets = [stage for entry in branches.values() for name, stage in entry[3].items() if name in ("evaluate", "score")]
+    pipeline.run(targets, on_complete=on_complete)
+
+# Returns the CPU-seconds the jobs used, which the scheduler charges to the user
+def run_training_jobs(job_ids):
     # This would normally be in a separate worker process or service
     # For simplicity, we're running it in a thread here
     from sqlalchemy.orm import sessionmaker
@@ -1157,273 +1476,59 @@ def run_training_job(job_id):
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
     
+    traces = []
     try:
-        # Get the job
-        job = db.query(models.Job).filter(models.Job.id == job_id).first()
-        if not job:
-            return
-        
-        # Update job status to in progress
-        job.status = models.JobStatus.IN_PROGRESS
-        job.started_at = func.now()
-        job.progress = 10
-        db.commit()
-        
-        # Get the model and dataset
-        model = db.query(models.MLModel).filter(models.MLModel.id == job.model_id).first()
-        dataset = db.query(models.Dataset).filter(models.Dataset.id == job.dataset_id).first()
-        
-        if not model or not dataset:
-            job.status = models.JobStatus.FAILED
-            job.error_message = "Model or dataset not found"
-            db.commit()
-            return
-        
-        # Run the actual training - reuse the training code from train_model endpoint
-        import pandas as pd
-        import numpy as np
-        from sklearn.preprocessing import LabelEncoder
-        from sklearn.model_selection import train_test_split
-        from sklearn.preprocessing import StandardScaler
-        from sklearn.linear_model import LogisticRegression, LinearRegression
-        from sklearn.svm import SVC, SVR
-        from sklearn.neural_network import MLPClassifier, MLPRegressor
-        from sklearn.cluster import KMeans, DBSCAN
-        from sklearn.decomposition import PCA
-        from sklearn.metrics import accuracy_score, precision_score, f1_score, mean_absolute_error, mean_squared_error, r2_score, silhouette_score
-        
-        try:
-            # Convert dataset to DataFrame
-            df = pd.DataFrame(dataset.data)
-            job.progress = 20
+        branches = {}
+        for job_id in job_ids:
+            # Get the job
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            # Deleted or cancelled while it was queued
+            if not job or job.status not in job_queue.WAITING:
+                continue
+            
+            # Update job status to in progress
+            job.status = models.JobStatus.IN_PROGRESS
+            job.started_at = func.now()
+            job.progress = 10
+            job.attempts = (job.attempts or 0) + 1
+            job.queue_position = None
+            job.estimated_start = None
             db.commit()
             
-            # Preprocessing - Binary encoding for categorical variables
-            encoders = {}
-            for column in df.columns:
-                if df[column].dtype == 'object':
-                    encoder = LabelEncoder()
-                    df[column] = encoder.fit_transform(df[column].astype(str))
-                    encoders[column] = encoder
+            # Get the model and dataset (decoding the stored rows)
+            trace = tracing.Trace(track_memory=True)
+            traces.append(trace)
+            with tracing.active(trace), tracing.span('load_dataset'):
+                model = db.query(models.MLModel).filter(models.MLModel.id == job.model_id).first()
+                dataset = db.query(models.Dataset).filter(models.Dataset.id == job.dataset_id).first()
             
-            job.progress = 30
-            db.commit()
+            if not model or not dataset:
+                fail_job(db, job, "Model or dataset not found", trace=trace)
+                continue
             
             # Feature selection - use job's feature_columns if provided, otherwise fall back to model's
-            feature_columns = job.feature_columns or model.feature_columns or df.columns.tolist()
+            feature_columns = job.feature_columns or model.feature_columns
             target_column = job.target_column or model.target_column
             
-            if target_column and target_column in feature_columns:
-                feature_columns.remove(target_column)
-            
-            X = df[feature_columns]
-            job.progress = 40
-            db.commit()
-            
-            # For supervised learning, prepare target variable
-            if model.task_type in [schemas.ModelTaskType.CLASSIFICATION, schemas.ModelTaskType.REGRESSION]:
-                if not target_column:
-                    job.status = models.JobStatus.FAILED
-                    job.error_message = "Target column required for supervised learning"
-                    job.completed_at = func.now()
-                    db.commit()
-                    return
-                
-                y = df[target_column]
-                
-                # Split data
-                X_train, X_test, y_train, y_test = train_test_split(
-                    X, y, test_size=0.2, random_state=model.hyperparameters.get('random_state', 42)
-                )
-                
-                job.progress = 50
-                db.commit()
-                
-                # Normalize features
-                scaler = StandardScaler()
-                X_train = scaler.fit_transform(X_train)
-                X_test = scaler.transform(X_test)
-                
-                # Train model based on type
-                model_type = model.model_type
-                hyperparams = model.hyperparameters
-                
-                job.progress = 60
-                db.commit()
-                
-                if model.task_type == schemas.ModelTaskType.CLASSIFICATION:
-                    if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
-                        sklearn_model = LogisticRegression(
-                            C=hyperparams.get('C', 1.0),
-                            penalty=hyperparams.get('penalty', 'l2'),
-                            solver=hyperparams.get('solver', 'lbfgs'),
-                            max_iter=hyperparams.get('max_iter', 100),
-                            random_state=hyperparams.get('random_state', 42)
-                        )
-                    elif model_type == schemas.ModelType.SVM:
-                        sklearn_model = SVC(
-                            C=hyperparams.get('C', 1.0),
-                            kernel=hyperparams.get('kernel', 'rbf'),
-                            gamma=hyperparams.get('gamma', 'scale'),
-                            random_state=hyperparams.get('random_state', 42)
-                        )
-                    elif model_type == schemas.ModelType.NEURAL_NETWORK:
-                        sklearn_model = MLPClassifier(
-                            hidden_layer_sizes=hyperparams.get('hidden_layer_sizes', (100,)),
-                            activation=hyperparams.get('activation', 'relu'),
-                            learning_rate=hyperparams.get('learning_rate', 'constant'),
-                            learning_rate_init=hyperparams.get('learning_rate_init', 0.001),
-                            max_iter=hyperparams.get('max_iter', 200),
-                            random_state=hyperparams.get('random_state', 42)
-                        )
-                    else:
-                        raise ValueError("Unsupported model type for classification")
-                    
-                    job.progress = 70
-                    db.commit()
-                    
-                    # Train model
-                    sklearn_model.fit(X_train, y_train)
-                    
-                    job.progress = 90
-                    db.commit()
-                    
-                    # Evaluate model
-                    y_pred = sklearn_model.predict(X_test)
-                    metrics = {
-                        'accuracy': float(accuracy_score(y_test, y_pred)),
-                        'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
-                        'f1': float(f1_score(y_test, y_pred, average='weighted', zero_division=0))
-                    }
-                    
-                elif model.task_type == schemas.ModelTaskType.REGRESSION:
-                    if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
-                        sklearn_model = LinearRegression()
-                    elif model_type == schemas.ModelType.SVR:
-                        sklearn_model = SVR(
-                            C=hyperparams.get('C', 1.0),
-                            kernel=hyperparams.get('kernel', 'rbf'),
-                            gamma=hyperparams.get('gamma', 'scale')
-                        )
-                    elif model_type == schemas.ModelType.NEURAL_NETWORK:
-                        sklearn_model = MLPRegressor(
-                            hidden_layer_sizes=hyperparams.get('hidden_layer_sizes', (100,)),
-                            activation=hyperparams.get('activation', 'relu'),
-                            learning_rate=hyperparams.get('learning_rate', 'constant'),
-                            learning_rate_init=hyperparams.get('learning_rate_init', 0.001),
-                            max_iter=hyperparams.get('max_iter', 200),
-                            random_state=hyperparams.get('random_state', 42)
-                        )
-                    else:
-                        raise ValueError("Unsupported model type for regression")
-                    
-                    job.progress = 70
-                    db.commit()
-                    
-                    # Train model
-                    sklearn_model.fit(X_train, y_train)
-                    
-                    job.progress = 90
-                    db.commit()
-                    
-                    # Evaluate model
-                    y_pred = sklearn_model.predict(X_test)
-                    metrics = {
-                        'mae': float(mean_absolute_error(y_test, y_pred)),
-                        'mse': float(mean_squared_error(y_test, y_pred)),
-                        'r2': float(r2_score(y_test, y_pred))
-                    }
-                
-            else:  # Unsupervised learning
-                # Normalize features
-                scaler = StandardScaler()
-                X_scaled = scaler.fit_transform(X)
-                
-                job.progress = 50
-                db.commit()
-                
-                # No test-train split for unsupervised learning
-                if model.task_type == schemas.ModelTaskType.CLUSTERING:
-                    if model_type == schemas.ModelType.KMEANS:
-                        sklearn_model = KMeans(
-                            n_clusters=hyperparams.get('n_clusters', 8),
-                            init=hyperparams.get('init', 'k-means++'),
-                            random_state=hyperparams.get('random_state', 42)
-                        )
-                        
-                        job.progress = 70
-                        db.commit()
-                        
-                        sklearn_model.fit(X_scaled)
-                        
-                        job.progress = 90
-                        db.commit()
-                        
-                        labels = sklearn_model.labels_
-                        metrics = {
-                            'inertia': float(sklearn_model.inertia_),
-                            'n_clusters': int(hyperparams.get('n_clusters', 8)),
-                            'silhouette_score': float(silhouette_score(X_scaled, labels, sample_size=min(1000, X_scaled.shape[0])))
-                        }
-                        
-                    elif model_type == schemas.ModelType.DBSCAN:
-                        sklearn_model = DBSCAN(
-                            eps=hyperparams.get('eps', 0.5),
-                            min_samples=hyperparams.get('min_samples', 5)
-                        )
-                        
-                        job.progress = 70
-                        db.commit()
-                        
-                        sklearn_model.fit(X_scaled)
-                        
-                        job.progress = 90
-                        db.commit()
-                        
-                        labels = sklearn_model.labels_
-                        n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
-                        metrics = {
-                            'n_clusters': int(n_clusters),
-                            'n_noise': int(list(labels).count(-1))
-                        }
-                        
-                elif model.task_type == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
-                    if model_type == schemas.ModelType.PCA:
-                        sklearn_model = PCA(
-                            n_components=hyperparams.get('n_components', 2)
-                        )
-                        
-                        job.progress = 70
-                        db.commit()
-                        
-                        X_transformed = sklearn_model.fit_transform(X_scaled)
-                        
-                        job.progress = 90
-                        db.commit()
-                        
-                        metrics = {
-                            'explained_variance_ratio': [float(v) for v in sklearn_model.explained_variance_ratio_],
-                            'n_components': int(hyperparams.get('n_components', 2))
-                        }
-            
-            # Update job as completed
-            job.status = models.JobStatus.COMPLETED
-            job.progress = 100
-            job.completed_at = func.now()
-            job.results = metrics
-            
-            # Update the model as trained
-            model.is_trained = True
-            model.training_accuracy = metrics.get('accuracy') or metrics.get('r2')
-            model.evaluation_metrics = metrics
-            
-            db.commit()
+            # Incremental and streamed jobs keep their own single-pass path
+            if job.job_type == models.JobType.INCREMENTAL or training.use_streaming(model.model_type, dataset.rows):
+                run_job_directly(db, job, model, dataset, feature_columns, target_column, trace)
+                continue
             
-        except Exception as e:
-            # Handle any errors during training
-            job.status = models.JobStatus.FAILED
-            job.error_message = str(e)
-            db.commit()
+            branches[job.id] = (job, model, dataset, pipeline.training_branch(
+                model.model_type,
+                model.task_type,
+                model.hyperparameters,
+                memo.ensure_content_hash(db, dataset),
+                storage.frame_loader(dataset),
+                feature_columns,
+                target_column,
+                with_scores=wants_output(job, model),
+                use_cache=job.use_cache is not False
+            ), trace)
+        
+        if branches:
+            run_job_pipelines(db, branches)
             
     except Exception as e:
         # Handle any database errors
@@ -1431,66 +1536,147 @@ def run_training_job(job_id):
         print(f"Error during training job: {str(e)}")
         print(traceback.format_exc())
     finally:
+        # Release memory tracing of runs that never finished
+        for trace in traces:
+            if trace.memory:
+                trace.memory.stop()
         db.close()
+    return sum(trace.cpu_user + trace.cpu_system for trace in traces)
+
+# The training dispatcher (in this process or serve.py's training process) runs queued batches here
+job_queue.dispatcher.run_jobs = run_training_jobs
 
 # API Key Endpoints
 @app.post("/api-keys/", response_model=schemas.APIKey)
-def create_api_key(
+async def create_api_key(
     api_key: schemas.APIKeyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    # Generate a random API key
-    import secrets
-    import string
-    
-    # Create a random string of characters for the API key
-    alphabet = string.ascii_letters + string.digits
-    key = ''.join(secrets.choice(alphabet) for _ in range(32))
+    # Generate a random API key; only its prefix and hash are stored
+    key = api_keys.generate_key()
     
     # Create the API key in the database
     db_api_key = models.APIKey(
         name=api_key.name,
-        key=key,
+        prefix=api_keys.key_prefix(key),
+        key_hash=api_keys.hash_key(key),
         usage_count=0,
         expires_at=api_key.expires_at,
         user_id=current_user.id
     )
     
     db.add(db_api_key)
-    db.commit()
-    db.refresh(db_api_key)
+    await db.commit()
+    await db.refresh(db_api_key)
     
-    return db_api_key
+    # The full key is shown this once
+    response = schemas.APIKey.from_orm(db_api_key)
+    response.key = key
+    return response
 
 @app.get("/api-keys/", response_model=List[schemas.APIKey])
-def get_user_api_keys(
-    db: Session = Depends(get_db),
+async def get_user_api_keys(
+    response: Response,
+    name: Optional[str] = None,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    api_keys = db.query(models.APIKey).filter(
-        models.APIKey.user_id == current_user.id
-    ).all()
-    
-    return api_keys
+    statement = select(models.APIKey).where(models.APIKey.user_id == current_user.id)
+    if name:
+        statement = statement.where(pagination.name_prefix(models.APIKey.name, name))
+    statement = pagination.paginate(statement, page, {
+        "created_at": models.APIKey.created_at,
+        "name": models.APIKey.name,
+        "id": models.APIKey.id,
+    }, models.APIKey.id, models.APIKey.user_id == current_user.id)
+    
+    return pagination.next_page((await db.scalars(statement)).all(), page, response)
 
 @app.delete("/api-keys/{api_key_id}")
-def delete_api_key(
+async def delete_api_key(
     api_key_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get API key by ID
-    api_key = db.query(models.APIKey).filter(
+    api_key = await db.scalar(select(models.APIKey).where(
         models.APIKey.id == api_key_id,
         models.APIKey.user_id == current_user.id
-    ).first()
+    ))
     
     if not api_key:
         raise HTTPException(status_code=404, detail="API key not found")
     
     # Delete the API key
-    db.delete(api_key)
-    db.commit()
+    await db.delete(api_key)
+    await db.commit()
+    
+    # Stop accepting the key from memory as well
+    principals.invalidate_user(current_user.email)
+    
+    return {"message": "API key deleted successfully"} 
+# Admin Endpoints
+@app.get("/admin/usage", response_model=schemas.ResourceUsageReport)
+async def get_resource_usage(
+    days: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    admin: models.User = Depends(auth.get_current_admin)
+):
+    # Aggregate the resources recorded on finished jobs, optionally over the last few days only
+    aggregates = [
+        func.count(models.Job.id),
+        func.sum(models.Job.cpu_user_seconds),
+        func.sum(models.Job.cpu_system_seconds),
+        func.sum(models.Job.wall_seconds),
+        func.max(models.Job.peak_memory_bytes),
+        func.avg(models.Job.peak_memory_bytes),
+    ]
+    filters = [models.Job.wall_seconds.isnot(None)]
+    if days:
+        filters.append(models.Job.created_at >= datetime.utcnow() - timedelta(days=days))
+    
+    def usage(count, cpu_user, cpu_system, wall, max_memory, avg_memory, **group):
+        return {
+            **group,
+            "jobs": count,
+            "cpu_user_seconds": float(cpu_user or 0),
+            "cpu_system_seconds": float(cpu_system or 0),
+            "wall_seconds": float(wall or 0),
+            "avg_wall_seconds": float(wall or 0) / count if count else 0.0,
+            "max_peak_memory_bytes": int(max_memory) if max_memory is not None else None,
+            "avg_peak_memory_bytes": float(avg_memory) if avg_memory is not None else None,
+        }
+    
+    by_user = (await db.execute(select(models.User.id, models.User.email, *aggregates).join(
+        models.Job, models.Job.user_id == models.User.id
+    ).where(*filters).group_by(models.User.id, models.User.email))).all()
+    
+    by_model_type = (await db.execute(select(models.MLModel.model_type, *aggregates).join(
+        models.Job, models.Job.model_id == models.MLModel.id
+    ).where(*filters).group_by(models.MLModel.model_type))).all()
+    
+    return {
+        "by_user": [usage(*row[2:], user_id=row[0], email=row[1]) for row in by_user],
+        "by_model_type": [usage(*row[1:], model_type=row[0].value) for row in by_model_type],
+    }
+
+@app.put("/admin/users/{user_id}/active", response_model=schemas.User)
+async def set_user_active(
+    user_id: int,
+    update: schemas.UserActiveUpdate,
+    db: AsyncSession = Depends(get_db),
+    admin: models.User = Depends(auth.get_current_admin)
+):
+    user = await db.scalar(select(models.User).where(models.User.id == user_id))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.is_active = update.is_active
+    await db.commit()
+    await db.refresh(user)
     
-    return {"message": "API key deleted successfully"} 
\ No newline at end of file
+    # A deactivated user's cached tokens must stop working right away
+    principals.invalidate_user(user.email)
+    return user
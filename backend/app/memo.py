@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+from . import models, storage
+
+# Reuse results of identical training submissions instead of refitting
+TRAINING_MEMO_ENABLED = os.getenv("TRAINING_MEMO_ENABLED", "true").lower() == "true"
+TRAINING_MEMO_MAX_AGE_HOURS = int(os.getenv("TRAINING_MEMO_MAX_AGE_HOURS", str(24 * 7)))
+TRAINING_MEMO_MAX_BYTES = int(os.getenv("TRAINING_MEMO_MAX_BYTES", str(512 * 1024 * 1024)))
+
+def canonical_hash(value):
+    """SHA-256 of a JSON value with a stable key order and formatting"""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class RowsHash:
+    """``canonical_hash`` of a list of rows, fed one chunk of the rows at a time"""
+
+    def __init__(self):
+        self.digest = hashlib.sha256(b"[")
+        self.empty = True
+
+    def update(self, rows):
+        if not rows:
+            return
+        encoded = json.dumps(rows, sort_keys=True, separators=(",", ":"), default=str)[1:-1]
+        self.digest.update(encoded.encode() if self.empty else b"," + encoded.encode())
+        self.empty = False
+
+    def hexdigest(self):
+        digest = self.digest.copy()
+        digest.update(b"]")
+        return digest.hexdigest()
+
+def ensure_content_hash(db, dataset):
+    """Return the dataset's content hash, computing and saving it for rows stored without one"""
+    if not dataset.content_hash:
+        content_hash = RowsHash()
+        for rows in storage.iter_rows(db, dataset.id):
+            content_hash.update(rows)
+        dataset.content_hash = content_hash.hexdigest()
+        db.commit()
+    return dataset.content_hash
+
+def training_key(user_id, dataset_hash, model, feature_columns, target_column):
+    """Key identifying a training run by its inputs, or None if the run is not reproducible"""
+    seed = model.hyperparameters.get('random_state')
+    if seed is None:
+        return None
+    return canonical_hash({
+        "user_id": user_id,
+        "dataset": dataset_hash,
+        "model_type": model.model_type.value,
+        "task_type": model.task_type.value,
+        "hyperparameters": model.hyperparameters,
+        "feature_columns": feature_columns,
+        "target_column": target_column,
+        "seed": seed,
+    })
+
+def job_key(db, job, model, dataset):
+    """Memo key for a full training job, or None if it must not be memoized"""
+    if not TRAINING_MEMO_ENABLED or job.job_type == models.JobType.INCREMENTAL:
+        return None
+    return training_key(
+        job.user_id,
+        ensure_content_hash(db, dataset),
+        model,
+        job.feature_columns or model.feature_columns,
+        job.target_column or model.target_column
+    )
+
+def lookup(db, key):
+    """Find a fresh memoized result for a key"""
+    if key is None:
+        return None
+    entry = db.query(models.TrainingMemo).filter(models.TrainingMemo.key == key).first()
+    if entry is None:
+        return None
+    if entry.created_at < datetime.utcnow() - timedelta(hours=TRAINING_MEMO_MAX_AGE_HOURS):
+        return None
+    entry.last_used_at = datetime.utcnow()
+    db.commit()
+    return entry
+
+def store(db, key, user_id, results, artifact, output_dataset_id=None, passthrough_columns=None):
+    """Save a training result and evict entries that are too old or over the size budget"""
+    if key is None:
+        return
+    entry = db.query(models.TrainingMemo).filter(models.TrainingMemo.key == key).first()
+    if entry is None:
+        entry = models.TrainingMemo(key=key, user_id=user_id)
+        db.add(entry)
+    now = datetime.utcnow()
+    entry.results = results
+    entry.artifact = artifact
+    entry.output_dataset_id = output_dataset_id
+    entry.passthrough_columns = passthrough_columns
+    entry.size = len(artifact or b"") + len(json.dumps(results))
+    entry.created_at = now
+    entry.last_used_at = now
+    db.commit()
+    evict(db)
+
+def evict(db):
+    """Drop expired entries, then least recently used ones until the store fits its byte budget"""
+    cutoff = datetime.utcnow() - timedelta(hours=TRAINING_MEMO_MAX_AGE_HOURS)
+    db.query(models.TrainingMemo).filter(models.TrainingMemo.created_at < cutoff).delete()
+    db.commit()
+
+    entries = db.query(models.TrainingMemo.key, models.TrainingMemo.size).order_by(
+        models.TrainingMemo.last_used_at.desc()
+    ).all()
+    total = 0
+    expired = []
+    for key, size in entries:
+        total += size
+        if total > TRAINING_MEMO_MAX_BYTES:
+            expired.append(key)
+    if expired:
+        db.query(models.TrainingMemo).filter(models.TrainingMemo.key.in_(expired)).delete(synchronize_session=False)
+        db.commit()
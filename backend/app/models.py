@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, JSON, Enum, Float
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Index, Integer, String, DateTime, Text, JSON, Enum, Float, LargeBinary
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from .database import Base
 import enum
@@ -16,12 +17,16 @@ class User(Base):
 
 class Dataset(Base):
     __tablename__ = "datasets"
+    __table_args__ = (
+        # Keyset pagination of a user's list, newest first or by name
+        Index("ix_datasets_user_created", "user_id", "created_at", "id"),
+        Index("ix_datasets_user_name", "user_id", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     filename = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    data = Column(JSON, nullable=False)  # Store the actual dataset as JSON
     schema = Column(JSON, nullable=False)  # Store column definitions
     rows = Column(Integer, nullable=False)
     columns = Column(Integer, nullable=False)
@@ -30,10 +35,20 @@ class Dataset(Base):
     tags = Column(String(255), nullable=True)
     missing_values = Column(Integer, default=0)
     used_in_jobs = Column(Integer, default=0)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the rows, used to memoize training
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+class DatasetChunk(Base):
+    """Consecutive rows of a dataset, stored apart from it so the rows can be read a chunk at a time"""
+    __tablename__ = "dataset_chunks"
+
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="CASCADE"), primary_key=True)
+    start_row = Column(Integer, primary_key=True, autoincrement=False)  # Row number of the first row
+    n_rows = Column(Integer, nullable=False)
+    rows = Column(JSON, nullable=False)  # The rows as a JSON list of objects
+
 class ModelTaskType(str, enum.Enum):
     CLASSIFICATION = "classification"
     REGRESSION = "regression"
@@ -51,6 +66,11 @@ class ModelType(str, enum.Enum):
 
 class MLModel(Base):
     __tablename__ = "ml_models"
+    __table_args__ = (
+        Index("ix_ml_models_user_created", "user_id", "created_at", "id"),
+        Index("ix_ml_models_user_name", "user_id", "name"),
+        Index("ix_ml_models_dataset", "dataset_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -74,6 +94,13 @@ class MLModel(Base):
     training_accuracy = Column(Float, nullable=True)
     evaluation_metrics = Column(JSON, nullable=True)  # Store various metrics as JSON
     
+    # Pickled estimator, scaler and encoders from the last training run (loaded only when needed)
+    artifact = deferred(Column(LargeBinary(length=(2**32) - 1), nullable=True))
+    
+    # NumPy-only scoring kernel (.npz) for linear, PCA and k-means models; null for other models
+    kernel = deferred(Column(LargeBinary(length=(2**32) - 1), nullable=True))
+    kernel_hash = Column(String(64), nullable=True)  # SHA-256 of the kernel, keys the loaded-kernel cache
+    
     # Relationships
     dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -88,13 +115,27 @@ class JobStatus(str, enum.Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class JobType(str, enum.Enum):
+    TRAIN = "train"
+    INCREMENTAL = "incremental"  # Update a trained model with new rows only
+
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_user_created", "user_id", "created_at", "id"),
+        Index("ix_jobs_user_status_created", "user_id", "status", "created_at", "id"),
+        Index("ix_jobs_model", "model_id"),
+        Index("ix_jobs_dataset", "dataset_id"),
+        Index("ix_jobs_runner_queued", "runner", "queued_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     
+    # Full training or incremental retraining
+    job_type = Column(Enum(JobType), default=JobType.TRAIN)
+    
     # Status and progress
     status = Column(Enum(JobStatus), default=JobStatus.PENDING)
     progress = Column(Integer, default=0)  # 0-100
@@ -108,8 +149,37 @@ class Job(Base):
     target_column = Column(String(255), nullable=True)
     feature_columns = Column(JSON, nullable=True)
     
+    # Write the per-row model output (projected components, cluster labels) as a new dataset, with these source columns
+    save_output = Column(Boolean, default=True)
+    passthrough_columns = Column(JSON, nullable=True)
+    output_dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="SET NULL"), nullable=True)
+    
+    # Reuse earlier results (the training memo, cached preprocessing and fitted models); False trains from scratch
+    use_cache = Column(Boolean, default=True)
+    
     # Results and metrics
     results = Column(JSON, nullable=True)  # Store results in various formats
+    timings = Column(JSON, nullable=True)  # Seconds spent in each training stage
+    
+    # Resources used by the training run
+    cpu_user_seconds = Column(Float, nullable=True)
+    cpu_system_seconds = Column(Float, nullable=True)
+    wall_seconds = Column(Float, nullable=True)
+    peak_memory_bytes = Column(BigInteger, nullable=True)
+    
+    # Queueing: set when the job is handed to the training dispatcher (see job_queue.py),
+    # which claims it by writing its runner id; jobs queued together run as one batch
+    queued_at = Column(DateTime(timezone=True), nullable=True)
+    batch_id = Column(Integer, nullable=True)
+    runner = Column(String(64), nullable=True)
+    # Refreshed by the runner while it holds the job; a stale one means the runner is gone
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    # Training runs started for this job, including ones cut short by a runner exiting
+    attempts = Column(Integer, default=0)
+    
+    # Kept up to date by the runner while the job waits for a worker
+    queue_position = Column(Integer, nullable=True)
+    estimated_start = Column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -119,12 +189,32 @@ class Job(Base):
     # User who created the job
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+class TrainingMemo(Base):
+    __tablename__ = "training_memo"
+
+    # Hash of dataset content, model configuration, features, target and seed
+    key = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    results = Column(JSON, nullable=False)
+    artifact = deferred(Column(LargeBinary(length=(2**32) - 1), nullable=True))
+    size = Column(Integer, nullable=False)  # Approximate size in bytes, for eviction
+    # Per-row output dataset the run wrote (dimensionality reduction, clustering), and its pass-through columns
+    output_dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="SET NULL"), nullable=True)
+    passthrough_columns = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=False)
+
 class APIKey(Base):
     __tablename__ = "api_keys"
+    __table_args__ = (
+        Index("ix_api_keys_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
-    key = Column(String(255), nullable=False, unique=True)
+    key = Column(String(255), nullable=True, unique=True)  # Legacy plaintext keys, cleared by the migration
+    prefix = Column(String(12), nullable=True, index=True)  # First characters of the key, to find the row
+    key_hash = Column(String(64), nullable=True, unique=True)  # SHA-256 of the whole key
     usage_count = Column(Integer, default=0)
     expires_at = Column(DateTime(timezone=True), nullable=True)  # Null means never expires
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
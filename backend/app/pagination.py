@@ -0,0 +1,98 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, func, or_, select
+
+# List endpoints return at most this many rows unless asked for more (up to MAX_PAGE_SIZE)
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams:
+    """Query parameters shared by the list endpoints: ``cursor``, ``limit`` and ``sort``.
+
+    ``sort`` is a column name, prefixed with ``-`` for descending order.
+    Pages are keyset-based: the cursor holds the sort value and id of the
+    last row served, so deep pages cost the same as the first one.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        sort: str = "-created_at"
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.sort = sort
+
+def encode_cursor(sort, value, row_id):
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+    return value, row_id
+
+def name_prefix(column, prefix):
+    """Case-sensitive ``LIKE 'prefix%'``, which can use an index on the column"""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(escaped + "%", escape="\\")
+
+def paginate(statement, page, sort_columns, id_column, owner):
+    """Order, seek and limit a select for one page; fetch it with ``next_page``.
+
+    ``sort_columns`` maps the names accepted in ``sort`` to columns. ``owner``
+    restricts rows to the requesting user (e.g. ``Dataset.user_id == user.id``);
+    the cursor's anchor row is only looked up among them. One extra row is
+    fetched to tell whether there is a next page.
+    """
+    key = page.sort.lstrip("-")
+    if key not in sort_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot sort by {key}; choose from {', '.join(sorted(sort_columns))}"
+        )
+    column = sort_columns[key]
+    descending = page.sort.startswith("-")
+    if page.cursor:
+        value, row_id = decode_cursor(page.cursor, page.sort)
+        # Seek from the stored value of the anchor row, so it compares exactly like the column
+        # (SQLite keeps timestamps as text); the cursor's copy covers a deleted anchor. A cursor
+        # naming another user's row falls back to that copy and reveals nothing about the row
+        anchor = select(column).where(id_column == row_id, owner).scalar_subquery()
+        value = func.coalesce(anchor, value)
+        if descending:
+            statement = statement.where(or_(column < value, and_(column == value, id_column < row_id)))
+        else:
+            statement = statement.where(or_(column > value, and_(column == value, id_column > row_id)))
+    if descending:
+        statement = statement.order_by(column.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(column.asc(), id_column.asc())
+    return statement.limit(page.limit + 1)
+
+def next_page(rows, page, response, entity=lambda row: row):
+    """Trim the look-ahead row and set the next-page cursor header; ``entity(row)`` gives the sorted object"""
+    rows = list(rows)
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = entity(rows[-1])
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page.sort, getattr(last, page.sort.lstrip("-")), last.id)
+    return rows
@@ -0,0 +1,216 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import encoding, memo, tracing, training
+
+# Stages from different jobs that are ready at the same time run in parallel on this many threads
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", str(os.cpu_count() or 2)))
+
+# Memory budget for the outputs of finished stages (preprocessed matrices, fitted estimators)
+STAGE_CACHE_MAX_BYTES = int(os.getenv("STAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+class Stage:
+    """One node of a job DAG.
+
+    ``key`` identifies the stage by its inputs: two stages with the same key
+    produce the same output, so only one of them runs and the other reuses it.
+    ``func`` receives the outputs of ``deps`` in order. After the stage has
+    run, ``trace`` holds the spans and CPU time recorded while it executed.
+    Stages that are not ``cacheable`` neither read nor fill the stage cache.
+    """
+
+    def __init__(self, name, key, func, deps=(), cacheable=True):
+        self.name = name
+        self.key = key
+        self.func = func
+        self.deps = list(deps)
+        self.cacheable = cacheable
+        self.trace = tracing.Trace()
+
+    def execute(self, *inputs):
+        with tracing.active(self.trace):
+            return self.func(*inputs)
+
+def estimate_bytes(value):
+    """Rough in-memory size of a stage output"""
+    import pickle
+
+    if isinstance(value, dict):
+        return sum(estimate_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_bytes(item) for item in value)
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    if hasattr(value, 'data') and hasattr(value, 'indices'):  # scipy sparse
+        return int(value.data.nbytes + value.indices.nbytes + value.indptr.nbytes)
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return 0
+
+class StageCache:
+    """Thread-safe LRU of stage outputs, bounded by an estimated byte size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+stage_cache = StageCache(STAGE_CACHE_MAX_BYTES)
+
+def run(targets, on_complete=None):
+    """Run the stages needed for ``targets``, sharing stages that have the same key.
+
+    Stages whose dependencies are done are submitted to the worker pool, so
+    independent branches run concurrently. ``on_complete(stage, output, error,
+    reused)`` is called from the calling thread as each stage finishes, which
+    keeps database updates off the worker threads. A failed stage fails every
+    stage that depends on it.
+    """
+    # Collect the unique stages reachable from the targets
+    stages = {}
+    pending = list(targets)
+    while pending:
+        stage = pending.pop()
+        if stage.key in stages:
+            continue
+        stages[stage.key] = stage
+        pending.extend(stage.deps)
+
+    outputs, errors = {}, {}
+    reused = set()
+
+    def finish(stage, output=None, error=None, was_reused=False):
+        if error is not None:
+            errors[stage.key] = error
+        else:
+            outputs[stage.key] = output
+        if was_reused:
+            reused.add(stage.key)
+        if on_complete:
+            on_complete(stage, output, error, was_reused)
+
+    running = {}
+    waiting = dict(stages)
+    while waiting or running:
+        for key, stage in list(waiting.items()):
+            dep_keys = [dep.key for dep in stage.deps]
+            failed = next((errors[dep] for dep in dep_keys if dep in errors), None)
+            if failed is not None:
+                del waiting[key]
+                finish(stage, error=failed)
+                continue
+            if any(dep not in outputs for dep in dep_keys):
+                continue
+            del waiting[key]
+            cached = stage_cache.get(key) if stage.cacheable else None
+            if cached is not None:
+                finish(stage, output=cached, was_reused=True)
+                continue
+            future = _executor.submit(stage.execute, *[outputs[dep] for dep in dep_keys])
+            running[future] = stage
+
+        if not running:
+            continue
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            stage = running.pop(future)
+            try:
+                output = future.result()
+            except Exception as e:
+                finish(stage, error=e)
+            else:
+                if stage.cacheable:
+                    stage_cache.put(stage.key, output)
+                finish(stage, output=output)
+
+    return outputs, errors, reused
+
+def preprocess_key(model_type, task_type, hyperparams, dataset_hash, feature_columns, target_column):
+    """Key of the preprocessing stage: everything that changes the model matrix"""
+    seed = hyperparams.get('random_state', 42)
+    supervised = training.is_supervised(task_type)
+    return memo.canonical_hash({
+        "stage": "preprocess",
+        "dataset": dataset_hash,
+        "feature_columns": feature_columns,
+        "target_column": target_column if supervised else None,
+        "supervised": supervised,
+        # An unseeded split is never shared between jobs
+        "split_seed": seed if seed is not None else uuid.uuid4().hex,
+        "dense": training.needs_dense(model_type),
+        "encoding": [encoding.ONEHOT_MAX_CATEGORIES, encoding.IDENTIFIER_UNIQUE_RATIO, encoding.HASHING_FEATURES],
+    })
+
+def training_branch(model_type, task_type, hyperparams, dataset_hash, load_frame, feature_columns, target_column,
+                    with_scores=False, use_cache=True):
+    """Preprocess → train → evaluate (→ score) stages for one model.
+
+    ``load_frame`` is only called if the preprocessed data is not cached
+    already. Returns the stages by name. The artifact and metrics come from the
+    ``evaluate`` stage, whose output is ``(artifact, metrics)``. Without
+    ``use_cache`` the model is fitted and evaluated afresh: those stages are
+    neither taken from the cache nor shared with other jobs.
+    """
+    pre_key = preprocess_key(model_type, task_type, hyperparams, dataset_hash, feature_columns, target_column)
+    train_key = memo.canonical_hash({
+        "stage": "train",
+        "preprocess": pre_key,
+        "model_type": model_type.value,
+        "task_type": task_type.value,
+        "hyperparameters": hyperparams,
+        # A key of its own, so no other job's fit is reused
+        "run": None if use_cache else uuid.uuid4().hex,
+    })
+
+    def preprocess_stage():
+        with tracing.span('load_frame'):
+            df = load_frame()
+        return training.preprocess(model_type, task_type, hyperparams, df, feature_columns, target_column)
+
+    def train_stage(prepared):
+        return training.fit_estimator(model_type, task_type, hyperparams, prepared)
+
+    def evaluate_stage(prepared, estimator):
+        metrics = training.evaluate(model_type, task_type, hyperparams, prepared, estimator)
+        return training.make_artifact(model_type, task_type, prepared, estimator), metrics
+
+    preprocess = Stage("preprocess", pre_key, preprocess_stage)
+    train = Stage("train", train_key, train_stage, [preprocess], cacheable=use_cache)
+    evaluate = Stage("evaluate", train_key + ":evaluate", evaluate_stage, [preprocess, train], cacheable=use_cache)
+    branch = {"preprocess": preprocess, "train": train, "evaluate": evaluate}
+    if with_scores:
+        branch["score"] = Stage(
+            "score", train_key + ":score",
+            lambda prepared, estimator: training.score(model_type, task_type, prepared, estimator),
+            [preprocess, train],
+            cacheable=use_cache
+        )
+    return branch
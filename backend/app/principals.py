@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    # Optional: only needed to share invalidations between workers
+    import redis
+except ImportError:
+    redis = None
+
+# Validated bearer tokens kept in memory, so hot tokens skip the JWT decode and the user lookup
+AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() == "true"
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_TOKENS = int(os.getenv("AUTH_CACHE_MAX_TOKENS", "10000"))
+
+# Redis used to broadcast invalidations (of these and other caches) to every worker; without
+# it, other workers notice a deactivation or password change after AUTH_CACHE_TTL_SECONDS
+AUTH_CACHE_REDIS_URL = os.getenv("AUTH_CACHE_REDIS_URL", "")
+INVALIDATION_CHANNEL = "packageml:auth:invalidate"
+
+class Principal:
+    """The user columns endpoints read, copied off the ORM object so it can outlive its session"""
+
+    def __init__(self, user, api_key_id=None):
+        # Set when the request authenticated with an API key rather than a JWT
+        self.api_key_id = api_key_id
+        self.id = user.id
+        self.email = user.email
+        self.is_active = user.is_active
+        self.created_at = user.created_at
+        self.updated_at = user.updated_at
+
+class PrincipalCache:
+    """LRU of token -> principal, each entry valid until its TTL or the token's expiry, whichever is first"""
+
+    def __init__(self, ttl_seconds, max_tokens):
+        self.ttl_seconds = ttl_seconds
+        self.max_tokens = max_tokens
+        # Bumped by every invalidation; a lookup that raced one is not cached
+        self.epoch = 0
+        self._entries = OrderedDict()
+        self._tokens_by_email = {}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._drop(token)
+                return None
+            self._entries.move_to_end(token)
+            return principal
+
+    def put(self, token, principal, token_expires_at, epoch):
+        """Remember a principal loaded when the cache was at ``epoch``"""
+        now = time.monotonic()
+        expires_at = min(now + self.ttl_seconds, now + (token_expires_at - time.time()))
+        with self._lock:
+            if epoch != self.epoch or expires_at <= now:
+                return
+            self._drop(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_email.setdefault(principal.email, set()).add(token)
+            while len(self._entries) > self.max_tokens:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, email):
+        """Forget every token of a user"""
+        with self._lock:
+            self.epoch += 1
+            for token in self._tokens_by_email.pop(email, ()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+            self._tokens_by_email.clear()
+
+    def _drop(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_email.get(entry[0].email)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_email[entry[0].email]
+
+cache = PrincipalCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_TOKENS)
+# API keys, keyed by the key's SHA-256
+api_key_cache = PrincipalCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_TOKENS)
+
+_redis = None
+_listener = None
+
+def shared_client():
+    global _redis
+    if _redis is None and AUTH_CACHE_REDIS_URL:
+        if redis is None:
+            print("AUTH_CACHE_REDIS_URL is set but the redis package is not installed; invalidations stay local")
+            return None
+        _redis = redis.Redis.from_url(AUTH_CACHE_REDIS_URL)
+    return _redis
+
+def publish(channel, message):
+    """Send a message to the other workers, when a shared layer is configured"""
+    client = shared_client()
+    if client is not None:
+        try:
+            client.publish(channel, message)
+        except Exception as e:
+            print(f"Could not publish to {channel}: {str(e)}")
+
+def invalidate_user(email):
+    """Drop a user's cached tokens and API keys here and, with a shared layer configured, in every other worker"""
+    cache.invalidate(email)
+    api_key_cache.invalidate(email)
+    publish(INVALIDATION_CHANNEL, email)
+
+def _apply_invalidation(email):
+    if email is None:
+        cache.clear()
+        api_key_cache.clear()
+    else:
+        cache.invalidate(email)
+        api_key_cache.invalidate(email)
+
+# Channel -> handler for messages from other workers; handlers get None when
+# messages may have been missed and everything derived from them must be dropped
+handlers = {INVALIDATION_CHANNEL: _apply_invalidation}
+
+def listen():
+    """Apply messages published by other workers, reconnecting if Redis goes away"""
+    while True:
+        try:
+            pubsub = shared_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(*handlers)
+            # Anything cached while we were not subscribed may have missed a message
+            for handler in handlers.values():
+                handler(None)
+            for message in pubsub.listen():
+                handlers[message["channel"].decode()](message["data"].decode())
+        except Exception as e:
+            print(f"Shared cache listener error: {str(e)}")
+            time.sleep(1)
+
+def start_listener():
+    """Subscribe to the shared channels (once per process, after any fork)"""
+    global _listener
+    if _listener is None and shared_client() is not None:
+        _listener = threading.Thread(target=listen, name="shared-cache", daemon=True)
+        _listener.start()
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import auth, compression, principals
+
+# Rendered GET responses kept per user, valid until that user's data changes
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "4096"))
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+# 0 keeps entries until a write invalidates them. With several workers and no shared
+# layer, a write is only seen by the worker that made it, so serve.py sets a short TTL
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "0"))
+
+CACHED_PATH_PREFIXES = ("/datasets", "/models", "/jobs")
+VERSION_CHANNEL = "packageml:responses:bump"
+
+class ResponseCache:
+    """LRU of (user, path and query) -> rendered response, tagged with the user's data version"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Bumped by every write to any user's data
+        self.epoch = 0
+        self._versions = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_ids):
+        with self._lock:
+            self.epoch += 1
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._versions = {user_id: version + 1 for user_id, version in self._versions.items()}
+            self._entries.clear()
+
+    def get(self, user_id, target):
+        with self._lock:
+            entry = self._entries.get((user_id, target))
+            if entry is None:
+                return None
+            version, expires_at, response = entry
+            if version != self._versions.get(user_id, 0) or expires_at <= time.monotonic():
+                del self._entries[(user_id, target)]
+                return None
+            self._entries.move_to_end((user_id, target))
+            return response
+
+    def put(self, user_id, target, response, version):
+        """Remember a response rendered at the user's data ``version``; dropped if their data changed since"""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+        with self._lock:
+            if version != self._versions.get(user_id, 0):
+                return
+            self._entries[(user_id, target)] = (version, expires_at, response)
+            self._entries.move_to_end((user_id, target))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+
+class CachedResponse:
+    """A rendered 200 response, plus compressed copies made the first time each encoding is asked for"""
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self._variants = {}
+
+    async def variant(self, encoding):
+        """``(etag, body)`` of the representation in ``encoding``; each representation has its own strong ETag"""
+        if encoding is None:
+            return f'"{self.digest}"', self.body
+        body = self._variants.get(encoding)
+        if body is None:
+            # Slow, dense levels are fine here: this runs once per content and encoding
+            body = self._variants[encoding] = await run_in_threadpool(compression.compress, self.body, encoding)
+        return f'"{self.digest}-{encoding}"', body
+
+def _apply_bump(message):
+    if message is None:
+        cache.clear()
+    else:
+        cache.bump([int(user_id) for user_id in message.split(",")])
+
+principals.handlers[VERSION_CHANNEL] = _apply_bump
+
+# Every user-owned row (datasets, models, jobs, API keys) goes through the ORM, in
+# request handlers and training threads alike, so session events see all writes
+@event.listens_for(Session, "after_flush")
+def _collect_owners(session, flush_context):
+    owners = session.info.setdefault("response_cache_owners", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        user_id = getattr(instance, "user_id", None)
+        if user_id is not None:
+            owners.add(user_id)
+
+@event.listens_for(Session, "after_commit")
+def _bump_owners(session):
+    owners = session.info.pop("response_cache_owners", None)
+    if owners:
+        cache.bump(owners)
+        principals.publish(VERSION_CHANNEL, ",".join(str(user_id) for user_id in owners))
+
+@event.listens_for(Session, "after_rollback")
+def _forget_owners(session):
+    session.info.pop("response_cache_owners", None)
+
+def etag_matches(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def bearer_token(headers):
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+class ResponseCacheMiddleware:
+    """Serve cached GET responses of the dataset, model and job routes, with strong ETags and 304s.
+
+    Only requests whose bearer token is already in the principal cache can hit,
+    so a hit costs a couple of dict lookups. Misses run the endpoint and keep
+    its 200 response, unless the user's data changed while it ran or the endpoint
+    sent ``Cache-Control: no-store``. Bodies are compressed here, once per
+    encoding, and kept with the entry.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not RESPONSE_CACHE_ENABLED
+            or scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(CACHED_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        token = bearer_token(headers)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+        target = scope["path"] + "?" + scope["query_string"].decode("latin-1")
+        if_none_match = headers.get(b"if-none-match", b"").decode("latin-1")
+        encoding = compression.negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        principal = auth.cached_principal(token)
+        if principal is not None:
+            response = cache.get(principal.id, target)
+            if response is not None:
+                # The endpoint (whose dependency counts API key usage) does not run for a hit
+                auth.record_api_key_use(principal)
+                await self._send(send, response, if_none_match, encoding)
+                return
+
+        # The version of the data the response is rendered from. For a token seen for the first
+        # time the user is only known afterwards, so fall back to "no user's data changed"
+        version = cache.version(principal.id) if principal is not None else None
+        epoch = cache.epoch
+        start = None
+        chunks = []
+        size = 0
+        passthrough = False
+
+        async def capture(message):
+            nonlocal start, size, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                cache_control = dict(message["headers"]).get(b"cache-control", b"")
+                # Endpoints mark responses that go stale without any write (e.g. a job's place in the queue)
+                if message["status"] != 200 or b"no-store" in cache_control.lower():
+                    passthrough = True
+                    await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > RESPONSE_CACHE_MAX_BODY_BYTES:
+                # Too big to keep: send what we have and stream the rest
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": message.get("more_body", False)})
+                return
+            if message.get("more_body", False):
+                return
+            response = CachedResponse([
+                (name, value) for name, value in start["headers"]
+                if name.lower() not in (b"content-length", b"etag", b"cache-control")
+            ], b"".join(chunks))
+            owner = auth.cached_principal(token)
+            if owner is not None and (version is not None or epoch == cache.epoch):
+                cache.put(owner.id, target, response, version if version is not None else cache.version(owner.id))
+            await self._send(send, response, if_none_match, encoding)
+
+        await self.app(scope, receive, capture)
+
+    async def _send(self, send, response, if_none_match, encoding):
+        if len(response.body) < compression.COMPRESSION_MINIMUM_SIZE:
+            encoding = None
+        etag, body = await response.variant(encoding)
+        headers = response.headers + [
+            (b"etag", etag.encode()),
+            # Browsers may keep the response but must check back (and get a 304) before using it
+            (b"cache-control", b"private, no-cache"),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if if_none_match and etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": [
+                (name, value) for name, value in headers if name.lower() != b"content-type"
+            ]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if encoding is not None:
+            headers.append((b"content-encoding", encoding.encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers + [
+            (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
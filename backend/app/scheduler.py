@@ -0,0 +1,284 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+# Cores available to this process (respects container/taskset limits)
+CPU_CORES = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+# Cores each training slot gets for its fit's BLAS/OpenMP threads (compute.FIT_THREADS). Fits
+# of linear algebra heavy models speed up with a few threads each, so by default the cores are
+# split into slots of this size rather than one slot per core
+CORES_PER_SLOT = max(1, int(os.getenv("CORES_PER_SLOT", "4")))
+
+# Number of jobs that train at the same time
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", str(max(1, CPU_CORES // CORES_PER_SLOT))))
+
+# Jobs a single user may have training at once
+MAX_RUNNING_JOBS_PER_USER = int(os.getenv("MAX_RUNNING_JOBS_PER_USER", "2"))
+
+# CPU-seconds a user may use per window (0 disables the quota). Runs are charged the CPU time
+# their jobs were measured to use (tracing.Trace), or their wall time per job if they report none
+CPU_QUOTA_SECONDS = float(os.getenv("CPU_QUOTA_SECONDS", "0"))
+CPU_QUOTA_WINDOW_SECONDS = float(os.getenv("CPU_QUOTA_WINDOW_SECONDS", "3600"))
+
+# Share of the workers each user gets when several are waiting, e.g. '{"1": 2, "7": 0.5}' (default 1)
+USER_WEIGHTS = {int(user_id): float(weight) for user_id, weight in json.loads(os.getenv("USER_WEIGHTS", "{}")).items()}
+
+# Assumed duration of a run before any have finished, used for start time estimates
+DEFAULT_RUN_SECONDS = float(os.getenv("DEFAULT_RUN_SECONDS", "30"))
+
+# How long a stopping training process waits for its running training runs
+SCHEDULER_DRAIN_SECONDS = float(os.getenv("SCHEDULER_DRAIN_SECONDS", "300"))
+
+class Entry:
+    """A queued training run: one or more jobs of a single user executed by one call.
+
+    Each job takes a slot while the run executes and is charged on its own.
+    """
+
+    def __init__(self, seq, user_id, job_ids, func):
+        self.seq = seq
+        self.user_id = user_id
+        self.job_ids = list(job_ids)
+        self.func = func
+        self.started = None
+
+class FairScheduler:
+    """Weighted fair queuing of training runs across users.
+
+    Each user has a queue and a virtual time: the CPU-seconds they have used
+    divided by their weight. A run's function returns the CPU-seconds its
+    jobs used; runs still in progress count their wall time per job. A free worker takes the oldest run of the user
+    with the lowest virtual time, skipping users at their concurrency cap or
+    over their CPU quota for the current window. Users who were idle start at
+    the lowest virtual time of the active users, so idling does not bank
+    credit.
+
+    Slots and the per-user cap count jobs: a run of several jobs takes one
+    slot per job, and is split when fewer slots are free.
+    """
+
+    def __init__(self, workers=SCHEDULER_WORKERS):
+        self.workers = workers
+        self._queues = {}
+        self._running = {}
+        self._vtime = {}
+        self._usage = {}
+        self._durations = deque(maxlen=50)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def weight(self, user_id):
+        return USER_WEIGHTS.get(user_id, 1.0)
+
+    def submit(self, user_id, job_ids, func):
+        """Queue ``func(job_ids)`` to run a user's jobs; it may be called several times with parts of them.
+
+        ``func`` returns the CPU-seconds the jobs used, or None to be charged their wall time.
+        """
+        with self._cond:
+            if not self._queues.get(user_id) and not self._running.get(user_id):
+                active = [self._vtime[user] for user in self._vtime if self._queues.get(user) or self._running.get(user)]
+                self._vtime[user_id] = max([self._vtime.get(user_id, 0.0)] + ([min(active)] if active else []))
+            self._queues.setdefault(user_id, deque()).append(Entry(next(self._seq), user_id, job_ids, func))
+            self._start_workers()
+            self._cond.notify()
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"scheduler-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _used(self, user_id, now):
+        """CPU-seconds charged to a user within the current quota window"""
+        usage = self._usage.get(user_id)
+        if not usage:
+            return 0.0
+        while usage and usage[0][0] < now - CPU_QUOTA_WINDOW_SECONDS:
+            usage.popleft()
+        return sum(seconds for _, seconds in usage)
+
+    def _quota_release(self, user_id, now):
+        """When the user is back under quota (``now`` if they are not over it)"""
+        if CPU_QUOTA_SECONDS <= 0:
+            return now
+        used = self._used(user_id, now)
+        for finished, seconds in self._usage.get(user_id, ()):
+            if used < CPU_QUOTA_SECONDS:
+                break
+            used -= seconds
+            now = finished + CPU_QUOTA_WINDOW_SECONDS
+        return now
+
+    def _virtual_time(self, user_id, now):
+        """Virtual time of a user, counting runs that are still in progress"""
+        in_flight = sum((now - entry.started) * len(entry.job_ids) for entry in self._running.get(user_id, ()))
+        return self._vtime[user_id] + in_flight / self.weight(user_id)
+
+    def _running_jobs(self, user_id):
+        return sum(len(entry.job_ids) for entry in self._running.get(user_id, ()))
+
+    def _pick(self, now):
+        """Next entry to run, or None if no slot is free or every waiting user is capped or over quota"""
+        free = self.workers - sum(self._running_jobs(user) for user in self._running)
+        if free <= 0:
+            return None
+        eligible = [
+            user for user, queue in self._queues.items()
+            if queue
+            and self._running_jobs(user) < MAX_RUNNING_JOBS_PER_USER
+            and self._quota_release(user, now) <= now
+        ]
+        if not eligible:
+            return None
+        user = min(eligible, key=lambda u: (self._virtual_time(u, now), self._queues[u][0].seq))
+        entry = self._queues[user][0]
+        size = min(len(entry.job_ids), free, MAX_RUNNING_JOBS_PER_USER - self._running_jobs(user))
+        if size < len(entry.job_ids):
+            # Start as many of its jobs as there are slots; the rest stay at the head of the queue
+            entry.job_ids, job_ids = entry.job_ids[size:], entry.job_ids[:size]
+            return Entry(entry.seq, user, job_ids, entry.func)
+        return self._queues[user].popleft()
+
+    def _next_wakeup(self, now):
+        """Seconds until a waiting user's quota frees up (capped at a few seconds)"""
+        releases = [self._quota_release(user, now) - now for user, queue in self._queues.items() if queue]
+        return min([5.0] + [release for release in releases if release > 0])
+
+    def _work(self):
+        while True:
+            with self._cond:
+                entry = self._pick(time.time())
+                while entry is None:
+                    # Wake up when the next quota window frees up, or when a run finishes
+                    self._cond.wait(timeout=self._next_wakeup(time.time()))
+                    entry = self._pick(time.time())
+                entry.started = time.time()
+                self._running.setdefault(entry.user_id, []).append(entry)
+
+            cpu_seconds = None
+            try:
+                cpu_seconds = entry.func(entry.job_ids)
+            except Exception as e:
+                print(f"Scheduled run for jobs {entry.job_ids} failed: {str(e)}")
+            finally:
+                self._finish(entry, cpu_seconds)
+
+    def _finish(self, entry, cpu_seconds=None):
+        with self._cond:
+            finished = time.time()
+            seconds = finished - entry.started
+            self._running[entry.user_id].remove(entry)
+            # Without a measurement, every job of the run held a slot for its whole duration
+            charged = cpu_seconds if cpu_seconds is not None else seconds * len(entry.job_ids)
+            self._usage.setdefault(entry.user_id, deque()).append((finished, charged))
+            self._vtime[entry.user_id] += charged / self.weight(entry.user_id)
+            self._durations.append(seconds)
+            self._cond.notify_all()
+
+    def drain(self, timeout=SCHEDULER_DRAIN_SECONDS):
+        """Wait for every queued and running run to finish; False if some are left after ``timeout`` seconds"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while any(self._queues.values()) or any(self._running.values()):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(timeout=min(remaining, 1.0))
+        return True
+
+    def withdraw(self):
+        """Remove every run that has not started yet; returns their job ids"""
+        with self._cond:
+            job_ids = [job_id for queue in self._queues.values() for entry in queue for job_id in entry.job_ids]
+            for queue in self._queues.values():
+                queue.clear()
+            self._cond.notify_all()
+        return job_ids
+
+    def waiting(self):
+        """Ids of the queued jobs that have not started"""
+        with self._cond:
+            return [job_id for queue in self._queues.values() for entry in queue for job_id in entry.job_ids]
+
+    def cancel(self, job_ids):
+        """Remove jobs that have not started from their runs; returns the ids that were removed"""
+        job_ids = set(job_ids)
+        removed = []
+        with self._cond:
+            for queue in self._queues.values():
+                for entry in list(queue):
+                    removed += [job_id for job_id in entry.job_ids if job_id in job_ids]
+                    entry.job_ids = [job_id for job_id in entry.job_ids if job_id not in job_ids]
+                    if not entry.job_ids:
+                        queue.remove(entry)
+            self._cond.notify_all()
+        return removed
+
+    def _average_run_seconds(self):
+        if not self._durations:
+            return DEFAULT_RUN_SECONDS
+        return sum(self._durations) / len(self._durations)
+
+    def estimates(self):
+        """Queue position and estimated start time of every waiting job.
+
+        Replays the scheduling policy on a copy of the queues, one job per
+        slot, assuming every run takes the recent average duration.
+        """
+        with self._cond:
+            now = time.time()
+            average = self._average_run_seconds()
+            running = [entry for entries in self._running.values() for entry in entries]
+            slots = [max(entry.started + average, now) for entry in running for _ in entry.job_ids]
+            slots += [now] * max(self.workers - len(slots), 0)
+            heapq.heapify(slots)
+
+            # (seq, job id) of each waiting job, in queue order
+            queues = {
+                user: [(entry.seq, job_id) for entry in queue for job_id in entry.job_ids]
+                for user, queue in self._queues.items() if queue
+            }
+            vtime = {user: self._virtual_time(user, now) for user in queues}
+            ends = {
+                user: [max(entry.started + average, now) for entry in self._running.get(user, ()) for _ in entry.job_ids]
+                for user in queues
+            }
+            available = {user: self._quota_release(user, now) for user in queues}
+
+            result = {}
+            position = 0
+            while any(queues.values()) and slots:
+                t = heapq.heappop(slots)
+                waiting = [user for user, queue in queues.items() if queue]
+                eligible = [
+                    user for user in waiting
+                    if sum(end > t for end in ends[user]) < MAX_RUNNING_JOBS_PER_USER and available[user] <= t
+                ]
+                if not eligible:
+                    # Hold the slot until the earliest user is allowed to run again
+                    later = [end for user in waiting for end in ends[user] if end > t]
+                    later += [available[user] for user in waiting if available[user] > t]
+                    heapq.heappush(slots, min(later))
+                    continue
+                user = min(eligible, key=lambda u: (vtime[u], queues[u][0][0]))
+                _, job_id = queues[user].pop(0)
+                position += 1
+                result[job_id] = (position, datetime.utcnow() + timedelta(seconds=t - now))
+                ends[user].append(t + average)
+                vtime[user] += average / self.weight(user)
+                heapq.heappush(slots, t + average)
+            return result
+
+    def estimate(self, job_id):
+        """``(queue_position, estimated_start)`` of a waiting job, or ``(None, None)``"""
+        return self.estimates().get(job_id, (None, None))
+
+scheduler = FairScheduler()
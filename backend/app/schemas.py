@@ -27,6 +27,13 @@ class UserCreate(UserBase):
 class UserLogin(UserBase):
     password: str
 
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+class UserActiveUpdate(BaseModel):
+    is_active: bool
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -58,6 +65,9 @@ class DatasetCreate(DatasetBase):
     filename: str
     file_type: str
 
+class DatasetAppend(BaseModel):
+    data: List[Dict[str, Any]]
+
 class RandomDatasetCreate(BaseModel):
     dataset_type: str  # "Customer Data", "Sales Data", or "Product Catalog"
     num_rows: int
@@ -158,6 +168,14 @@ class ModelWithDataset(Model):
     class Config:
         orm_mode = True
 
+class ScoreRequest(BaseModel):
+    rows: List[Dict[str, Any]]
+
+class ScoreResponse(BaseModel):
+    model_id: int
+    kind: str
+    predictions: List[Any]
+
 # Job schemas
 class JobStatus(str, Enum):
     PENDING = "pending"
@@ -165,16 +183,35 @@ class JobStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class JobType(str, Enum):
+    TRAIN = "train"
+    INCREMENTAL = "incremental"
+
 class JobBase(BaseModel):
     name: str
     description: Optional[str] = None
+    job_type: Optional[JobType] = JobType.TRAIN
     model_id: int
     dataset_id: Optional[int] = None  # Optional because we might get it from the model
     target_column: Optional[str] = None
     feature_columns: Optional[List[str]] = None
+    save_output: bool = True  # Dimensionality reduction and clustering: write the per-row output as a new dataset
+    passthrough_columns: Optional[List[str]] = None  # Source columns (e.g. IDs) copied into that dataset
 
 class JobCreate(JobBase):
-    pass
+    use_cache: bool = True  # Reuse the result of an identical earlier training run
+
+class PipelineJobCreate(BaseModel):
+    # Trains several models on one dataset, sharing stages such as preprocessing between them
+    name: str
+    description: Optional[str] = None
+    dataset_id: int
+    model_ids: List[int]
+    target_column: Optional[str] = None
+    feature_columns: Optional[List[str]] = None
+    save_output: bool = True
+    passthrough_columns: Optional[List[str]] = None
+    use_cache: bool = True
 
 class JobUpdate(BaseModel):
     status: Optional[JobStatus] = None
@@ -189,6 +226,12 @@ class Job(JobBase):
     progress: int
     error_message: Optional[str] = None
     results: Optional[Dict[str, Any]] = None
+    timings: Optional[Dict[str, float]] = None  # Seconds per training stage
+    cpu_user_seconds: Optional[float] = None
+    cpu_system_seconds: Optional[float] = None
+    wall_seconds: Optional[float] = None
+    peak_memory_bytes: Optional[int] = None
+    output_dataset_id: Optional[int] = None
     user_id: int
     created_at: datetime
     started_at: Optional[datetime] = None
@@ -201,10 +244,38 @@ class JobWithDetails(Job):
     model_name: str
     model_type: str
     dataset_name: str
+    queue_position: Optional[int] = None  # Only set while the job waits for a worker
+    estimated_start: Optional[datetime] = None
     
     class Config:
         orm_mode = True
 
+class StageTimingSummary(BaseModel):
+    model_type: str
+    stage: str
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+class ResourceUsage(BaseModel):
+    # Either user_id/email or model_type identifies the group
+    user_id: Optional[int] = None
+    email: Optional[str] = None
+    model_type: Optional[str] = None
+    jobs: int
+    cpu_user_seconds: float
+    cpu_system_seconds: float
+    wall_seconds: float
+    avg_wall_seconds: float
+    max_peak_memory_bytes: Optional[int] = None
+    avg_peak_memory_bytes: Optional[float] = None
+
+class ResourceUsageReport(BaseModel):
+    by_user: List[ResourceUsage]
+    by_model_type: List[ResourceUsage]
+
 # API Key schemas
 class APIKeyBase(BaseModel):
     name: str
@@ -214,7 +285,8 @@ class APIKeyCreate(APIKeyBase):
 
 class APIKey(APIKeyBase):
     id: int
-    key: str
+    prefix: Optional[str] = None
+    key: Optional[str] = None  # The full key, only returned when it is created
     usage_count: int
     expires_at: Optional[datetime] = None
     user_id: int
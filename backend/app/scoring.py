@@ -0,0 +1,138 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .encoding import hash_bucket
+
+# Loaded kernels kept in memory, most recently used first
+SCORING_CACHE_MODELS = int(os.getenv("SCORING_CACHE_MODELS", "256"))
+
+KERNEL_FORMAT_VERSION = 1
+
+class Kernel:
+    """A trained model compiled down to one affine map over the raw feature values.
+
+    ``weights`` has one row per encoded feature: numeric columns first (with
+    the scaler folded in, so they take raw values), then the one-hot blocks
+    and the hashed block, which act as lookup tables. ``meta["kind"]`` says
+    how the scores are turned into output:
+
+    * ``classifier``: argmax over the classes (a sign test when binary)
+    * ``regressor``: the single score column
+    * ``projection``: the score columns (PCA components)
+    * ``nearest_centroid``: argmin over the cluster scores
+    """
+
+    def __init__(self, meta, weights, bias):
+        self.meta = meta
+        self.weights = weights
+        self.bias = bias
+        self.numeric_columns = meta["numeric_columns"]
+        self.onehot = []
+        offset = len(self.numeric_columns)
+        for column, categories in meta["onehot"]:
+            self.onehot.append((column, {value: offset + index for index, value in enumerate(categories)}))
+            offset += len(categories)
+        self.hashed = meta["hashed"]
+        self.hashed_offset = offset
+        self.classes = np.array(meta.get("classes") or [], dtype=object)
+
+    def scores(self, rows):
+        """Raw scores of a list of row dicts, shape (len(rows), outputs)"""
+        n_rows = len(rows)
+        out = np.tile(self.bias, (n_rows, 1))
+        if not n_rows:
+            return out
+        if self.numeric_columns:
+            # A missing or null numeric value would become NaN and spread to every output
+            missing = [column for column in self.numeric_columns if any(row.get(column) is None for row in rows)]
+            if missing:
+                raise ValueError(f"Rows are missing values for columns {', '.join(missing)}")
+            try:
+                X = np.array([[row[column] for column in self.numeric_columns] for row in rows], dtype=float)
+            except (TypeError, ValueError):
+                raise ValueError(f"Columns {', '.join(self.numeric_columns)} must be numeric")
+            finite = np.isfinite(X).all(axis=0)
+            if not finite.all():
+                bad = [column for column, ok in zip(self.numeric_columns, finite) if not ok]
+                raise ValueError(f"Columns {', '.join(bad)} must be finite numbers")
+            out += X @ self.weights[:len(self.numeric_columns)]
+        for column, lookup in self.onehot:
+            # Categories that were not seen in training contribute nothing, as in the encoder
+            index = np.fromiter((lookup.get(str(row.get(column)), -1) for row in rows), dtype=np.int64, count=n_rows)
+            known = index >= 0
+            out[known] += self.weights[index[known]]
+        for column in self.hashed:
+            buckets = np.fromiter(
+                (hash_bucket(column, str(row.get(column)), self.meta["hashing_features"]) for row in rows),
+                dtype=np.int64, count=n_rows
+            )
+            out += self.weights[self.hashed_offset + buckets]
+        return out
+
+    def predict(self, rows):
+        """Model output per row, as JSON-ready Python values"""
+        out = self.scores(rows)
+        if not np.isfinite(out).all():
+            raise ValueError("Scores overflowed; check the magnitude of the input values")
+        kind = self.meta["kind"]
+        if kind == "classifier":
+            index = (out[:, 0] > 0).astype(np.int64) if out.shape[1] == 1 else out.argmax(axis=1)
+            return self.classes[index].tolist()
+        if kind == "regressor":
+            return out[:, 0].tolist()
+        if kind == "nearest_centroid":
+            return out.argmin(axis=1).tolist()
+        return out.tolist()
+
+    def dump(self):
+        """Serialize to an ``.npz`` archive (plain arrays and a JSON header, no pickles)"""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, meta=np.array(json.dumps(self.meta)), weights=self.weights, bias=self.bias)
+        return buffer.getvalue()
+
+def load(blob):
+    """Restore a kernel written by ``Kernel.dump``"""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as archive:
+        meta = json.loads(str(archive["meta"]))
+        if meta.get("version") != KERNEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported kernel format version {meta.get('version')}")
+        return Kernel(meta, archive["weights"], archive["bias"])
+
+def blob_hash(blob):
+    """SHA-256 of a kernel blob (None without one); the version the kernel cache is keyed by"""
+    return hashlib.sha256(blob).hexdigest() if blob else None
+
+class KernelCache:
+    """LRU of loaded kernels, keyed by model id and invalidated when the kernel changes"""
+
+    def __init__(self, max_models):
+        self.max_models = max_models
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, model_id, version):
+        """``(found, kernel)`` for a model at ``version``; kernel is None for models without one"""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(model_id)
+                return True, entry[1]
+        return False, None
+
+    def store(self, model_id, version, blob):
+        """Load a kernel blob (or None) and remember it for the model at ``version``"""
+        kernel = load(blob) if blob else None
+        with self._lock:
+            self._entries[model_id] = (version, kernel)
+            self._entries.move_to_end(model_id)
+            while len(self._entries) > self.max_models:
+                self._entries.popitem(last=False)
+        return kernel
+
+kernel_cache = KernelCache(SCORING_CACHE_MODELS)
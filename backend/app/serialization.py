@@ -0,0 +1,70 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library, with the same output
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(value):
+    """Types neither encoder handles natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if orjson is None:
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Enum):
+            return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content):
+    """Encode to JSON bytes; datetimes, enums and NumPy values are handled natively by orjson"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded in one pass, without FastAPI's ``jsonable_encoder`` and ``response_model`` validation.
+
+    Endpoints returning it build plain dicts with ``from_object``/``from_mapping``
+    so the body still has exactly the fields of the declared ``response_model``.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+_fields = {}
+
+def fields(schema):
+    """``(name, default)`` of a pydantic schema's fields, in declaration order"""
+    cached = _fields.get(schema)
+    if cached is None:
+        cached = _fields[schema] = [(name, field.get_default()) for name, field in schema.__fields__.items()]
+    return cached
+
+def from_object(schema, obj, **values):
+    """The schema's fields read off an ORM object (or given as keyword arguments)"""
+    return {
+        name: values[name] if name in values else getattr(obj, name, default)
+        for name, default in fields(schema)
+    }
+
+def from_mapping(schema, values):
+    """The schema's fields picked from a dict, with defaults for missing keys"""
+    return {name: values.get(name, default) for name, default in fields(schema)}
+
+def respond(content, response=None, status_code=200):
+    """``FastJSONResponse`` carrying the headers an endpoint set on its injected ``response``"""
+    return FastJSONResponse(content, status_code=status_code, headers=dict(response.headers) if response is not None else None)
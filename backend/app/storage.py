@@ -0,0 +1,121 @@
+import os
+
+from sqlalchemy import select
+
+from . import models
+from .database import SessionLocal
+
+# Number of rows stored per chunk, and handed to the training code at a time when a dataset is streamed
+DATASET_CHUNK_ROWS = int(os.getenv("DATASET_CHUNK_ROWS", "5000"))
+
+# Largest dataset that can be created, uploaded or appended to. Well above the row counts at which
+# training switches to streaming (training.SCALABLE_ROWS_THRESHOLD / KERNEL_ROWS_THRESHOLD)
+MAX_DATASET_ROWS = int(os.getenv("MAX_DATASET_ROWS", "1000000"))
+
+def chunk_rows(dataset_id, rows, start_row=0):
+    """Rows to be stored for a dataset, as ``dataset_chunks`` insert parameters of DATASET_CHUNK_ROWS rows each"""
+    return [
+        {
+            "dataset_id": dataset_id,
+            "start_row": start_row + offset,
+            "n_rows": len(rows[offset:offset + DATASET_CHUNK_ROWS]),
+            "rows": rows[offset:offset + DATASET_CHUNK_ROWS],
+        }
+        for offset in range(0, len(rows), DATASET_CHUNK_ROWS)
+    ]
+
+def iter_rows(db, dataset_id, start=0):
+    """Yield the stored rows of a dataset from row ``start`` on, one stored chunk (a list of row dicts) at a time.
+
+    Each chunk is a separate query, so only one chunk is decoded at a time and
+    no cursor stays open while the caller works on it.
+    """
+    while True:
+        chunk = db.execute(
+            select(models.DatasetChunk.start_row, models.DatasetChunk.rows)
+            .where(
+                models.DatasetChunk.dataset_id == dataset_id,
+                models.DatasetChunk.start_row + models.DatasetChunk.n_rows > start
+            )
+            .order_by(models.DatasetChunk.start_row)
+            .limit(1)
+        ).first()
+        if chunk is None:
+            return
+        rows = chunk.rows[start - chunk.start_row:] if start > chunk.start_row else chunk.rows
+        start = chunk.start_row + len(chunk.rows)
+        yield rows
+
+def read_rows(dataset_id, start=0):
+    """``iter_rows`` with a session of its own, so a dataset can be read from any thread or request"""
+    db = SessionLocal()
+    try:
+        yield from iter_rows(db, dataset_id, start)
+    finally:
+        db.close()
+
+def load_frame(dataset, start=0):
+    """Load a stored dataset as a DataFrame, optionally skipping the first ``start`` rows"""
+    import pandas as pd
+
+    rows = []
+    for chunk in read_rows(dataset.id, start):
+        rows.extend(chunk)
+    return pd.DataFrame(rows)
+
+def iter_frames(dataset, chunk_rows=None, start=0):
+    """Yield a stored dataset as DataFrames of at most ``chunk_rows`` rows, reading it a stored chunk at a time"""
+    import pandas as pd
+
+    chunk_rows = chunk_rows or DATASET_CHUNK_ROWS
+    pending = []
+    for rows in read_rows(dataset.id, start):
+        pending.extend(rows)
+        while len(pending) >= chunk_rows:
+            yield pd.DataFrame(pending[:chunk_rows])
+            pending = pending[chunk_rows:]
+    if pending:
+        yield pd.DataFrame(pending)
+
+def frame_loader(dataset):
+    """Bind a dataset's current rows to a loader that is safe to call from another thread"""
+    dataset_id, n_rows = dataset.id, dataset.rows
+
+    def load():
+        import pandas as pd
+
+        rows = []
+        for chunk in read_rows(dataset_id):
+            rows.extend(chunk)
+        # Rows appended after the job was queued are not part of it
+        return pd.DataFrame(rows[:n_rows])
+    return load
+
+def column_type(values):
+    """Dataset schema type of a column array"""
+    import numpy as np
+
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return "boolean"
+    if np.issubdtype(values.dtype, np.integer):
+        return "integer"
+    if np.issubdtype(values.dtype, np.floating):
+        return "float"
+    return "string"
+
+def rows_from_columns(columns, chunk_rows=None):
+    """Yield named, equal-length column arrays as lists of row dicts, at most ``chunk_rows`` rows at a time.
+
+    Each chunk converts slices (views) of the arrays, so only one chunk of
+    Python values exists at a time besides the rows already yielded.
+    """
+    chunk_rows = chunk_rows or DATASET_CHUNK_ROWS
+    names = list(columns)
+    n_rows = len(columns[names[0]]) if names else 0
+    for offset in range(0, n_rows, chunk_rows):
+        values = [_tolist(columns[name][offset:offset + chunk_rows]) for name in names]
+        yield [dict(zip(names, row)) for row in zip(*values)]
+
+def _tolist(values):
+    return values.tolist() if hasattr(values, "tolist") else list(values)
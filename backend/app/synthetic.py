@@ -0,0 +1,126 @@
+import random
+import string
+
+# Column layouts of the generated datasets offered by the "Randomize" button
+DATASET_SCHEMAS = {
+    "Customer Data": {
+        "columns": [
+            {"name": "customer_id", "type": "string"},
+            {"name": "age", "type": "integer"},
+            {"name": "gender", "type": "string"},
+            {"name": "subscription_length", "type": "integer"},
+            {"name": "monthly_charges", "type": "float"},
+            {"name": "total_charges", "type": "float"},
+            {"name": "churn", "type": "boolean"}
+        ],
+        "filename": "customer_data.csv",
+        "file_type": "CSV"
+    },
+    "Sales Data": {
+        "columns": [
+            {"name": "order_id", "type": "string"},
+            {"name": "date", "type": "string"},
+            {"name": "customer_name", "type": "string"},
+            {"name": "product_id", "type": "string"},
+            {"name": "quantity", "type": "integer"},
+            {"name": "unit_price", "type": "float"},
+            {"name": "total", "type": "float"},
+            {"name": "discount", "type": "float"}
+        ],
+        "filename": "sales_data.csv",
+        "file_type": "CSV"
+    },
+    "Product Catalog": {
+        "columns": [
+            {"name": "product_id", "type": "string"},
+            {"name": "name", "type": "string"},
+            {"name": "category", "type": "string"},
+            {"name": "subcategory", "type": "string"},
+            {"name": "price", "type": "float"},
+            {"name": "stock_quantity", "type": "integer"},
+            {"name": "rating", "type": "float"},
+            {"name": "is_available", "type": "boolean"},
+            {"name": "description", "type": "string"},
+            {"name": "created_date", "type": "string"},
+            {"name": "last_updated", "type": "string"},
+            {"name": "weight", "type": "float"}
+        ],
+        "filename": "product_catalog.csv",
+        "file_type": "CSV"
+    }
+}
+
+def random_rows(columns, num_rows, rng=random):
+    """Generate rows for a dataset schema; pass a seeded ``random.Random`` for reproducible data"""
+    data = []
+    for i in range(num_rows):
+        row = {}
+        for column in columns:
+            if column["type"] == "string":
+                if "id" in column["name"]:
+                    row[column["name"]] = f"{column['name'].split('_')[0].upper()}{i+1:04d}"
+                elif "name" in column["name"]:
+                    row[column["name"]] = rng.choice([
+                        "Smith", "Johnson", "Williams", "Jones", "Brown", 
+                        "Davis", "Miller", "Wilson", "Moore", "Taylor",
+                        "Anderson", "Thomas", "Jackson", "White", "Harris"
+                    ])
+                elif "gender" in column["name"]:
+                    row[column["name"]] = rng.choice(["Male", "Female", "Other"])
+                elif "category" in column["name"]:
+                    row[column["name"]] = rng.choice([
+                        "Electronics", "Clothing", "Books", "Home", "Food", 
+                        "Sports", "Beauty", "Toys", "Automotive", "Garden"
+                    ])
+                elif "subcategory" in column["name"]:
+                    row[column["name"]] = rng.choice([
+                        "Phones", "T-shirts", "Fiction", "Kitchen", "Snacks", 
+                        "Outdoor", "Skincare", "Games", "Tools", "Plants"
+                    ])
+                elif "date" in column["name"]:
+                    row[column["name"]] = f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                elif "description" in column["name"]:
+                    row[column["name"]] = "This is a sample product description."
+                else:
+                    row[column["name"]] = ''.join(rng.choices(string.ascii_uppercase + string.digits, k=8))
+            elif column["type"] == "integer":
+                if "age" in column["name"]:
+                    row[column["name"]] = rng.randint(18, 80)
+                elif "quantity" in column["name"] or "stock" in column["name"]:
+                    row[column["name"]] = rng.randint(1, 100)
+                elif "subscription" in column["name"]:
+                    row[column["name"]] = rng.choice([1, 3, 6, 12, 24])
+                else:
+                    row[column["name"]] = rng.randint(1, 1000)
+            elif column["type"] == "float":
+                if "price" in column["name"] or "charges" in column["name"]:
+                    row[column["name"]] = round(rng.uniform(10, 200), 2)
+                elif "discount" in column["name"]:
+                    row[column["name"]] = round(rng.uniform(0, 0.3), 2)
+                elif "total" in column["name"]:
+                    row[column["name"]] = round(rng.uniform(50, 1000), 2)
+                elif "rating" in column["name"]:
+                    row[column["name"]] = round(rng.uniform(1, 5), 1)
+                elif "weight" in column["name"]:
+                    row[column["name"]] = round(rng.uniform(0.1, 10), 2)
+                else:
+                    row[column["name"]] = round(rng.uniform(0, 100), 2)
+            elif column["type"] == "boolean":
+                if "churn" in column["name"]:
+                    row[column["name"]] = rng.random() > 0.7  # 30% churn rate
+                else:
+                    row[column["name"]] = rng.choice([True, False])
+        data.append(row)
+    return data
+
+def column_schema(columns, data):
+    """Dataset schema entries for generated rows"""
+    return [
+        {
+            "name": column["name"],
+            "type": column["type"],
+            "missing": 0,  # No missing values in random data
+            "example": str(data[0][column["name"]])
+        }
+        for column in columns
+    ]
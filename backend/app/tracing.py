@@ -0,0 +1,115 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from . import accounting
+
+_local = threading.local()
+
+# Measurements in progress; each is flagged as shared once another one overlaps it
+_measuring_lock = threading.Lock()
+_measuring = set()
+
+class _Measurement:
+    def __init__(self):
+        self.shared = False
+
+class Trace:
+    """Wall time per named stage of a training run.
+
+    Spans with the same name add up, and spans may nest (``evaluate``
+    includes ``silhouette``), so the values are not meant to sum to the total.
+    The trace also adds up the CPU time used while it is active in a thread,
+    and with ``track_memory`` watches the peak memory of the run.
+
+    CPU time is the process's while nothing else is being measured, so BLAS
+    and OpenMP worker threads count. While stages overlap it falls back to
+    the thread's own CPU time, which leaves those workers out (an undercount
+    when fits use more than one thread).
+    """
+
+    def __init__(self, track_memory=False):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.cpu_user = 0.0
+        self.cpu_system = 0.0
+        self.memory = accounting.MemoryWatch() if track_memory else None
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def add_cpu(self, user, system):
+        with self._lock:
+            self.cpu_user += user
+            self.cpu_system += system
+
+    def merge(self, other, cpu=True):
+        """Add the spans of another trace, and its CPU time unless ``cpu`` is False"""
+        for name, seconds in other.timings.items():
+            self.add(name, seconds)
+        if cpu:
+            self.add_cpu(other.cpu_user, other.cpu_system)
+
+    def usage(self):
+        """CPU, wall time and peak memory of the run; stops the memory watch"""
+        return {
+            "cpu_user_seconds": round(self.cpu_user, 6),
+            "cpu_system_seconds": round(self.cpu_system, 6),
+            "wall_seconds": round(time.perf_counter() - self.started, 6),
+            "peak_memory_bytes": self.memory.stop() if self.memory else None,
+        }
+
+    def as_dict(self):
+        """Timings in seconds, plus the wall time since the trace started as ``total``"""
+        with self._lock:
+            timings = {name: round(seconds, 6) for name, seconds in self.timings.items()}
+        timings["total"] = round(time.perf_counter() - self.started, 6)
+        return timings
+
+def current():
+    return getattr(_local, "trace", None)
+
+@contextmanager
+def active(trace):
+    """Record spans opened in this thread, and the CPU time it uses, into ``trace``"""
+    previous = current()
+    measure = trace is not None and trace is not previous
+    _local.trace = trace
+    if measure:
+        measurement = _Measurement()
+        with _measuring_lock:
+            if _measuring:
+                measurement.shared = True
+                for other in _measuring:
+                    other.shared = True
+            _measuring.add(measurement)
+        user, system = accounting.thread_cpu()
+        process_user, process_system = accounting.process_cpu()
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+        if measure:
+            end_user, end_system = accounting.thread_cpu()
+            end_process_user, end_process_system = accounting.process_cpu()
+            with _measuring_lock:
+                _measuring.discard(measurement)
+            if measurement.shared:
+                trace.add_cpu(end_user - user, end_system - system)
+            else:
+                trace.add_cpu(end_process_user - process_user, end_process_system - process_system)
+
+@contextmanager
+def span(name):
+    """Time a block into the active trace (a no-op outside of one)"""
+    trace = current()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
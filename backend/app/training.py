@@ -0,0 +1,696 @@
+import os
+import pickle
+
+from . import compute, encoding, schemas, storage, tracing
+
+# Datasets above these row counts are streamed in chunks and trained with scalable estimators.
+# Kernel methods and DBSCAN scale quadratically or worse, so they switch over much earlier.
+SCALABLE_ROWS_THRESHOLD = int(os.getenv("SCALABLE_ROWS_THRESHOLD", "50000"))
+KERNEL_ROWS_THRESHOLD = int(os.getenv("KERNEL_ROWS_THRESHOLD", "10000"))
+
+# Passes over the data for streamed supervised models
+STREAMING_EPOCHS = int(os.getenv("STREAMING_EPOCHS", "5"))
+
+# Size of the Nystroem feature map used to approximate RBF/poly/sigmoid kernels
+KERNEL_APPROXIMATION_COMPONENTS = int(os.getenv("KERNEL_APPROXIMATION_COMPONENTS", "300"))
+
+def fit_target_encoder(df, target_column):
+    """Label-encode a categorical target column in place and return the learned classes"""
+    from sklearn.preprocessing import LabelEncoder
+
+    if not target_column or df[target_column].dtype != 'object':
+        return {}
+    encoder = LabelEncoder()
+    df[target_column] = encoder.fit_transform(df[target_column].astype(str))
+    return {target_column: [str(value) for value in encoder.classes_]}
+
+def apply_encoders(df, encoders):
+    """Label-encode columns with previously learned classes.
+
+    Values that were not seen before are appended to the class list so that
+    the codes of existing categories stay stable across incremental updates.
+    """
+    for column, classes in encoders.items():
+        if column not in df.columns:
+            continue
+        values = df[column].astype(str)
+        for value in values.unique():
+            if value not in classes:
+                classes.append(value)
+        lookup = {value: code for code, value in enumerate(classes)}
+        df[column] = values.map(lookup).astype(int)
+    return encoders
+
+def resolve_columns(df, feature_columns, target_column):
+    """Pick the feature columns, never using the target as a feature"""
+    feature_columns = list(feature_columns or df.columns.tolist())
+    if target_column and target_column in feature_columns:
+        feature_columns.remove(target_column)
+    return feature_columns
+
+def is_supervised(task_type):
+    return task_type in [schemas.ModelTaskType.CLASSIFICATION, schemas.ModelTaskType.REGRESSION]
+
+def needs_dense(model_type):
+    """PCA is the only estimator here that cannot take a sparse matrix"""
+    return model_type == schemas.ModelType.PCA
+
+def model_matrix(encoder, feature_map, df):
+    """Encode and scale a batch of rows, then apply the kernel approximation if the model uses one"""
+    X = encoder.transform(df)
+    if feature_map is not None:
+        X = feature_map.transform(X)
+    return X
+
+def build_estimator(model_type, task_type, hyperparams):
+    """Create an unfitted scikit-learn estimator for a model type and task"""
+    from sklearn.linear_model import LogisticRegression, LinearRegression
+    from sklearn.svm import SVC, SVR
+    from sklearn.neural_network import MLPClassifier, MLPRegressor
+    from sklearn.cluster import KMeans, DBSCAN
+    from sklearn.decomposition import PCA
+
+    if task_type == schemas.ModelTaskType.CLASSIFICATION:
+        if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
+            return LogisticRegression(
+                C=hyperparams.get('C', 1.0),
+                penalty=hyperparams.get('penalty', 'l2'),
+                solver=hyperparams.get('solver', 'lbfgs'),
+                max_iter=hyperparams.get('max_iter', 100),
+                random_state=hyperparams.get('random_state', 42)
+            )
+        elif model_type == schemas.ModelType.SVM:
+            return SVC(
+                C=hyperparams.get('C', 1.0),
+                kernel=hyperparams.get('kernel', 'rbf'),
+                gamma=hyperparams.get('gamma', 'scale'),
+                random_state=hyperparams.get('random_state', 42)
+            )
+        elif model_type == schemas.ModelType.NEURAL_NETWORK:
+            return MLPClassifier(
+                hidden_layer_sizes=hyperparams.get('hidden_layer_sizes', (100,)),
+                activation=hyperparams.get('activation', 'relu'),
+                learning_rate=hyperparams.get('learning_rate', 'constant'),
+                learning_rate_init=hyperparams.get('learning_rate_init', 0.001),
+                max_iter=hyperparams.get('max_iter', 200),
+                random_state=hyperparams.get('random_state', 42)
+            )
+        raise ValueError("Unsupported model type for classification")
+
+    if task_type == schemas.ModelTaskType.REGRESSION:
+        if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
+            return LinearRegression()
+        elif model_type == schemas.ModelType.SVR:
+            return SVR(
+                C=hyperparams.get('C', 1.0),
+                kernel=hyperparams.get('kernel', 'rbf'),
+                gamma=hyperparams.get('gamma', 'scale')
+            )
+        elif model_type == schemas.ModelType.NEURAL_NETWORK:
+            return MLPRegressor(
+                hidden_layer_sizes=hyperparams.get('hidden_layer_sizes', (100,)),
+                activation=hyperparams.get('activation', 'relu'),
+                learning_rate=hyperparams.get('learning_rate', 'constant'),
+                learning_rate_init=hyperparams.get('learning_rate_init', 0.001),
+                max_iter=hyperparams.get('max_iter', 200),
+                random_state=hyperparams.get('random_state', 42)
+            )
+        raise ValueError("Unsupported model type for regression")
+
+    if task_type == schemas.ModelTaskType.CLUSTERING:
+        if model_type == schemas.ModelType.KMEANS:
+            return KMeans(
+                n_clusters=hyperparams.get('n_clusters', 8),
+                init=hyperparams.get('init', 'k-means++'),
+                random_state=hyperparams.get('random_state', 42)
+            )
+        elif model_type == schemas.ModelType.DBSCAN:
+            return DBSCAN(
+                eps=hyperparams.get('eps', 0.5),
+                min_samples=hyperparams.get('min_samples', 5)
+            )
+        raise ValueError("Unsupported model type for clustering")
+
+    if task_type == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
+        if model_type == schemas.ModelType.PCA:
+            return PCA(
+                n_components=hyperparams.get('n_components', 2)
+            )
+        raise ValueError("Unsupported model type for dimensionality reduction")
+
+    raise ValueError(f"Unsupported task type {task_type}")
+
+def supervised_metrics(task_type, y_test, y_pred):
+    """Compute classification or regression metrics from predictions"""
+    from sklearn.metrics import accuracy_score, precision_score, f1_score, mean_absolute_error, mean_squared_error, r2_score
+
+    if task_type == schemas.ModelTaskType.CLASSIFICATION:
+        return {
+            'accuracy': float(accuracy_score(y_test, y_pred)),
+            'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
+            'f1': float(f1_score(y_test, y_pred, average='weighted', zero_division=0))
+        }
+    return {
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'mse': float(mean_squared_error(y_test, y_pred)),
+        'r2': float(r2_score(y_test, y_pred))
+    }
+
+def evaluate_supervised(task_type, estimator, X_test, y_test):
+    """Score a fitted supervised estimator on held-out data"""
+    return supervised_metrics(task_type, y_test, estimator.predict(X_test))
+
+def evaluate_unsupervised(model_type, estimator, X_scaled, hyperparams):
+    """Summarize a fitted clustering or dimensionality reduction estimator"""
+    from sklearn.metrics import silhouette_score
+
+    if model_type == schemas.ModelType.KMEANS:
+        labels = estimator.predict(X_scaled)
+        with tracing.span('silhouette'):
+            silhouette = silhouette_score(X_scaled, labels, sample_size=min(1000, X_scaled.shape[0]))
+        return {
+            'inertia': float(estimator.inertia_),
+            'n_clusters': int(hyperparams.get('n_clusters', 8)),
+            'silhouette_score': float(silhouette)
+        }
+    elif model_type == schemas.ModelType.DBSCAN:
+        labels = estimator.labels_
+        n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
+        return {
+            'n_clusters': int(n_clusters),
+            'n_noise': int(list(labels).count(-1))
+        }
+    return {
+        'explained_variance_ratio': [float(v) for v in estimator.explained_variance_ratio_],
+        'n_components': int(hyperparams.get('n_components', 2))
+    }
+
+def preprocess(model_type, task_type, hyperparams, df, feature_columns, target_column,
+               encoders=None, encoder=None):
+    """Encode, split and scale a DataFrame into the matrices an estimator is fit on.
+
+    Supervised tasks get a train/test split; unsupervised ones use every row.
+    Passing a previous ``encoder`` keeps the feature layout unchanged.
+    """
+    import numpy as np
+    from sklearn.model_selection import train_test_split
+
+    supervised = is_supervised(task_type)
+    if supervised and not target_column:
+        raise ValueError("Target column required for supervised learning")
+
+    # A categorical target is label-encoded; features go through the feature encoder
+    with tracing.span('encode_target'):
+        if encoders is None:
+            encoders = fit_target_encoder(df, target_column if supervised else None)
+        else:
+            apply_encoders(df, encoders)
+
+    feature_columns = resolve_columns(df, feature_columns, target_column)
+    if encoder is None:
+        with tracing.span('encode_features'):
+            encoder = encoding.FeatureEncoder(feature_columns, dense=needs_dense(model_type)).observe(df)
+
+    prepared = {
+        'encoder': encoder,
+        'encoders': encoders,
+        'feature_columns': feature_columns,
+        'target_column': target_column if supervised else None,
+        'n_rows': len(df),
+    }
+
+    if supervised:
+        y = df[target_column]
+
+        # Split data
+        with tracing.span('split'):
+            train_rows, test_rows = train_test_split(
+                np.arange(len(df)), test_size=0.2, random_state=hyperparams.get('random_state', 42)
+            )
+            df_train, df_test = df.iloc[train_rows], df.iloc[test_rows]
+
+        # Normalize numeric features and encode categorical ones
+        with tracing.span('scale'):
+            encoder.fit_scaler(df_train)
+        with tracing.span('transform'):
+            prepared.update(
+                train_rows=train_rows,
+                test_rows=test_rows,
+                X_train=encoder.transform(df_train),
+                X_test=encoder.transform(df_test),
+                y_train=y.iloc[train_rows].to_numpy(),
+                y_test=y.iloc[test_rows].to_numpy(),
+            )
+    else:
+        # No test-train split for unsupervised learning
+        with tracing.span('scale'):
+            encoder.fit_scaler(df)
+        with tracing.span('transform'):
+            prepared['X'] = encoder.transform(df)
+    return prepared
+
+def fit_estimator(model_type, task_type, hyperparams, prepared, estimator=None):
+    """Fit an estimator (a new one unless a warm-start ``estimator`` is given) on preprocessed data"""
+    if estimator is None:
+        estimator = build_estimator(model_type, task_type, hyperparams)
+    with compute.thread_budget() as threads, tracing.span('fit'):
+        compute.apply_n_jobs(estimator, hyperparams, threads)
+        if is_supervised(task_type):
+            estimator.fit(prepared['X_train'], prepared['y_train'])
+        else:
+            estimator.fit(prepared['X'])
+    return estimator
+
+def evaluate(model_type, task_type, hyperparams, prepared, estimator):
+    """Metrics for a fitted estimator, plus how its categorical columns were encoded"""
+    with tracing.span('evaluate'):
+        if is_supervised(task_type):
+            metrics = evaluate_supervised(task_type, estimator, prepared['X_test'], prepared['y_test'])
+        else:
+            metrics = evaluate_unsupervised(model_type, estimator, prepared['X'], hyperparams)
+    metrics.update({key: value for key, value in prepared['encoder'].summary().items() if value})
+    return metrics
+
+def score(model_type, task_type, prepared, estimator):
+    """Per-row model output over the whole dataset, in the original row order.
+
+    Predictions for supervised models, cluster labels for clustering and the
+    projected components for dimensionality reduction.
+    """
+    import numpy as np
+    import scipy.sparse as sp
+
+    if is_supervised(task_type):
+        stack = sp.vstack if sp.issparse(prepared['X_train']) else np.vstack
+        rows = np.concatenate([prepared['train_rows'], prepared['test_rows']])
+        predictions = estimator.predict(stack([prepared['X_train'], prepared['X_test']]))
+        output = np.empty_like(predictions)
+        output[rows] = predictions
+        return output
+    if task_type == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
+        return estimator.transform(prepared['X'])
+    if hasattr(estimator, 'labels_') and len(estimator.labels_) == prepared['n_rows']:
+        labels = estimator.labels_
+    else:
+        labels = estimator.predict(prepared['X'])
+    if task_type == schemas.ModelTaskType.CLUSTERING:
+        return cluster_output(estimator, prepared['X'], labels)
+    return labels
+
+def cluster_output(estimator, X, labels):
+    """Cluster labels, plus the distance to the assigned centroid for centroid-based models"""
+    import numpy as np
+
+    output = {'cluster': labels}
+    if hasattr(estimator, 'cluster_centers_') and hasattr(estimator, 'transform'):
+        output['distance_to_centroid'] = estimator.transform(X)[np.arange(len(labels)), labels]
+    return output
+
+def score_frame(artifact, df):
+    """Per-row model output for a batch of rows, using a trained artifact (same output as ``score``)"""
+    df = df.copy()
+    apply_encoders(df, artifact['encoders'])
+    X = model_matrix(artifact['encoder'], artifact['feature_map'], df)
+    estimator = artifact['estimator']
+    if artifact['task_type'] == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
+        return estimator.transform(X)
+    if artifact['task_type'] == schemas.ModelTaskType.CLUSTERING:
+        return cluster_output(estimator, X, estimator.predict(X))
+    return estimator.predict(X)
+
+def score_dataset(artifact, frames, n_rows):
+    """Per-row model output of a whole dataset, one chunk of rows (from ``frames``) at a time"""
+    estimator = artifact['estimator']
+    labels = getattr(estimator, 'labels_', None)
+    offset = 0
+    for df in frames:
+        if not hasattr(estimator, 'predict') and labels is not None and len(labels) == n_rows:
+            # Clusterers without predict (DBSCAN) can only label the rows they were fit on
+            yield {'cluster': labels[offset:offset + len(df)]}
+        else:
+            yield score_frame(artifact, df)
+        offset += len(df)
+
+def output_columns(task_type, output):
+    """Name the columns of a model output, for writing it as a dataset"""
+    if isinstance(output, dict):
+        return dict(output)
+    if task_type == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
+        return {f"component_{index + 1}": output[:, index] for index in range(output.shape[1])}
+    return {"prediction": output}
+
+def make_artifact(model_type, task_type, prepared, estimator):
+    """Everything needed to reuse or update a fitted model later"""
+    return {
+        'model_type': model_type,
+        'task_type': task_type,
+        'estimator': estimator,
+        'encoder': prepared['encoder'],
+        'encoders': prepared['encoders'],
+        'feature_map': None,
+        'feature_columns': prepared['feature_columns'],
+        'target_column': prepared['target_column'],
+        'n_samples_seen': prepared['n_rows'],
+    }
+
+def train(model_type, task_type, hyperparams, df, feature_columns, target_column,
+          estimator=None, encoders=None, encoder=None, on_progress=None):
+    """Fit a model on a DataFrame and return its artifact and metrics.
+
+    When an already fitted ``estimator`` is passed it is refit in place, which
+    lets warm-start capable estimators continue from their previous solution.
+    Passing its ``encoder`` as well keeps the feature layout unchanged.
+    """
+    def report(value):
+        if on_progress:
+            on_progress(value)
+
+    prepared = preprocess(model_type, task_type, hyperparams, df, feature_columns, target_column,
+                          encoders=encoders, encoder=encoder)
+    report(50)
+
+    estimator = fit_estimator(model_type, task_type, hyperparams, prepared, estimator=estimator)
+    report(90)
+
+    metrics = evaluate(model_type, task_type, hyperparams, prepared, estimator)
+    return make_artifact(model_type, task_type, prepared, estimator), metrics
+
+def supports_incremental(model_type, metrics):
+    """Whether a trained model can learn from new rows with ``partial_fit``.
+
+    Neural networks always can. Other model types only when they were
+    trained by streaming, which uses SGDClassifier/SGDRegressor,
+    MiniBatchKMeans, Birch or IncrementalPCA; their in-memory estimators
+    (LogisticRegression, SVC, KMeans, PCA, ...) can only be refit.
+    """
+    metrics = metrics or {}
+    return (
+        model_type == schemas.ModelType.NEURAL_NETWORK
+        or metrics.get('training_mode') == 'streaming'
+        # Only models that passed this check have been updated incrementally before
+        or 'retrain_mode' in metrics
+    )
+
+@compute.budgeted
+def incremental_train(artifact, hyperparams, new_df, on_progress=None):
+    """Update a trained model with new rows using ``partial_fit``.
+
+    Only the new rows are read, and the scaler's running statistics are
+    updated in place. Estimators without ``partial_fit`` are rejected
+    rather than refit on the full data.
+    """
+    estimator = artifact['estimator']
+    task_type = artifact['task_type']
+    model_type = artifact['model_type']
+    new_rows = len(new_df)
+
+    # Artifacts saved before the feature encoder existed cannot be updated either
+    if not hasattr(estimator, 'partial_fit') or 'encoder' not in artifact:
+        raise ValueError(
+            f"{type(estimator).__name__} cannot be updated incrementally. Run a full training job instead."
+        )
+
+    if new_rows == 0:
+        return artifact, {'retrain_mode': 'none', 'new_rows': 0}
+
+    df = new_df.copy()
+    apply_encoders(df, artifact['encoders'])
+    encoder = artifact['encoder']
+    feature_map = artifact.get('feature_map')
+    if on_progress:
+        on_progress(40)
+
+    if is_supervised(task_type):
+        y = df[artifact['target_column']]
+        # Score the new rows before learning from them (test-then-train)
+        with tracing.span('evaluate'):
+            metrics = evaluate_supervised(task_type, estimator, model_matrix(encoder, feature_map, df), y)
+        with tracing.span('scale'):
+            encoder.partial_fit(df)
+        if on_progress:
+            on_progress(70)
+        with tracing.span('fit'):
+            estimator.partial_fit(model_matrix(encoder, feature_map, df), y)
+    else:
+        with tracing.span('scale'):
+            encoder.partial_fit(df)
+            X_scaled = model_matrix(encoder, feature_map, df)
+        if on_progress:
+            on_progress(70)
+        with tracing.span('fit'):
+            estimator.partial_fit(X_scaled)
+        with tracing.span('evaluate'):
+            metrics = evaluate_unsupervised(model_type, estimator, X_scaled, hyperparams)
+
+    if on_progress:
+        on_progress(90)
+
+    artifact['n_samples_seen'] += new_rows
+    metrics.update(retrain_mode='partial_fit', new_rows=new_rows)
+    return artifact, metrics
+
+def use_streaming(model_type, n_rows):
+    """Whether a dataset is large enough to train out of core with scalable estimators"""
+    if model_type in [schemas.ModelType.SVM, schemas.ModelType.SVR, schemas.ModelType.DBSCAN]:
+        return n_rows > KERNEL_ROWS_THRESHOLD
+    return n_rows > SCALABLE_ROWS_THRESHOLD
+
+def build_scalable_estimator(model_type, task_type, hyperparams, n_rows, n_features):
+    """Create a streaming-capable equivalent of a model type.
+
+    Returns the estimator, an optional unfitted kernel approximation applied
+    after scaling, and whether the model type had to be substituted.
+    """
+    from sklearn.linear_model import SGDClassifier, SGDRegressor
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.cluster import MiniBatchKMeans, Birch
+    from sklearn.decomposition import IncrementalPCA
+
+    random_state = hyperparams.get('random_state', 42)
+    # SGD regularizes per sample while C is a total penalty, so scale accordingly
+    alpha = 1.0 / (hyperparams.get('C', 1.0) * max(n_rows, 1))
+
+    def kernel_map():
+        kernel = hyperparams.get('kernel', 'rbf')
+        if kernel == 'linear':
+            return None
+        gamma = hyperparams.get('gamma', 'scale')
+        if gamma in ['scale', 'auto']:
+            # Features are standardized, so 'scale' and 'auto' both reduce to 1 / n_features
+            gamma = 1.0 / max(n_features, 1)
+        return Nystroem(
+            kernel=kernel,
+            gamma=float(gamma),
+            n_components=KERNEL_APPROXIMATION_COMPONENTS,
+            random_state=random_state
+        )
+
+    if task_type == schemas.ModelTaskType.CLASSIFICATION:
+        if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
+            penalty = hyperparams.get('penalty', 'l2')
+            return SGDClassifier(
+                loss='log_loss',
+                penalty=penalty if penalty in ['l1', 'l2', 'elasticnet'] else 'l2',
+                alpha=alpha,
+                random_state=random_state
+            ), None, True
+        elif model_type == schemas.ModelType.SVM:
+            return SGDClassifier(loss='hinge', alpha=alpha, random_state=random_state), kernel_map(), True
+
+    elif task_type == schemas.ModelTaskType.REGRESSION:
+        if model_type == schemas.ModelType.LOGISTIC_REGRESSION:
+            return SGDRegressor(penalty=None, random_state=random_state), None, True
+        elif model_type == schemas.ModelType.SVR:
+            return SGDRegressor(
+                loss='epsilon_insensitive',
+                epsilon=hyperparams.get('epsilon', 0.1),
+                alpha=alpha,
+                random_state=random_state
+            ), kernel_map(), True
+
+    elif task_type == schemas.ModelTaskType.CLUSTERING:
+        if model_type == schemas.ModelType.KMEANS:
+            init = hyperparams.get('init', 'k-means++')
+            return MiniBatchKMeans(
+                n_clusters=hyperparams.get('n_clusters', 8),
+                init=init if init in ['k-means++', 'random'] else 'k-means++',
+                random_state=random_state
+            ), None, True
+        elif model_type == schemas.ModelType.DBSCAN:
+            # Birch's radius threshold plays the role of eps and it clusters in a single pass
+            return Birch(threshold=hyperparams.get('eps', 0.5), n_clusters=None), None, True
+
+    elif task_type == schemas.ModelTaskType.DIMENSIONALITY_REDUCTION:
+        if model_type == schemas.ModelType.PCA:
+            return IncrementalPCA(n_components=hyperparams.get('n_components', 2)), None, True
+
+    # Neural networks learn with partial_fit natively
+    return build_estimator(model_type, task_type, hyperparams), None, False
+
+def estimator_name(estimator, feature_map=None):
+    name = type(estimator).__name__
+    if feature_map is not None:
+        name = f"{type(feature_map).__name__} + {name}"
+    return name
+
+@compute.budgeted
+def train_streaming(model_type, task_type, hyperparams, n_rows, iter_chunks, feature_columns, target_column,
+                    on_progress=None):
+    """Fit a model chunk by chunk so memory stays bounded by the chunk size.
+
+    ``iter_chunks`` is called once per pass and must yield DataFrames. The
+    first pass learns categories and the scaling statistics, the
+    following passes feed the estimator with ``partial_fit`` and the last one
+    evaluates it. The same 20% of rows is held out on every pass.
+    """
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.metrics import silhouette_score
+
+    def report(value):
+        if on_progress:
+            on_progress(value)
+
+    supervised = is_supervised(task_type)
+    if supervised and not target_column:
+        raise ValueError("Target column required for supervised learning")
+
+    seed = hyperparams.get('random_state', 42) or 0
+
+    def holdout(index, size):
+        if not supervised:
+            return np.zeros(size, dtype=bool)
+        return np.random.RandomState(seed + index).rand(size) < 0.2
+
+    # First pass - categories, scaling statistics and class labels
+    encoder = None
+    encoders = None
+    classes = set()
+    with tracing.span('encode_features'):
+        for index, df in enumerate(iter_chunks()):
+            if encoder is None:
+                columns = resolve_columns(df, feature_columns, target_column)
+                encoder = encoding.FeatureEncoder(columns, dense=needs_dense(model_type))
+                encoders = {target_column: []} if supervised and df[target_column].dtype == 'object' else {}
+            apply_encoders(df, encoders)
+            encoder.observe(df)
+            encoder.partial_fit(df[~holdout(index, len(df))])
+            if task_type == schemas.ModelTaskType.CLASSIFICATION:
+                classes.update(np.unique(df[target_column]).tolist())
+    if encoder is None:
+        raise ValueError("Dataset is empty")
+    encoder.plan()
+    report(40)
+
+    estimator, feature_map, substituted = build_scalable_estimator(
+        model_type, task_type, hyperparams, n_rows, encoder.n_features
+    )
+    fit_kwargs = {'classes': np.array(sorted(classes))} if task_type == schemas.ModelTaskType.CLASSIFICATION else {}
+
+    # Training passes - only supervised models benefit from revisiting the data
+    epochs = STREAMING_EPOCHS if supervised else 1
+    with tracing.span('fit'):
+        for epoch in range(epochs):
+            for index, df in enumerate(iter_chunks()):
+                apply_encoders(df, encoders)
+                train_rows = ~holdout(index, len(df))
+                X = encoder.transform(df[train_rows])
+                if feature_map is not None and not hasattr(feature_map, 'components_'):
+                    # The kernel approximation is fitted once, on the first chunk
+                    feature_map.fit(X)
+                if feature_map is not None:
+                    X = feature_map.transform(X)
+                if supervised:
+                    estimator.partial_fit(X, df[target_column][train_rows], **fit_kwargs)
+                else:
+                    estimator.partial_fit(X)
+            report(50 + int(40 * (epoch + 1) / epochs))
+
+    # Evaluation pass
+    y_test, y_pred = [], []
+    inertia = 0.0
+    labels = set()
+    sample = []
+    sample_rate = min(1.0, 1000 / max(n_rows, 1))
+    rng = np.random.RandomState(seed)
+    with tracing.span('evaluate'):
+        for index, df in enumerate(iter_chunks()):
+            apply_encoders(df, encoders)
+            if supervised:
+                test_rows = holdout(index, len(df))
+                X = model_matrix(encoder, feature_map, df[test_rows])
+                if X.shape[0]:
+                    y_pred.append(estimator.predict(X))
+                    y_test.append(df[target_column][test_rows].to_numpy())
+            elif model_type == schemas.ModelType.KMEANS:
+                X = model_matrix(encoder, feature_map, df)
+                inertia += -estimator.score(X)
+                sample.append(X[rng.rand(X.shape[0]) < sample_rate])
+            elif model_type == schemas.ModelType.DBSCAN:
+                X = model_matrix(encoder, feature_map, df)
+                labels.update(np.unique(estimator.predict(X)).tolist())
+
+    if supervised:
+        metrics = supervised_metrics(task_type, np.concatenate(y_test), np.concatenate(y_pred))
+    elif model_type == schemas.ModelType.KMEANS:
+        # Silhouette is quadratic, so it is computed on a uniform sample of about 1000 rows
+        sample = sp.vstack(sample) if sp.issparse(sample[0]) else np.concatenate(sample)
+        with tracing.span('silhouette'):
+            silhouette = silhouette_score(sample, estimator.predict(sample))
+        metrics = {
+            'inertia': float(inertia),
+            'n_clusters': int(hyperparams.get('n_clusters', 8)),
+            'silhouette_score': float(silhouette)
+        }
+    elif model_type == schemas.ModelType.DBSCAN:
+        metrics = {
+            'n_clusters': len(labels),
+            'n_noise': 0
+        }
+    else:
+        metrics = evaluate_unsupervised(model_type, estimator, None, hyperparams)
+
+    metrics['training_mode'] = 'streaming'
+    metrics['estimator'] = estimator_name(estimator, feature_map)
+    if substituted:
+        metrics['substituted_for'] = type(build_estimator(model_type, task_type, hyperparams)).__name__
+    metrics.update({key: value for key, value in encoder.summary().items() if value})
+
+    artifact = {
+        'model_type': model_type,
+        'task_type': task_type,
+        'estimator': estimator,
+        'encoder': encoder,
+        'encoders': encoders,
+        'feature_map': feature_map,
+        'feature_columns': columns,
+        'target_column': target_column if supervised else None,
+        'n_samples_seen': int(n_rows),
+    }
+    return artifact, metrics
+
+def train_dataset(model_type, task_type, hyperparams, dataset, feature_columns, target_column, on_progress=None):
+    """Train on a stored dataset, streaming it with scalable estimators when it is large"""
+    if use_streaming(model_type, dataset.rows):
+        return train_streaming(
+            model_type, task_type, hyperparams, dataset.rows,
+            lambda: storage.iter_frames(dataset),
+            feature_columns, target_column, on_progress=on_progress
+        )
+
+    # Convert dataset to DataFrame
+    with tracing.span('load_frame'):
+        df = storage.load_frame(dataset)
+    if on_progress:
+        on_progress(20)
+    return train(model_type, task_type, hyperparams, df, feature_columns, target_column, on_progress=on_progress)
+
+def dump_artifact(artifact):
+    """Serialize a trained model artifact for storage on the model row"""
+    return pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_artifact(blob):
+    """Restore a trained model artifact, or None if the model was never persisted"""
+    if not blob:
+        return None
+    return pickle.loads(blob)
@@ -0,0 +1,89 @@
+import io
+import os
+import random
+import threading
+import time
+import warnings
+
+from . import schemas, synthetic, training
+
+# Import and exercise the ML stack in the background when the API starts (serve.py does it before forking)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# Rows of the generated frame every model is fitted on during warm-up
+WARMUP_ROWS = 60
+
+# Kept small so the slowest estimators finish their warm-up fit quickly
+WARMUP_HYPERPARAMETERS = {"max_iter": 5, "n_clusters": 2, "hidden_layer_sizes": (8,)}
+
+WARMUP_TARGETS = {
+    schemas.ModelTaskType.CLASSIFICATION: "churn",
+    schemas.ModelTaskType.REGRESSION: "monthly_charges",
+}
+
+state = {"ready": False, "started_at": None, "finished_at": None, "seconds": None, "pid": None, "error": None}
+_lock = threading.Lock()
+
+def preload():
+    """Import every module the request handlers and training code import lazily"""
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import scipy.sparse  # noqa: F401
+    import sklearn.cluster  # noqa: F401
+    import sklearn.decomposition  # noqa: F401
+    import sklearn.kernel_approximation  # noqa: F401
+    import sklearn.linear_model  # noqa: F401
+    import sklearn.metrics  # noqa: F401
+    import sklearn.model_selection  # noqa: F401
+    import sklearn.neural_network  # noqa: F401
+    import sklearn.preprocessing  # noqa: F401
+    import sklearn.svm  # noqa: F401
+
+def exercise():
+    """Parse a small CSV and fit every supported model once, to fill first-call caches"""
+    import pandas as pd
+
+    columns = synthetic.DATASET_SCHEMAS["Customer Data"]["columns"]
+    rows = synthetic.random_rows(columns, WARMUP_ROWS, random.Random(0))
+    df = pd.read_csv(io.StringIO(pd.DataFrame(rows).to_csv(index=False)))
+
+    for model_type in schemas.ModelType:
+        for task_type in schemas.ModelTaskType:
+            try:
+                training.build_estimator(model_type, task_type, {})
+            except ValueError:
+                continue
+            target_column = WARMUP_TARGETS.get(task_type)
+            artifact, _ = training.train(model_type, task_type, dict(WARMUP_HYPERPARAMETERS),
+                                         df.copy(), None, target_column)
+            training.load_artifact(training.dump_artifact(artifact))
+
+def warm():
+    """Preload and exercise the ML stack once per process tree; later calls return immediately.
+
+    A failed warm-up is recorded but still marks the process ready: requests
+    then pay the import cost themselves instead of never being served.
+    """
+    with _lock:
+        if state["ready"]:
+            return state
+        state.update(started_at=time.time(), pid=os.getpid())
+        try:
+            with warnings.catch_warnings():
+                # Convergence warnings from the deliberately short fits
+                warnings.simplefilter("ignore")
+                preload()
+                exercise()
+        except Exception as e:
+            state["error"] = str(e)
+            print(f"Warm-up failed: {str(e)}")
+        state.update(ready=True, finished_at=time.time())
+        state["seconds"] = round(state["finished_at"] - state["started_at"], 3)
+        print(f"Warm-up finished in {state['seconds']}s")
+        return state
+
+def warm_in_background():
+    """Start warming up on a daemon thread unless it has already happened (e.g. in a pre-fork parent)"""
+    if state["ready"]:
+        return
+    threading.Thread(target=warm, name="warmup", daemon=True).start()
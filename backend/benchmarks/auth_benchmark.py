@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""Authentication throughput benchmark.
+
+Seeds users through the API, then runs two groups of clients side by side:
+
+* login clients hammer ``POST /token`` (bcrypt verification), the 9am storm
+* reader clients call ``GET /users/me/`` (JWT decode and user lookup)
+
+Reports throughput and p50/p95/p99 latency for each. When the password
+checks block the event loop, reader latency climbs to the login latency;
+when they run off the loop, readers stay fast however hard the logins push.
+Pass ``--logins 0`` for a baseline of the readers alone.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.auth_benchmark
+    python -m benchmarks.auth_benchmark --logins 16 --readers 4 --duration 20 --out auth.json
+    python -m benchmarks.auth_benchmark --url http://localhost:8000
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+
+from .load_test import Client, login, start_local_server, summarize
+
+def seed_users(client, users):
+    """Create users through the API and return ``(email, password, token)`` for each"""
+    accounts = []
+    for index in range(users):
+        email = f"auth{index}-{uuid.uuid4().hex[:6]}@packageml.com"
+        password = "authbench"
+        client.json("POST", "/users/", {"email": email, "password": password})
+        token = login(client, email, password)
+        if token is None:
+            raise RuntimeError(f"Could not log in seeded user {email}")
+        accounts.append((email, password, token))
+    return accounts
+
+def drive(base_url, accounts, logins, readers, duration):
+    """Run login and reader clients together and collect ``(route, status, seconds)`` samples"""
+    samples = []
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index, route):
+        client = Client(base_url)
+        email, password, token = accounts[index % len(accounts)]
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if route == "POST /token":
+                    status = 200 if login(client, email, password) else 401
+                else:
+                    status = client.get("/users/me/", token)[0]
+            except Exception as e:
+                status = f"error: {type(e).__name__}"
+                client = Client(base_url)
+            local.append((route, status, time.perf_counter() - start))
+        with samples_lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(index, "POST /token")) for index in range(logins)]
+    threads += [threading.Thread(target=worker, args=(index, "GET /users/me/")) for index in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--logins", type=int, default=8, help="Clients logging in continuously")
+    parser.add_argument("--readers", type=int, default=4, help="Clients calling GET /users/me/ continuously")
+    parser.add_argument("--users", type=int, default=4, help="Seeded users")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to run")
+    parser.add_argument("--out", help="Write the report as JSON")
+    return parser.parse_args(argv)
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        base_url, server = start_local_server()
+    print(f"Target: {base_url}")
+
+    print(f"Seeding {args.users} users...")
+    accounts = seed_users(Client(base_url), args.users)
+
+    print(f"Running {args.logins} login and {args.readers} reader clients for {args.duration}s...")
+    samples, elapsed = drive(base_url, accounts, args.logins, args.readers, args.duration)
+    summary = summarize(samples, elapsed)
+
+    print(f"\n{'route':<20}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in summary:
+        print(f"{row['route']:<20}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "target": base_url,
+                "logins": args.logins,
+                "readers": args.readers,
+                "elapsed_seconds": elapsed,
+                "routes": summary,
+            }, f, indent=2)
+        print(f"Report written to {args.out}")
+
+    if server:
+        server.should_exit = True
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+"""HTTP load test for the API.
+
+Boots the FastAPI app with uvicorn against a throwaway SQLite database (or
+targets a running server with --url), seeds users, datasets, models and jobs
+through the API, then drives a weighted mix of requests at a fixed
+concurrency. Reports throughput and p50/p95/p99 latency per route.
+
+The built-in server shares a process (and the GIL) with the load generator,
+which is fine for comparing changes; for absolute numbers, start the server
+separately and pass --url.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.load_test --concurrency 16 --duration 30
+    python -m benchmarks.load_test --mix list_datasets=1,list_jobs=1 --out load.json
+    python -m benchmarks.load_test --url http://localhost:8000 --users 5
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+# Request mix: operation name -> relative weight
+DEFAULT_MIX = {
+    "token": 5,
+    "list_datasets": 20,
+    "get_dataset": 10,
+    "list_models": 15,
+    "list_jobs": 20,
+    "get_job": 10,
+    "create_model": 5,
+    "create_job": 5,
+    "randomize_dataset": 5,
+    "upload_dataset": 5,
+}
+
+class Client:
+    """Keep-alive HTTP client, one per load-generating thread"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.connection = None
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.connection = connection_class(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request and return ``(status, parsed JSON or None)``"""
+        if self.connection is None:
+            self._connect()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (http.client.HTTPException, OSError):
+            # Reconnect once if the server closed an idle keep-alive connection
+            self._connect()
+            self.connection.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = self.connection.getresponse()
+            payload = response.read()
+        try:
+            return response.status, json.loads(payload) if payload else None
+        except ValueError:
+            return response.status, None
+
+    def json(self, method, path, data, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return self.request(method, path, json.dumps(data), headers)
+
+    def get(self, path, token):
+        return self.request("GET", path, headers={"Authorization": f"Bearer {token}"})
+
+def login(client, email, password):
+    status, body = client.request(
+        "POST", "/token",
+        urlencode({"username": email, "password": password}),
+        {"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    return body["access_token"] if status == 200 else None
+
+def csv_upload(token, rng, rows=200):
+    """Multipart body for a small CSV upload"""
+    boundary = uuid.uuid4().hex
+    lines = ["age,income,score,segment"]
+    for _ in range(rows):
+        lines.append(f"{rng.randint(18, 80)},{rng.uniform(1e4, 1e5):.2f},{rng.random():.4f},{rng.choice('ABC')}")
+    parts = [
+        ("name", None, "Load test upload"),
+        ("file", "upload.csv", "\n".join(lines)),
+    ]
+    chunks = []
+    for field, filename, value in parts:
+        disposition = f'form-data; name="{field}"' + (f'; filename="{filename}"' if filename else "")
+        chunks.append(f"--{boundary}\r\nContent-Disposition: {disposition}\r\n")
+        if filename:
+            chunks.append("Content-Type: text/csv\r\n")
+        chunks.append(f"\r\n{value}\r\n")
+    chunks.append(f"--{boundary}--")
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}", "Authorization": f"Bearer {token}"}
+    return "".join(chunks).encode(), headers
+
+class Tenant:
+    """A seeded user and the ids of the objects they own"""
+
+    def __init__(self, email, password, token):
+        self.email = email
+        self.password = password
+        self.token = token
+        self.dataset_ids = []
+        self.model_ids = []
+        self.job_ids = []
+        self.lock = threading.Lock()
+
+    def remember(self, kind, object_id):
+        with self.lock:
+            getattr(self, kind).append(object_id)
+
+def model_payload(dataset_id, rng):
+    model_type, task_type, target = rng.choice([
+        ("logistic_regression", "classification", "churn"),
+        ("kmeans", "clustering", None),
+        ("pca", "dimensionality_reduction", None),
+    ])
+    return {
+        "name": f"load-{model_type}",
+        "model_type": model_type,
+        "task_type": task_type,
+        "dataset_id": dataset_id,
+        "target_column": target,
+        "hyperparameters": {},
+    }
+
+def seed(client, users, datasets_per_user, rows, rng):
+    """Create users, datasets, models and a first job for each through the API"""
+    tenants = []
+    for index in range(users):
+        email = f"load{index}-{uuid.uuid4().hex[:6]}@packageml.com"
+        password = "loadtest"
+        client.json("POST", "/users/", {"email": email, "password": password})
+        tenant = Tenant(email, password, login(client, email, password))
+        if tenant.token is None:
+            raise RuntimeError(f"Could not log in seeded user {email}")
+        for _ in range(datasets_per_user):
+            status, dataset = client.json(
+                "POST", "/datasets/randomize/", {"dataset_type": "Customer Data", "num_rows": rows}, tenant.token
+            )
+            if status != 200:
+                raise RuntimeError(f"Seeding datasets failed with status {status}")
+            tenant.dataset_ids.append(dataset["id"])
+            status, model = client.json("POST", "/models/", model_payload(dataset["id"], rng), tenant.token)
+            tenant.model_ids.append(model["id"])
+            status, job = client.json(
+                "POST", "/jobs/", {"name": "seed", "model_id": model["id"], "dataset_id": dataset["id"]}, tenant.token
+            )
+            tenant.job_ids.append(job["id"])
+        tenants.append(tenant)
+    return tenants
+
+def run_operation(client, operation, tenant, rng, rows):
+    """Perform one operation; returns ``(route, status)``"""
+    token = tenant.token
+    if operation == "token":
+        status, _ = client.request(
+            "POST", "/token",
+            urlencode({"username": tenant.email, "password": tenant.password}),
+            {"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        return "POST /token", status
+    if operation == "list_datasets":
+        return "GET /datasets/", client.get("/datasets/", token)[0]
+    if operation == "get_dataset":
+        return "GET /datasets/{id}", client.get(f"/datasets/{rng.choice(tenant.dataset_ids)}", token)[0]
+    if operation == "list_models":
+        return "GET /models/", client.get("/models/", token)[0]
+    if operation == "list_jobs":
+        return "GET /jobs/", client.get("/jobs/", token)[0]
+    if operation == "get_job":
+        return "GET /jobs/{id}", client.get(f"/jobs/{rng.choice(tenant.job_ids)}", token)[0]
+    if operation == "create_model":
+        status, model = client.json("POST", "/models/", model_payload(rng.choice(tenant.dataset_ids), rng), token)
+        if status == 200:
+            tenant.remember("model_ids", model["id"])
+        return "POST /models/", status
+    if operation == "create_job":
+        model_index = rng.randrange(len(tenant.model_ids))
+        status, job = client.json("POST", "/jobs/", {
+            "name": "load",
+            "model_id": tenant.model_ids[model_index],
+            "dataset_id": tenant.dataset_ids[model_index % len(tenant.dataset_ids)],
+        }, token)
+        if status == 200:
+            tenant.remember("job_ids", job["id"])
+        return "POST /jobs/", status
+    if operation == "randomize_dataset":
+        status, _ = client.json(
+            "POST", "/datasets/randomize/", {"dataset_type": "Customer Data", "num_rows": rows}, token
+        )
+        return "POST /datasets/randomize/", status
+    if operation == "upload_dataset":
+        body, headers = csv_upload(token, rng)
+        return "POST /datasets/upload/", client.request("POST", "/datasets/upload/", body, headers)[0]
+    raise ValueError(f"Unknown operation {operation}")
+
+def percentile(values, q):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def drive(base_url, tenants, mix, concurrency, duration, max_requests, rows, seed_value):
+    """Run the request mix and collect ``(route, status, seconds)`` samples"""
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    samples = []
+    samples_lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed_value + index)
+        client = Client(base_url)
+        local = []
+        while time.perf_counter() < deadline:
+            with samples_lock:
+                if max_requests and issued[0] >= max_requests:
+                    break
+                issued[0] += 1
+            operation = rng.choices(operations, weights)[0]
+            tenant = rng.choice(tenants)
+            start = time.perf_counter()
+            try:
+                route, status = run_operation(client, operation, tenant, rng, rows)
+            except Exception as e:
+                route, status = operation, f"error: {type(e).__name__}"
+                client = Client(base_url)
+            local.append((route, status, time.perf_counter() - start))
+        with samples_lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+def summarize(samples, elapsed):
+    routes = {}
+    for route, status, seconds in samples:
+        routes.setdefault(route, []).append((status, seconds))
+    summary = []
+    for route, results in sorted(routes.items()):
+        latencies = [seconds * 1000 for _, seconds in results]
+        errors = sum(1 for status, _ in results if not (isinstance(status, int) and status < 400))
+        summary.append({
+            "route": route,
+            "requests": len(results),
+            "errors": errors,
+            "throughput_rps": len(results) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": statistics.mean(latencies),
+            "max_ms": max(latencies),
+        })
+    return summary
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_local_server():
+    """Serve the app in this process against a throwaway SQLite database"""
+    os.environ.setdefault(
+        "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='packageml-load-'), 'load.db')}"
+    )
+    import uvicorn
+    from run_migrations import upgrade_database
+    upgrade_database()
+    from app.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in text.split(","):
+        operation, _, weight = item.partition("=")
+        if operation not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation {operation!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[operation] = float(weight or 1)
+    return mix
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel clients")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: no limit)")
+    parser.add_argument("--users", type=int, default=4, help="Seeded users")
+    parser.add_argument("--datasets", type=int, default=3, help="Seeded datasets (with a model and job) per user")
+    parser.add_argument("--rows", type=int, default=500, help="Rows per generated dataset")
+    parser.add_argument("--mix", default="", help="Weighted operations, e.g. list_jobs=3,token=1")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Write the report as JSON")
+    return parser.parse_args(argv)
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        base_url, server = start_local_server()
+    print(f"Target: {base_url}")
+
+    print(f"Seeding {args.users} users with {args.datasets} datasets each...")
+    tenants = seed(Client(base_url), args.users, args.datasets, args.rows, rng)
+
+    print(f"Running {args.concurrency} clients for {args.duration}s...")
+    samples, elapsed = drive(
+        base_url, tenants, mix, args.concurrency, args.duration, args.requests, args.rows, args.seed
+    )
+    summary = summarize(samples, elapsed)
+
+    print(f"\n{'route':<28}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in summary:
+        print(f"{row['route']:<28}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    print(f"\n{len(samples)} requests in {elapsed:.1f}s ({len(samples) / elapsed:.1f} req/s)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "target": base_url,
+                "concurrency": args.concurrency,
+                "elapsed_seconds": elapsed,
+                "mix": mix,
+                "routes": summary,
+            }, f, indent=2)
+        print(f"Report written to {args.out}")
+
+    if server:
+        server.should_exit = True
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
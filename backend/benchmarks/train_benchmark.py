@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""Training benchmarks across model types, task types and dataset sizes.
+
+Runs the real job path (``run_training_job``) against a throwaway SQLite
+database, so no MySQL is needed, and records the stage timings, CPU time and
+peak memory that every job stores. Results are written to a JSON report and
+can be compared with a baseline report to catch regressions.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.train_benchmark --out report.json
+    python -m benchmarks.train_benchmark --baseline baseline.json
+    python -m benchmarks.train_benchmark --models svm,kmeans --sizes 1000 --save-baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime
+
+# Configure the app before it is imported: local database, and no reuse between repeated runs
+_workdir = tempfile.mkdtemp(prefix="packageml-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'bench.db')}")
+os.environ["TRAINING_MEMO_ENABLED"] = "false"
+os.environ["STAGE_CACHE_MAX_BYTES"] = "0"
+# Peak memory from traced allocations: precise and repeatable enough to compare against a baseline
+os.environ.setdefault("TRACK_JOB_MEMORY", "true")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import auth, main, memo, models, schemas, storage, synthetic, training  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from run_migrations import upgrade_database  # noqa: E402
+
+# Target column per dataset schema and supervised task
+TARGETS = {
+    "Customer Data": {"classification": "churn", "regression": "monthly_charges"},
+    "Sales Data": {"regression": "total"},
+    "Product Catalog": {"classification": "is_available", "regression": "price"},
+}
+
+# Keep the slowest models bounded so a full run finishes in minutes
+HYPERPARAMETERS = {
+    "neural_network": {"max_iter": 50},
+}
+
+# Stages shorter than this are too noisy to compare against a baseline
+MIN_COMPARABLE_SECONDS = 0.05
+
+def supported_cases():
+    """Every (model type, task type) pair the training code can build"""
+    cases = []
+    for model_type in schemas.ModelType:
+        for task_type in schemas.ModelTaskType:
+            try:
+                training.build_estimator(model_type, task_type, {})
+            except ValueError:
+                continue
+            cases.append((model_type, task_type))
+    return cases
+
+def make_rows(dataset_type, num_rows, extra_columns, seed):
+    """Generated rows of a dataset schema, widened with extra numeric columns"""
+    rng = random.Random(seed)
+    columns = list(synthetic.DATASET_SCHEMAS[dataset_type]["columns"])
+    columns += [{"name": f"feature_{index}", "type": "float"} for index in range(extra_columns)]
+    return columns, synthetic.random_rows(columns, num_rows, rng)
+
+def create_dataset(db, user, dataset_type, num_rows, extra_columns, seed):
+    columns, data = make_rows(dataset_type, num_rows, extra_columns, seed)
+    dataset = models.Dataset(
+        name=f"Benchmark {dataset_type} {num_rows}x{len(columns)}",
+        filename="benchmark.csv",
+        schema=synthetic.column_schema(columns, data),
+        rows=len(data),
+        columns=len(columns),
+        size=len(json.dumps(data)),
+        file_type="CSV",
+        missing_values=0,
+        content_hash=memo.canonical_hash(data),
+        user_id=user.id
+    )
+    db.add(dataset)
+    db.flush()
+    db.execute(insert(models.DatasetChunk), storage.chunk_rows(dataset.id, data))
+    db.commit()
+    return dataset
+
+def run_case(db, user, dataset, model_type, task_type, target_column, repeat):
+    """Train one configuration ``repeat`` times through the job runner and summarize the runs"""
+    model = models.MLModel(
+        name=f"{model_type.value}-{task_type.value}",
+        model_type=model_type,
+        task_type=task_type,
+        hyperparameters=HYPERPARAMETERS.get(model_type.value, {}),
+        target_column=target_column,
+        dataset_id=dataset.id,
+        user_id=user.id
+    )
+    db.add(model)
+    db.commit()
+
+    runs = []
+    for _ in range(repeat):
+        job = models.Job(
+            name="benchmark",
+            model_id=model.id,
+            dataset_id=dataset.id,
+            target_column=target_column,
+            status=models.JobStatus.PENDING,
+            progress=0,
+            user_id=user.id
+        )
+        db.add(job)
+        db.commit()
+
+        main.run_training_job(job.id)
+        db.expire_all()
+        job = db.query(models.Job).filter(models.Job.id == job.id).first()
+        if job.status != models.JobStatus.COMPLETED:
+            return {"error": job.error_message or job.status.value}
+        runs.append(job)
+
+    # Medians resist the occasional slow run; memory is reported at its worst
+    stages = sorted({stage for job in runs for stage in job.timings})
+    return {
+        "timings": {
+            stage: statistics.median(job.timings.get(stage, 0.0) for job in runs)
+            for stage in stages
+        },
+        "cpu_seconds": statistics.median(job.cpu_user_seconds + job.cpu_system_seconds for job in runs),
+        # None when a run could not measure it, rather than a 0 that would compare as "no change"
+        "peak_memory_bytes": (
+            None if any(job.peak_memory_bytes is None for job in runs)
+            else max(job.peak_memory_bytes for job in runs)
+        ),
+        "training_mode": runs[0].results.get("training_mode", "in_memory"),
+    }
+
+def compare(report, baseline, threshold):
+    """Cases and stages that got slower than the baseline by more than ``threshold`` times"""
+    previous = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(result["case"])
+        if not before or "timings" not in result or "timings" not in before:
+            continue
+        for stage, seconds in result["timings"].items():
+            old = before["timings"].get(stage)
+            if old is None or max(old, seconds) < MIN_COMPARABLE_SECONDS:
+                continue
+            if seconds > old * threshold:
+                regressions.append({"case": result["case"], "stage": stage, "baseline": old, "current": seconds})
+        old_memory = before.get("peak_memory_bytes")
+        if not old_memory or result.get("peak_memory_bytes") is None:
+            print(f"WARNING {result['case']}: peak memory missing from the "
+                  f"{'baseline' if not old_memory else 'report'}; memory not compared")
+            continue
+        if result["peak_memory_bytes"] > old_memory * threshold:
+            regressions.append({
+                "case": result["case"], "stage": "peak_memory_bytes",
+                "baseline": old_memory, "current": result["peak_memory_bytes"]
+            })
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,5000", help="Comma-separated row counts")
+    parser.add_argument("--widths", default="0,32", help="Comma-separated numbers of extra numeric columns")
+    parser.add_argument("--datasets", default="Customer Data", help="Comma-separated random dataset types")
+    parser.add_argument("--models", default="", help="Comma-separated model types (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="benchmark-report.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--save-baseline", help="Also write the report here, to compare later runs against")
+    return parser.parse_args(argv)
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    widths = [int(width) for width in args.widths.split(",")]
+    dataset_types = [name.strip() for name in args.datasets.split(",")]
+    selected = {name.strip() for name in args.models.split(",") if name.strip()}
+
+    upgrade_database()
+    db = SessionLocal()
+    password_hash, salt = auth.get_password_hash("benchmark")
+    user = models.User(email="benchmark@packageml.com", password_hash=password_hash, salt=salt)
+    db.add(user)
+    db.commit()
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": [],
+    }
+    try:
+        import numpy, pandas, sklearn
+        report["environment"].update(numpy=numpy.__version__, pandas=pandas.__version__, sklearn=sklearn.__version__)
+    except ImportError:
+        pass
+
+    # Warm up imports and first-call caches so they do not land on the first measured case
+    warmup = create_dataset(db, user, dataset_types[0], 100, 0, args.seed)
+    for model_type, task_type in supported_cases():
+        if selected and model_type.value not in selected:
+            continue
+        target_column = TARGETS[dataset_types[0]].get(task_type.value)
+        if not training.is_supervised(task_type) or target_column:
+            run_case(db, user, warmup, model_type, task_type, target_column, 1)
+
+    for dataset_type in dataset_types:
+        for num_rows in sizes:
+            for extra_columns in widths:
+                dataset = create_dataset(db, user, dataset_type, num_rows, extra_columns, args.seed)
+                for model_type, task_type in supported_cases():
+                    if selected and model_type.value not in selected:
+                        continue
+                    target_column = TARGETS[dataset_type].get(task_type.value)
+                    if training.is_supervised(task_type) and not target_column:
+                        continue
+                    case = f"{model_type.value}/{task_type.value}/{dataset_type}/rows={num_rows}/columns={dataset.columns}"
+                    print(f"Running {case}...")
+                    result = run_case(db, user, dataset, model_type, task_type, target_column, args.repeat)
+                    result.update(case=case, model_type=model_type.value, task_type=task_type.value,
+                                  dataset_type=dataset_type, rows=num_rows, columns=dataset.columns)
+                    report["results"].append(result)
+                    if "error" in result:
+                        print(f"  failed: {result['error']}")
+                    else:
+                        print(f"  total {result['timings'].get('total', 0):.3f}s, "
+                              f"fit {result['timings'].get('fit', 0):.3f}s, "
+                              f"peak memory {(result['peak_memory_bytes'] or 0) / 2**20:.1f} MiB")
+    db.close()
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']} {regression['stage']}: "
+                  f"{regression['baseline']:.3f} -> {regression['current']:.3f}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -14,15 +14,9 @@ config = context.config
 # Add the app directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-# Import the SQLAlchemy database URL
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_USER = os.getenv("DB_USER", "packageml")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "packageml")
-DB_NAME = os.getenv("DB_NAME", "packageml")
-
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
+# Use the application's database URL (DB_* settings, or DATABASE_URL)
+from app.database import SQLALCHEMY_DATABASE_URL
+config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -32,7 +26,7 @@ if config.config_file_name is not None:
 # add your model's MetaData object here
 # for 'autogenerate' support
 from app.database import Base
-from app.models import User
+from app import models  # noqa: F401 (registers every table on Base.metadata)
 
 target_metadata = Base.metadata
 
@@ -81,7 +75,10 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite cannot ALTER most things in place; batch mode copies the table instead
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         with context.begin_transaction():
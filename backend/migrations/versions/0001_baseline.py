@@ -0,0 +1,228 @@
+"""Baseline schema
+
+Creates every table on a new database. Databases made before migrations were
+versioned (tables created by the app at import, columns added by ad-hoc ALTERs)
+are brought to the same schema instead: missing columns and indexes are added,
+and plaintext API keys are replaced by their hash.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 18:11:25.189976
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+LONGBLOB = sa.LargeBinary(length=(2**32) - 1)
+
+
+def create_table(name, *elements, indexes=()):
+    """``op.create_table``, or on an existing table, add the columns and indexes it lacks.
+
+    Returns whether the table already existed.
+    """
+    inspector = sa.inspect(op.get_bind())
+    existed = inspector.has_table(name)
+    if not existed:
+        op.create_table(name, *elements)
+    else:
+        existing = {column["name"] for column in inspector.get_columns(name)}
+        for element in elements:
+            if isinstance(element, sa.Column) and element.name not in existing:
+                print(f"Adding {element.name} to {name} table...")
+                op.add_column(name, element)
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(name)}
+    for index_name, columns, unique in indexes:
+        if index_name not in existing:
+            op.create_index(index_name, name, columns, unique=unique)
+    return existed
+
+
+def upgrade() -> None:
+    create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('password_hash', sa.String(length=255), nullable=True),
+        sa.Column('salt', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_users_email', ['email'], True),
+            ('ix_users_id', ['id'], False),
+        ]
+    )
+
+    api_keys_existed = create_table('api_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=True),
+        sa.Column('prefix', sa.String(length=12), nullable=True),
+        sa.Column('key_hash', sa.String(length=64), nullable=True),
+        sa.Column('usage_count', sa.Integer(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key'),
+        sa.UniqueConstraint('key_hash'),
+        indexes=[
+            ('ix_api_keys_id', ['id'], False),
+            ('ix_api_keys_prefix', ['prefix'], False),
+            ('ix_api_keys_user_created', ['user_id', 'created_at', 'id'], False),
+        ]
+    )
+
+    create_table('datasets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('schema', sa.JSON(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('columns', sa.Integer(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=False),
+        sa.Column('tags', sa.String(length=255), nullable=True),
+        sa.Column('missing_values', sa.Integer(), nullable=True),
+        sa.Column('used_in_jobs', sa.Integer(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_datasets_id', ['id'], False),
+            ('ix_datasets_user_created', ['user_id', 'created_at', 'id'], False),
+            ('ix_datasets_user_name', ['user_id', 'name'], False),
+        ]
+    )
+
+    create_table('training_memo',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('results', sa.JSON(), nullable=False),
+        sa.Column('artifact', LONGBLOB, nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+    create_table('ml_models',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('model_type', sa.Enum('LOGISTIC_REGRESSION', 'SVM', 'NEURAL_NETWORK', 'SVR', 'KMEANS', 'DBSCAN', 'PCA', name='modeltype'), nullable=False),
+        sa.Column('task_type', sa.Enum('CLASSIFICATION', 'REGRESSION', 'CLUSTERING', 'DIMENSIONALITY_REDUCTION', name='modeltasktype'), nullable=False),
+        sa.Column('hyperparameters', sa.JSON(), nullable=False),
+        sa.Column('target_column', sa.String(length=255), nullable=True),
+        sa.Column('feature_columns', sa.JSON(), nullable=True),
+        sa.Column('is_trained', sa.Boolean(), nullable=True),
+        sa.Column('training_accuracy', sa.Float(), nullable=True),
+        sa.Column('evaluation_metrics', sa.JSON(), nullable=True),
+        sa.Column('artifact', LONGBLOB, nullable=True),
+        sa.Column('kernel', LONGBLOB, nullable=True),
+        sa.Column('dataset_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_ml_models_dataset', ['dataset_id'], False),
+            ('ix_ml_models_id', ['id'], False),
+            ('ix_ml_models_user_created', ['user_id', 'created_at', 'id'], False),
+            ('ix_ml_models_user_name', ['user_id', 'name'], False),
+        ]
+    )
+
+    create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('job_type', sa.Enum('TRAIN', 'INCREMENTAL', name='jobtype'), nullable=True),
+        sa.Column('status', sa.Enum('PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED', name='jobstatus'), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('model_id', sa.Integer(), nullable=False),
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('target_column', sa.String(length=255), nullable=True),
+        sa.Column('feature_columns', sa.JSON(), nullable=True),
+        sa.Column('save_output', sa.Boolean(), nullable=True),
+        sa.Column('passthrough_columns', sa.JSON(), nullable=True),
+        sa.Column('output_dataset_id', sa.Integer(), nullable=True),
+        sa.Column('results', sa.JSON(), nullable=True),
+        sa.Column('timings', sa.JSON(), nullable=True),
+        sa.Column('cpu_user_seconds', sa.Float(), nullable=True),
+        sa.Column('cpu_system_seconds', sa.Float(), nullable=True),
+        sa.Column('wall_seconds', sa.Float(), nullable=True),
+        sa.Column('peak_memory_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ),
+        sa.ForeignKeyConstraint(['model_id'], ['ml_models.id'], ),
+        sa.ForeignKeyConstraint(['output_dataset_id'], ['datasets.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_jobs_dataset', ['dataset_id'], False),
+            ('ix_jobs_id', ['id'], False),
+            ('ix_jobs_model', ['model_id'], False),
+            ('ix_jobs_user_created', ['user_id', 'created_at', 'id'], False),
+            ('ix_jobs_user_status_created', ['user_id', 'status', 'created_at', 'id'], False),
+        ]
+    )
+
+    if api_keys_existed:
+        upgrade_legacy_api_keys()
+
+
+def upgrade_legacy_api_keys():
+    """Keys used to be stored in clear, in a required column; keep only their prefix and hash"""
+    inspector = sa.inspect(op.get_bind())
+    unique_columns = [index["column_names"] for index in inspector.get_indexes('api_keys') if index["unique"]]
+    unique_columns += [constraint["column_names"] for constraint in inspector.get_unique_constraints('api_keys')]
+    if ['key_hash'] not in unique_columns:
+        op.create_index('ix_api_keys_key_hash', 'api_keys', ['key_hash'], unique=True)
+    key_column = next(column for column in inspector.get_columns('api_keys') if column["name"] == 'key')
+    if not key_column["nullable"]:
+        with op.batch_alter_table('api_keys') as batch_op:
+            batch_op.alter_column('key', existing_type=sa.String(length=255), nullable=True)
+
+    api_keys = sa.table('api_keys', sa.column('id'), sa.column('key'), sa.column('prefix'), sa.column('key_hash'))
+    legacy = op.get_bind().execute(sa.select(api_keys.c.id, api_keys.c.key).where(api_keys.c.key.isnot(None))).fetchall()
+    for key_id, key in legacy:
+        # Same prefix length and hash as app/api_keys.py, frozen here
+        op.execute(api_keys.update().where(api_keys.c.id == key_id).values(
+            prefix=key[:12], key_hash=hashlib.sha256(key.encode()).hexdigest(), key=None
+        ))
+    if legacy:
+        print(f"Hashed {len(legacy)} plaintext API keys")
+
+
+def downgrade() -> None:
+    op.drop_table('jobs')
+    op.drop_table('ml_models')
+    op.drop_table('training_memo')
+    op.drop_table('datasets')
+    op.drop_table('api_keys')
+    op.drop_table('users')
@@ -0,0 +1,39 @@
+"""Job queue columns
+
+Jobs are queued in the database and claimed by a training dispatcher, so every
+API worker sees the same queue.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 21:02:40.518311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('queued_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('runner', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('queue_position', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('estimated_start', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index('ix_jobs_runner_queued', ['runner', 'queued_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_runner_queued')
+        batch_op.drop_column('estimated_start')
+        batch_op.drop_column('queue_position')
+        batch_op.drop_column('runner')
+        batch_op.drop_column('batch_id')
+        batch_op.drop_column('queued_at')
@@ -0,0 +1,28 @@
+"""Job use_cache flag
+
+Stored so the training process knows whether a job may reuse cached stages.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 22:51:37.402815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('use_cache', sa.Boolean(), server_default=sa.true(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('use_cache')
@@ -0,0 +1,35 @@
+"""Training memo output dataset
+
+Memoized dimensionality reduction and clustering runs remember the output
+dataset they wrote, so identical jobs that save their output can reuse it.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 23:20:11.096452
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('training_memo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('output_dataset_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('passthrough_columns', sa.JSON(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_training_memo_output_dataset_id_datasets', 'datasets', ['output_dataset_id'], ['id'], ondelete='SET NULL'
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('training_memo', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_training_memo_output_dataset_id_datasets', type_='foreignkey')
+        batch_op.drop_column('passthrough_columns')
+        batch_op.drop_column('output_dataset_id')
@@ -0,0 +1,82 @@
+"""Dataset chunks
+
+Dataset rows move out of the single ``datasets.data`` JSON value into
+``dataset_chunks``, so large datasets can be stored, appended to and streamed
+a chunk at a time instead of being decoded whole.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-20 10:12:37.281904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Rows per chunk of the existing datasets (storage.DATASET_CHUNK_ROWS at the time of writing)
+CHUNK_ROWS = 5000
+
+datasets = sa.table('datasets', sa.column('id', sa.Integer()), sa.column('data', sa.JSON()))
+dataset_chunks = sa.table(
+    'dataset_chunks',
+    sa.column('dataset_id', sa.Integer()),
+    sa.column('start_row', sa.Integer()),
+    sa.column('n_rows', sa.Integer()),
+    sa.column('rows', sa.JSON()),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dataset_chunks',
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('start_row', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('n_rows', sa.Integer(), nullable=False),
+        sa.Column('rows', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('dataset_id', 'start_row'),
+    )
+
+    # Copy the rows one dataset at a time
+    connection = op.get_bind()
+    dataset_ids = [row.id for row in connection.execute(sa.select(datasets.c.id))]
+    for dataset_id in dataset_ids:
+        rows = connection.execute(sa.select(datasets.c.data).where(datasets.c.id == dataset_id)).scalar() or []
+        chunks = [
+            {"dataset_id": dataset_id, "start_row": offset, "n_rows": len(rows[offset:offset + CHUNK_ROWS]),
+             "rows": rows[offset:offset + CHUNK_ROWS]}
+            for offset in range(0, len(rows), CHUNK_ROWS)
+        ]
+        if chunks:
+            connection.execute(dataset_chunks.insert(), chunks)
+
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.drop_column('data')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data', sa.JSON(), nullable=True))
+
+    connection = op.get_bind()
+    dataset_ids = [row.id for row in connection.execute(sa.select(datasets.c.id))]
+    for dataset_id in dataset_ids:
+        rows = []
+        for chunk in connection.execute(
+            sa.select(dataset_chunks.c.rows)
+            .where(dataset_chunks.c.dataset_id == dataset_id)
+            .order_by(dataset_chunks.c.start_row)
+        ):
+            rows.extend(chunk.rows)
+        connection.execute(datasets.update().where(datasets.c.id == dataset_id).values(data=rows))
+
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.alter_column('data', existing_type=sa.JSON(), nullable=False)
+
+    op.drop_table('dataset_chunks')
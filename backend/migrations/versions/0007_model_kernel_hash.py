@@ -0,0 +1,48 @@
+"""Model kernel hash
+
+Models store the SHA-256 of their scoring kernel, which keys the cache of
+loaded kernels. ``updated_at`` has one-second precision on some databases,
+so a model retrained within the same second kept serving its old kernel.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-21 09:41:05.513870
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+ml_models = sa.table(
+    'ml_models',
+    sa.column('id', sa.Integer()),
+    sa.column('kernel', sa.LargeBinary()),
+    sa.column('kernel_hash', sa.String(64)),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('ml_models', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kernel_hash', sa.String(length=64), nullable=True))
+
+    # Hash the existing kernels one model at a time
+    connection = op.get_bind()
+    model_ids = [row.id for row in connection.execute(sa.select(ml_models.c.id).where(ml_models.c.kernel.isnot(None)))]
+    for model_id in model_ids:
+        kernel = connection.execute(sa.select(ml_models.c.kernel).where(ml_models.c.id == model_id)).scalar()
+        connection.execute(
+            ml_models.update().where(ml_models.c.id == model_id).values(kernel_hash=hashlib.sha256(kernel).hexdigest())
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('ml_models', schema=None) as batch_op:
+        batch_op.drop_column('kernel_hash')
@@ -1,45 +1,81 @@
 #!/usr/bin/env python
-# Script to run all migrations
+# Script to bring the database schema up to date; run once per deploy, before the app starts
 
-import time
-import importlib.util
 import os
 import sys
+import time
+
+from alembic import command
+from alembic.config import Config
 from sqlalchemy import text
-from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.exc import OperationalError
 
 from app.database import engine
 
-# Wait for the database to be ready
-time.sleep(5)
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# How long to wait for the database to accept connections (MySQL may still be starting)
+DB_WAIT_SECONDS = float(os.getenv("DB_WAIT_SECONDS", "60"))
+
+# Replicas deploying at the same time take turns; the others wait up to this long
+MIGRATION_LOCK_NAME = "packageml_migrations"
+MIGRATION_LOCK_TIMEOUT_SECONDS = int(os.getenv("MIGRATION_LOCK_TIMEOUT_SECONDS", "300"))
 
-print("Running database migrations...")
+def wait_for_database(timeout=DB_WAIT_SECONDS):
+    """Return as soon as the database accepts connections, retrying with a short backoff"""
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while True:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return
+        except OperationalError as e:
+            if time.monotonic() >= deadline:
+                print(f"Database not reachable after {timeout:.0f} seconds: {str(e)}")
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
 
-# Initialize the database with required data first
-print("Initializing database...")
-from init_db import init_db
-init_db()
-print("Database initialization completed.")
+def alembic_config():
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
 
-# Now run migrations that assume tables exist
-try:
-    # Check if the jobs table exists before running migrations
-    with engine.connect() as connection:
+def upgrade_database(revision="head"):
+    """``alembic upgrade head``, holding a MySQL named lock so concurrent deploys cannot race"""
+    if engine.dialect.name != "mysql":
+        command.upgrade(alembic_config(), revision)
+        return
+    with engine.connect() as lock_connection:
+        acquired = lock_connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": MIGRATION_LOCK_NAME, "timeout": MIGRATION_LOCK_TIMEOUT_SECONDS}
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError(f"Timed out waiting for the {MIGRATION_LOCK_NAME} lock")
         try:
-            result = connection.execute(text("SHOW TABLES LIKE 'jobs'"))
-            jobs_exists = bool(result.fetchone())
-            
-            if jobs_exists:
-                print("Running migrations for existing tables...")
-                from migrations.create_job_fields import run_migration
-                run_migration()
-                print("All migrations completed successfully.")
-            else:
-                print("Jobs table doesn't exist yet. Skipping migrations.")
-        except (OperationalError, ProgrammingError) as e:
-            print(f"Could not check for tables: {str(e)}")
-            print("Skipping migrations for now.")
-except Exception as e:
-    print(f"Migration error: {str(e)}")
-    # Don't exit with error, just continue
-    print("Continuing with application startup...") 
\ No newline at end of file
+            # Whoever ran before us may already have upgraded; then this is a no-op
+            command.upgrade(alembic_config(), revision)
+        finally:
+            lock_connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+
+def main():
+    print("Waiting for the database...")
+    wait_for_database()
+
+    print("Running database migrations...")
+    upgrade_database()
+    print("Database migrations completed successfully.")
+
+    # Seed data goes in once the schema exists
+    from init_db import init_db
+    init_db()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Migration error: {str(e)}")
+        # Do not start the app against a schema it does not expect
+        sys.exit(1)
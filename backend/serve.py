@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""Production server: warm the ML stack once, then fork API workers that share it.
+
+The parent imports the app, imports and exercises pandas/NumPy/scikit-learn
+and binds the listening socket. It then forks ``WEB_CONCURRENCY`` uvicorn
+workers. The workers inherit the warmed-up modules copy-on-write, so each
+worker serves at full speed (and ``GET /ready`` returns 200) as soon as it
+starts.
+
+Training does not run in the workers. They queue jobs in the database, and
+one more forked process, the training process, claims them and runs them on
+its fair scheduler, so ``SCHEDULER_WORKERS``, the per-user limits and the CPU
+quota apply to the whole server. Several servers may share the database;
+each job is claimed by one training process.
+
+Workers are replaced without dropping requests: the replacement is started
+first, and the old worker stops accepting, finishes its in-flight requests
+then exits. This happens when
+
+- a worker has served ``MAX_REQUESTS`` requests (plus some jitter, so
+  workers do not all restart together),
+- a worker's private memory exceeds ``WORKER_MAX_MEMORY_MB``,
+- the parent gets SIGHUP: it checks that the new code imports, re-executes
+  itself on the same socket, starts a new set of workers and retires the old
+  ones. Environment changes need a full restart.
+
+A worker that exits unexpectedly is replaced too, and so is the training
+process. On reload the old training process hands back the jobs it has not
+started, for the new one to claim, and finishes its running ones. SIGTERM or
+SIGINT stops everything gracefully.
+
+Usage (from the backend directory):
+
+    python serve.py
+    WEB_CONCURRENCY=4 PORT=8000 python serve.py
+    kill -HUP <parent pid>    # reload the code
+"""
+import gc
+import os
+import random
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+
+# Pending connections the kernel queues for us (also capped by net.core.somaxconn)
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+# Idle keep-alive connections are closed after this; keep it above the idle timeout of
+# any load balancer in front (60 s on most), or it may reuse a connection we just closed
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", "65"))
+# How long a stopping worker waits for in-flight requests before closing them
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+# Recycle workers after this many requests (0 never), plus up to MAX_REQUESTS_JITTER more
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "20000"))
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", "2000"))
+# Recycle workers whose private (not shared with the parent) memory grows past this (0 never)
+WORKER_MAX_MEMORY_MB = int(os.getenv("WORKER_MAX_MEMORY_MB", "2048"))
+MEMORY_CHECK_SECONDS = 10.0
+
+# Workers that die faster than this after starting are not restarted, to avoid a fork loop
+MIN_WORKER_UPTIME_SECONDS = 1.0
+
+# Passed across the re-exec of a graceful reload
+LISTEN_FD_ENV = "SERVE_LISTEN_FD"
+RETIRE_PIPE_ENV = "SERVE_RETIRE_PIPE"
+OLD_WORKERS_ENV = "SERVE_OLD_WORKERS"
+
+# Kinds of child process
+WORKER = "worker"
+TRAINER = "training process"
+
+def bind_socket():
+    inherited = os.environ.pop(LISTEN_FD_ENV, None)
+    if inherited is not None:
+        # Reloading: keep serving on the socket the previous code was using
+        sock = socket.socket(fileno=int(inherited))
+    else:
+        sock = socket.socket(socket.AF_INET6 if ":" in HOST else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((HOST, PORT))
+        sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+def retire_pipe():
+    """Pipe on which workers announce they are stopping, so the parent can replace them right away"""
+    inherited = os.environ.pop(RETIRE_PIPE_ENV, None)
+    if inherited is not None:
+        read_fd, write_fd = (int(fd) for fd in inherited.split(","))
+    else:
+        read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    for fd in (read_fd, write_fd):
+        os.set_inheritable(fd, True)
+    return read_fd, write_fd
+
+def private_memory_bytes(pid):
+    """Memory a worker does not share with the parent (Linux), or None where we cannot tell"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            return sum(
+                int(line.split()[1]) * 1024 for line in f if line.startswith(("Private_Clean:", "Private_Dirty:"))
+            )
+    except (OSError, ValueError):
+        return None
+
+def run_worker(app, sock, notify_fd):
+    import uvicorn
+    from app.database import engine
+
+    class Worker(uvicorn.Server):
+        async def shutdown(self, sockets=None):
+            # Tell the parent before draining, so the replacement starts serving meanwhile
+            os.write(notify_fd, struct.pack("i", os.getpid()))
+            await super().shutdown(sockets=sockets)
+
+    # Connections are per process; never reuse any the parent may have opened
+    engine.dispose(close=False)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Reloads are the parent's business; a HUP sent to the whole group must not kill workers
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    max_requests = MAX_REQUESTS + random.randint(0, MAX_REQUESTS_JITTER) if MAX_REQUESTS > 0 else None
+    server = Worker(uvicorn.Config(
+        app,
+        log_level=LOG_LEVEL,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT_SECONDS,
+        limit_max_requests=max_requests,
+    ))
+    server.run(sockets=[sock])
+
+def run_training_process(notify_fd):
+    import threading
+    from app import principals
+    from app.database import engine
+    from app.job_queue import dispatcher
+
+    engine.dispose(close=False)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    principals.start_listener()
+    dispatcher.start()
+    while not stop.is_set():
+        stop.wait(1.0)
+    # Tell the parent first, so a replacement starts claiming while the running jobs finish
+    os.write(notify_fd, struct.pack("i", os.getpid()))
+    if not dispatcher.stop():
+        print("Training process stopping with training runs still in progress")
+
+def spawn(app, sock, notify_fd, kind=WORKER):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            if kind == TRAINER:
+                run_training_process(notify_fd)
+            else:
+                run_worker(app, sock, notify_fd)
+        except BaseException as e:
+            print(f"{kind.capitalize()} {os.getpid()} failed: {str(e)}")
+            code = 1
+        finally:
+            os._exit(code)
+    print(f"Started {kind} {pid}")
+    return pid
+
+def new_code_imports():
+    """Import the app in a separate interpreter, so a broken deploy does not take the server down"""
+    result = subprocess.run([sys.executable, "-c", "import app.main"], cwd=os.path.dirname(os.path.abspath(__file__)))
+    return result.returncode == 0
+
+def reexec(sock, read_fd, write_fd, workers):
+    """Replace this process with a fresh interpreter that takes over the socket and the current workers"""
+    os.environ[LISTEN_FD_ENV] = str(sock.fileno())
+    os.environ[RETIRE_PIPE_ENV] = f"{read_fd},{write_fd}"
+    os.environ[OLD_WORKERS_ENV] = ",".join(str(pid) for pid in workers)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+def main():
+    # Each process sizes its connection pools from its share of the database connection budget
+    os.environ["WEB_CONCURRENCY"] = str(WEB_CONCURRENCY)
+    os.environ["DB_POOL_PROCESSES"] = str(WEB_CONCURRENCY + 1)
+    os.environ.setdefault("DB_CONNECTION_BUDGET", "100")
+    # Workers only queue jobs; the training process runs them
+    os.environ["TRAINING_DISPATCHER"] = "process"
+    if not os.getenv("AUTH_CACHE_REDIS_URL"):
+        # Without a shared layer a worker only hears about its own writes (and not about
+        # the training process's), so bound how long cached responses are served
+        os.environ.setdefault("RESPONSE_CACHE_TTL_SECONDS", "5")
+
+    from app import warmup
+    from app.main import app
+
+    warmup.warm()
+    sock = bind_socket()
+    read_fd, write_fd = retire_pipe()
+    print(f"Listening on {HOST}:{PORT} with {WEB_CONCURRENCY} workers")
+
+    # Move everything loaded so far out of the collector's reach, so collections
+    # in the workers do not touch (and copy) the pages they share with the parent
+    gc.collect()
+    gc.freeze()
+
+    # Serving children -> (kind, start time); retiring ones have been replaced and are finishing up
+    workers = {}
+    retiring = set()
+
+    def start(kind):
+        workers[spawn(app, sock, write_fd, kind)] = (kind, time.time())
+
+    start(TRAINER)
+    for _ in range(WEB_CONCURRENCY):
+        start(WORKER)
+
+    # After a reload, the previous code's children are still ours
+    old_workers = os.environ.pop(OLD_WORKERS_ENV, "")
+    for pid in (int(pid) for pid in old_workers.split(",") if pid):
+        retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    stopping = False
+    reload_requested = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers) + list(retiring):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reload(signum, frame):
+        nonlocal reload_requested
+        reload_requested = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGHUP, reload)
+
+    def replace(pid):
+        """Start a replacement for a serving child, which then finishes in the background"""
+        if pid not in workers:
+            return
+        kind, _ = workers.pop(pid)
+        retiring.add(pid)
+        if not stopping:
+            start(kind)
+
+    next_memory_check = time.time() + MEMORY_CHECK_SECONDS
+    while workers or retiring:
+        # Wake up when a worker announces it is stopping, or at least once a second
+        readable, _, _ = select.select([read_fd], [], [], 1.0)
+        if readable:
+            try:
+                data = os.read(read_fd, 4096)
+            except BlockingIOError:
+                data = b""
+            for (pid,) in struct.iter_unpack("i", data[:len(data) - len(data) % 4]):
+                if pid in workers:
+                    print(f"{workers[pid][0].capitalize()} {pid} is stopping; starting its replacement")
+                    replace(pid)
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                # No children left at all
+                workers.clear()
+                retiring.clear()
+                break
+            if pid == 0:
+                break
+            if pid in retiring:
+                retiring.discard(pid)
+                continue
+            if pid not in workers:
+                continue
+            kind, started = workers.pop(pid)
+            if stopping:
+                continue
+            print(f"{kind.capitalize()} {pid} exited with status {status}")
+            if time.time() - started < MIN_WORKER_UPTIME_SECONDS:
+                print(f"{kind.capitalize()} exited right after starting; not restarting it")
+                continue
+            start(kind)
+
+        if stopping:
+            continue
+
+        if reload_requested:
+            reload_requested = False
+            print("Reloading: checking that the new code imports...")
+            if new_code_imports():
+                reexec(sock, read_fd, write_fd, list(workers) + list(retiring))
+            print("New code failed to import; keeping the current workers")
+
+        if WORKER_MAX_MEMORY_MB > 0 and time.time() >= next_memory_check:
+            next_memory_check = time.time() + MEMORY_CHECK_SECONDS
+            # The training process holds datasets while it trains; only API workers are recycled
+            for pid in [pid for pid, (kind, _) in workers.items() if kind == WORKER]:
+                used = private_memory_bytes(pid)
+                if used is not None and used > WORKER_MAX_MEMORY_MB * 1024 * 1024:
+                    print(f"Worker {pid} uses {used // (1024 * 1024)} MB; replacing it")
+                    replace(pid)
+                    os.kill(pid, signal.SIGTERM)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# The app reads its configuration at import time: point it at a throwaway SQLite database first
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from run_migrations import upgrade_database
+
+upgrade_database()
+
+from app.main import app
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers(client):
+    """Bearer headers of a new user"""
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/users/", json={"email": email, "password": "pw"})
+    token = client.post("/token", data={"username": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
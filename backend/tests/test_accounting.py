@@ -0,0 +1,11 @@
+import numpy as np
+
+from app import accounting
+
+def test_memory_watch_records_peak_by_default():
+    assert not accounting.TRACK_JOB_MEMORY
+    watch = accounting.MemoryWatch()
+    block = np.ones(64 * 1024 * 1024 // 8)
+    peak = watch.stop()
+    del block
+    assert peak is not None and peak >= 32 * 1024 * 1024
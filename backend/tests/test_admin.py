@@ -0,0 +1,13 @@
+from app import auth
+from init_db import init_db
+
+def test_seeded_demo_account_is_not_an_administrator(client):
+    init_db()
+    token = client.post("/token", data={"username": auth.DEMO_ACCOUNT_EMAIL, "password": "admin123"}).json()["access_token"]
+    response = client.get("/admin/usage", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+def test_configured_administrators_can_call_admin_endpoints(client, auth_headers, monkeypatch):
+    email = client.get("/users/me", headers=auth_headers).json()["email"]
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {email})
+    assert client.get("/admin/usage", headers=auth_headers).status_code == 200
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from app import schemas, training
+
+ROWS = [{"x": index % 7, "z": index % 3, "y": index % 2} for index in range(60)]
+
+def test_incremental_jobs_are_rejected_for_models_that_can_only_be_refit(client, auth_headers):
+    dataset = client.post("/datasets/", json={
+        "name": "incremental", "filename": "incremental.csv", "file_type": "CSV", "data": ROWS
+    }, headers=auth_headers).json()
+    model = client.post("/models/", json={
+        "name": "logistic", "model_type": "logistic_regression", "task_type": "classification",
+        "dataset_id": dataset["id"], "target_column": "y", "hyperparameters": {}
+    }, headers=auth_headers).json()
+    assert client.post(f"/models/{model['id']}/train", headers=auth_headers).json()["is_trained"]
+
+    response = client.post("/jobs/", json={
+        "name": "update", "job_type": "incremental", "model_id": model["id"], "dataset_id": dataset["id"]
+    }, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_incremental_train_only_learns_from_new_rows_with_partial_fit():
+    df = pd.DataFrame(ROWS)
+    artifact, _ = training.train(
+        schemas.ModelType.NEURAL_NETWORK, schemas.ModelTaskType.CLASSIFICATION, {"max_iter": 20},
+        df, ["x", "z"], "y"
+    )
+    artifact, metrics = training.incremental_train(artifact, {}, df.head(10))
+    assert metrics["retrain_mode"] == "partial_fit"
+    assert artifact["n_samples_seen"] == len(df) + 10
+
+    refit_only, _ = training.train(
+        schemas.ModelType.LOGISTIC_REGRESSION, schemas.ModelTaskType.CLASSIFICATION, {},
+        df, ["x", "z"], "y"
+    )
+    with pytest.raises(ValueError):
+        training.incremental_train(refit_only, {}, df.head(10))
@@ -0,0 +1,20 @@
+from app import api_keys, response_cache
+
+def test_api_key_usage_counted_once_per_request(client, auth_headers):
+    key = client.post("/api-keys/", json={"name": "k"}, headers=auth_headers).json()["key"]
+    key_headers = {"Authorization": f"Bearer {key}"}
+    cached_before = len(response_cache.cache._entries)
+
+    # Misses (rendered by the endpoint), hits (served from the cache) and a 304 revalidation
+    first = client.get("/datasets/", headers=key_headers)
+    client.get("/datasets/", headers=key_headers)
+    client.get("/models/", headers=key_headers)
+    client.get("/models/", headers=key_headers)
+    client.get("/jobs/?limit=5", headers=key_headers)
+    revalidated = client.get("/datasets/", headers={**key_headers, "If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert len(response_cache.cache._entries) > cached_before
+
+    api_keys.usage.flush()
+    listed = client.get("/api-keys/", headers=auth_headers).json()
+    assert [entry["usage_count"] for entry in listed] == [6]
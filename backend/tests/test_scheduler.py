@@ -0,0 +1,40 @@
+import time
+
+from app import job_queue
+from app.scheduler import FairScheduler, scheduler
+
+def wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.05)
+
+def test_runs_are_charged_the_cpu_seconds_they_report():
+    fair = FairScheduler(workers=1)
+    # One slot: the run is split and each part reports its own CPU time
+    fair.submit(1, [10, 11], lambda job_ids: 1.25 * len(job_ids))
+    fair.submit(2, [12], lambda job_ids: None)
+    assert fair.drain(timeout=10)
+    assert fair._used(1, time.time()) == 2.5
+    # Without a measurement the run is charged its wall time
+    assert fair._used(2, time.time()) < 1
+
+def test_cancelling_a_queued_job_withdraws_it(client, auth_headers, monkeypatch):
+    # No free slots: submitted jobs stay in the scheduler's queue
+    monkeypatch.setattr(scheduler, "workers", 0)
+    dataset = client.post("/datasets/randomize/", json={"dataset_type": "Customer Data", "num_rows": 100}, headers=auth_headers).json()
+    model = client.post("/models/", json={
+        "name": "queued", "model_type": "logistic_regression", "task_type": "classification",
+        "dataset_id": dataset["id"], "target_column": "churn", "hyperparameters": {}
+    }, headers=auth_headers).json()
+    job = client.post("/jobs/", json={"name": "queued", "model_id": model["id"], "dataset_id": dataset["id"]}, headers=auth_headers).json()
+    assert job["status"] == "pending"
+    wait_until(lambda: job["id"] in scheduler.waiting())
+
+    response = client.put(f"/jobs/{job['id']}/cancel", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "failed"
+    wait_until(lambda: job["id"] not in scheduler.waiting())
+
+    # Finished jobs cannot be cancelled again
+    assert client.put(f"/jobs/{job['id']}/cancel", headers=auth_headers).status_code == 400
@@ -0,0 +1,22 @@
+ROWS = [{"a": index % 5, "b": index % 3, "c": index % 7} for index in range(40)]
+
+def test_retraining_replaces_the_cached_kernel(client, auth_headers):
+    dataset = client.post("/datasets/", json={
+        "name": "scoring", "filename": "scoring.csv", "file_type": "CSV", "data": ROWS
+    }, headers=auth_headers).json()
+    model = client.post("/models/", json={
+        "name": "pca", "model_type": "pca", "task_type": "dimensionality_reduction",
+        "dataset_id": dataset["id"], "hyperparameters": {"n_components": 2}
+    }, headers=auth_headers).json()
+
+    def score():
+        response = client.post(f"/models/{model['id']}/score", json={"rows": ROWS[:1]}, headers=auth_headers)
+        return response.json()["predictions"][0]
+
+    client.post(f"/models/{model['id']}/train", headers=auth_headers)
+    assert len(score()) == 2
+
+    # Retrained within the same second, so updated_at alone would not tell the kernels apart
+    client.put(f"/models/{model['id']}", json={"hyperparameters": {"n_components": 1}}, headers=auth_headers)
+    client.post(f"/models/{model['id']}/train", headers=auth_headers)
+    assert len(score()) == 1
@@ -0,0 +1,30 @@
+from app import memo, storage
+from app.database import SessionLocal
+from app.models import Dataset
+
+def test_dataset_rows_are_stored_and_read_in_chunks(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(storage, "DATASET_CHUNK_ROWS", 4)
+    rows = [{"x": index, "y": index % 2} for index in range(10)]
+    dataset = client.post("/datasets/", json={
+        "name": "chunked", "filename": "chunked.csv", "file_type": "CSV", "data": rows
+    }, headers=auth_headers).json()
+    appended = [{"x": 10, "y": 0}, {"x": 11, "y": 1}]
+    response = client.post(f"/datasets/{dataset['id']}/rows", json={"data": appended}, headers=auth_headers)
+    assert response.json()["rows"] == 12
+    rows += appended
+
+    assert [len(chunk) for chunk in storage.read_rows(dataset["id"])] == [4, 4, 2, 2]
+    assert [row for chunk in storage.read_rows(dataset["id"], start=5) for row in chunk] == rows[5:]
+
+    db = SessionLocal()
+    try:
+        stored = db.get(Dataset, dataset["id"])
+        assert [len(frame) for frame in storage.iter_frames(stored, chunk_rows=5)] == [5, 5, 2]
+        assert storage.load_frame(stored, start=9)["x"].tolist() == [9, 10, 11]
+        # The hash of appended datasets is recomputed from the chunks
+        assert memo.ensure_content_hash(db, stored) == memo.canonical_hash(rows)
+    finally:
+        db.close()
+
+    response = client.get(f"/datasets/{dataset['id']}", headers=auth_headers)
+    assert response.json()["sample_data"] == rows[:4]
@@ -0,0 +1,33 @@
+import React from 'react';
+import { Box, FormControl, InputLabel, MenuItem, Select, TextField } from '@mui/material';
+
+// Sort orders accepted by the list endpoints' `sort` parameter
+export const SORT_OPTIONS = [
+  { value: '-created_at', label: 'Newest first' },
+  { value: 'created_at', label: 'Oldest first' },
+  { value: 'name', label: 'Name (A-Z)' },
+  { value: '-name', label: 'Name (Z-A)' }
+];
+
+// Name search and sort order of a paged list; both are applied by the server
+const ListControls = ({ name, onNameChange, sort, onSortChange, children }) => (
+  <Box sx={{ display: 'flex', gap: 2, mb: 2, flexWrap: 'wrap' }}>
+    <TextField
+      size="small"
+      label="Name starts with"
+      value={name}
+      onChange={(e) => onNameChange(e.target.value)}
+    />
+    <FormControl size="small" sx={{ minWidth: 160 }}>
+      <InputLabel>Sort</InputLabel>
+      <Select value={sort} label="Sort" onChange={(e) => onSortChange(e.target.value)}>
+        {SORT_OPTIONS.map(option => (
+          <MenuItem key={option.value} value={option.value}>{option.label}</MenuItem>
+        ))}
+      </Select>
+    </FormControl>
+    {children}
+  </Box>
+);
+
+export default ListControls;
@@ -0,0 +1,22 @@
+import React from 'react';
+import { Box, Button, CircularProgress } from '@mui/material';
+
+// "Load more" below a paged list; hidden once the last page is loaded (no next cursor)
+const LoadMoreButton = ({ nextCursor, loading, onClick }) => {
+  if (!nextCursor) return null;
+
+  return (
+    <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+      <Button
+        variant="outlined"
+        onClick={onClick}
+        disabled={loading}
+        startIcon={loading ? <CircularProgress size={16} /> : null}
+      >
+        Load more
+      </Button>
+    </Box>
+  );
+};
+
+export default LoadMoreButton;
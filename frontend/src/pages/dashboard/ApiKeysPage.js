@@ -28,6 +28,8 @@ import { AdapterDateFns } from '@mui/x-date-pickers/AdapterDateFns';
 import { LocalizationProvider } from '@mui/x-date-pickers/LocalizationProvider';
 import { format } from 'date-fns';
 import axios from 'axios';
+import { fetchPage } from '../../utils/pagination';
+import LoadMoreButton from '../../components/LoadMoreButton';
 import { useNavigate } from 'react-router-dom';
 
 // Backend API URL
@@ -41,6 +43,8 @@ const ApiKeysPage = () => {
   const [showNewKey, setShowNewKey] = useState(false);
   const [newKey, setNewKey] = useState('');
   const [apiKeys, setApiKeys] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [notification, setNotification] = useState('');
@@ -51,8 +55,10 @@ const ApiKeysPage = () => {
     fetchApiKeys();
   }, []);
 
-  const fetchApiKeys = async () => {
-    setLoading(true);
+  // Load the first page of API keys, or the page after the loaded ones when given its cursor
+  const fetchApiKeys = async (cursor = null) => {
+    const setBusy = cursor ? setLoadingMore : setLoading;
+    setBusy(true);
     try {
       const token = localStorage.getItem('token');
       if (!token) {
@@ -60,18 +66,15 @@ const ApiKeysPage = () => {
         return;
       }
 
-      const response = await axios.get(`${API_URL}/api-keys/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
+      const page = await fetchPage(`${API_URL}/api-keys/`, token, {}, cursor);
       
-      setApiKeys(response.data);
+      setApiKeys(prevKeys => (cursor ? [...prevKeys, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Error fetching API keys:', error);
       setError('Failed to load API keys');
     } finally {
-      setLoading(false);
+      setBusy(false);
     }
   };
 
@@ -207,14 +210,9 @@ const ApiKeysPage = () => {
                     <TableCell>{apiKey.id}</TableCell>
                     <TableCell>{apiKey.name}</TableCell>
                     <TableCell>
-                      <Box sx={{ display: 'flex', alignItems: 'center' }}>
-                        <Typography variant="body2" sx={{ fontFamily: 'monospace' }}>
-                          {apiKey.key.substring(0, 8)}...
-                        </Typography>
-                        <IconButton size="small" onClick={() => handleCopyKey(apiKey.key)}>
-                          <ContentCopyIcon fontSize="small" />
-                        </IconButton>
-                      </Box>
+                      <Typography variant="body2" sx={{ fontFamily: 'monospace' }}>
+                        {apiKey.prefix}...
+                      </Typography>
                     </TableCell>
                     <TableCell>{formatDate(apiKey.created_at)}</TableCell>
                     <TableCell>
@@ -231,6 +229,11 @@ const ApiKeysPage = () => {
                 ))}
               </TableBody>
             </Table>
+            <LoadMoreButton
+              nextCursor={nextCursor}
+              loading={loadingMore}
+              onClick={() => fetchApiKeys(nextCursor)}
+            />
           </TableContainer>
         )}
       </Paper>
@@ -147,11 +147,15 @@ const DashboardHome = () => {
         0
       );
       
+      // Lists come back one page at a time; a next-page cursor means there are more
+      const countOf = (response) =>
+        response.data.length.toString() + (response.headers['x-next-cursor'] ? '+' : '');
+      
       // Update stats with actual counts
       setStats(prev => [
-        { ...prev[0], count: jobsResponse.data.length.toString() },
-        { ...prev[1], count: datasetsResponse.data.length.toString() },
-        { ...prev[2], count: modelsResponse.data.length.toString() },
+        { ...prev[0], count: countOf(jobsResponse) },
+        { ...prev[1], count: countOf(datasetsResponse) },
+        { ...prev[2], count: countOf(modelsResponse) },
         { ...prev[3], count: totalApiCalls.toString() }
       ]);
     } catch (error) {
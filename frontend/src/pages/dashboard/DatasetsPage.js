@@ -45,6 +45,9 @@ import ShuffleIcon from '@mui/icons-material/Shuffle';
 import AutorenewIcon from '@mui/icons-material/Autorenew';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { fetchPage } from '../../utils/pagination';
+import ListControls from '../../components/ListControls';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 // Backend API URL
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
@@ -72,6 +75,10 @@ const DatasetsPage = () => {
   const [selectedDataset, setSelectedDataset] = useState(null);
   const [tabValue, setTabValue] = useState(0);
   const [datasets, setDatasets] = useState([]);
+  const [nameFilter, setNameFilter] = useState('');
+  const [sort, setSort] = useState('-created_at');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   
@@ -90,15 +97,18 @@ const DatasetsPage = () => {
     else return (bytes / 1048576).toFixed(1) + ' MB';
   }, []);
 
-  // Fetch datasets on component mount
+  // Fetch the first page on mount and whenever the filters change (typing is debounced)
   useEffect(() => {
     debugLog("DatasetsPage useEffect triggered");
-    fetchDatasets();
-  }, []);
+    const timeoutId = setTimeout(() => fetchDatasets(), 300);
+    return () => clearTimeout(timeoutId);
+  }, [nameFilter, sort]);
 
-  const fetchDatasets = async () => {
+  // Load the first page of datasets, or the page after the loaded ones when given its cursor
+  const fetchDatasets = async (cursor = null) => {
     debugLog("Fetching datasets...");
-    setLoading(true);
+    const setBusy = cursor ? setLoadingMore : setLoading;
+    setBusy(true);
     setError(null);
     try {
       // Get token from local storage
@@ -108,16 +118,17 @@ const DatasetsPage = () => {
         return;
       }
 
-      const response = await axios.get(`${API_URL}/datasets/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
+      const page = await fetchPage(
+        `${API_URL}/datasets/`,
+        token,
+        { sort, ...(nameFilter ? { name: nameFilter } : {}) },
+        cursor
+      );
       
-      debugLog("API response:", response.data);
+      debugLog("API response:", page.rows);
       
       // Transform API response to match UI format
-      const formattedDatasets = response.data.map(dataset => ({
+      const formattedDatasets = page.rows.map(dataset => ({
         id: dataset.id,
         name: dataset.name,
         filename: dataset.filename,
@@ -130,13 +141,14 @@ const DatasetsPage = () => {
         used_in_jobs: dataset.used_in_jobs
       }));
       
-      setDatasets(formattedDatasets);
+      setDatasets(prevDatasets => (cursor ? [...prevDatasets, ...formattedDatasets] : formattedDatasets));
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error('Error fetching datasets:', err);
       setError('Failed to load datasets. Please try again later.');
-      setDatasets([]);
+      if (!cursor) setDatasets([]);
     } finally {
-      setLoading(false);
+      setBusy(false);
     }
   };
 
@@ -312,6 +324,7 @@ const DatasetsPage = () => {
       
       {/* Datasets table */}
       <Paper sx={{ p: 3, borderRadius: 2 }}>
+        <ListControls name={nameFilter} onNameChange={setNameFilter} sort={sort} onSortChange={setSort} />
         {loading ? (
           <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', py: 4 }}>
             <CircularProgress size={40} sx={{ mr: 2 }} />
@@ -379,6 +392,11 @@ const DatasetsPage = () => {
                 ))}
               </TableBody>
             </Table>
+            <LoadMoreButton
+              nextCursor={nextCursor}
+              loading={loadingMore}
+              onClick={() => fetchDatasets(nextCursor)}
+            />
           </TableContainer>
         )}
       </Paper>
@@ -577,7 +595,7 @@ const DatasetsPage = () => {
             </Box>
             
             <Alert severity="info">
-              Due to platform scaling limitations, datasets are limited to 20 columns and 5000 rows.
+              Due to platform scaling limitations, datasets are limited to 20 columns and 1,000,000 rows.
             </Alert>
           </Stack>
         </DialogContent>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { 
   Box, 
   Typography, 
@@ -41,6 +41,8 @@ import TuneIcon from '@mui/icons-material/Tune';
 import ModelTrainingIcon from '@mui/icons-material/ModelTraining';
 import { useNavigate, useLocation } from 'react-router-dom';
 import axios from 'axios';
+import { fetchPage, PAGE_SIZE, MAX_PAGE_SIZE } from '../../utils/pagination';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 // Backend API URL
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
@@ -59,13 +61,16 @@ const debugLog = (message, data) => {
   }
 };
 
+// Job status shown by each tab (server-side filter; null for all jobs)
+const JOB_STATUS_TABS = [null, 'completed', 'in_progress', 'failed'];
+
 // Helper function to parse query parameters
 const useQuery = () => {
   return new URLSearchParams(useLocation().search);
 };
 
 // New Job Dialog Component
-const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
+const CreateJobDialog = ({ onClose, onJobCreated }) => {
   const [newJob, setNewJob] = useState({
     name: '',
     description: '',
@@ -75,25 +80,38 @@ const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
     feature_columns: []
   });
   
+  const [models, setModels] = useState([]);
   const [datasets, setDatasets] = useState([]);
+  const [modelSearch, setModelSearch] = useState('');
+  const [datasetSearch, setDatasetSearch] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [selectedModel, setSelectedModel] = useState(null);
+  const [selectedDataset, setSelectedDataset] = useState(null);
   const [availableColumns, setAvailableColumns] = useState([]);
 
-  // Fetch datasets when component mounts
+  // The pickers list one page of models and datasets; typing a name narrows them down on the server
   useEffect(() => {
-    fetchDatasets();
-  }, []);
+    const timeoutId = setTimeout(() => fetchOptions('models', modelSearch, setModels), 300);
+    return () => clearTimeout(timeoutId);
+  }, [modelSearch]);
 
-  // When model_id changes, update selectedModel
   useEffect(() => {
-    if (newJob.model_id && models.length > 0) {
-      const model = models.find(m => m.id === parseInt(newJob.model_id));
-      setSelectedModel(model);
-    }
+    const timeoutId = setTimeout(() => fetchOptions('datasets', datasetSearch, setDatasets), 300);
+    return () => clearTimeout(timeoutId);
+  }, [datasetSearch]);
+
+  // When model_id changes, update selectedModel (kept while a search hides it from the list)
+  useEffect(() => {
+    const model = models.find(m => m.id === parseInt(newJob.model_id));
+    if (model) setSelectedModel(model);
   }, [newJob.model_id, models]);
 
+  useEffect(() => {
+    const dataset = datasets.find(d => d.id === parseInt(newJob.dataset_id));
+    if (dataset) setSelectedDataset(dataset);
+  }, [newJob.dataset_id, datasets]);
+
   // When dataset_id changes, fetch the dataset columns
   useEffect(() => {
     if (newJob.dataset_id) {
@@ -109,24 +127,25 @@ const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
     }
   }, [newJob.target_column, availableColumns]);
 
-  const fetchDatasets = async () => {
+  const fetchOptions = async (resource, name, setOptions) => {
     try {
       const token = localStorage.getItem('token');
       if (!token) return;
 
-      const response = await axios.get(`${API_URL}/datasets/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
+      const page = await fetchPage(`${API_URL}/${resource}/`, token, { sort: 'name', ...(name ? { name } : {}) });
       
-      setDatasets(response.data);
+      setOptions(page.rows);
     } catch (err) {
-      console.error('Error fetching datasets:', err);
-      setError('Failed to load datasets');
+      console.error(`Error fetching ${resource}:`, err);
+      setError(`Failed to load ${resource}`);
     }
   };
 
+  // The selected option stays listed even when the current search does not match it
+  const withSelected = (options, selected) => (
+    selected && !options.some(option => option.id === selected.id) ? [selected, ...options] : options
+  );
+
   const fetchDatasetColumns = async (datasetId) => {
     try {
       const token = localStorage.getItem('token');
@@ -270,6 +289,14 @@ const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
           </Grid>
           
           <Grid item xs={12} md={6}>
+            <TextField
+              label="Search models by name"
+              value={modelSearch}
+              onChange={(e) => setModelSearch(e.target.value)}
+              size="small"
+              fullWidth
+              sx={{ mb: 2 }}
+            />
             <FormControl fullWidth required>
               <InputLabel>Model</InputLabel>
               <Select
@@ -278,7 +305,7 @@ const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
                 onChange={handleInputChange}
                 label="Model"
               >
-                {models.map(model => (
+                {withSelected(models, selectedModel).map(model => (
                   <MenuItem key={model.id} value={model.id.toString()}>
                     ID: {model.id} - {model.name} ({model.task_type})
                   </MenuItem>
@@ -288,6 +315,14 @@ const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
           </Grid>
           
           <Grid item xs={12} md={6}>
+            <TextField
+              label="Search datasets by name"
+              value={datasetSearch}
+              onChange={(e) => setDatasetSearch(e.target.value)}
+              size="small"
+              fullWidth
+              sx={{ mb: 2 }}
+            />
             <FormControl fullWidth required>
               <InputLabel>Dataset</InputLabel>
               <Select
@@ -296,7 +331,7 @@ const CreateJobDialog = ({ models, onClose, onJobCreated }) => {
                 onChange={handleInputChange}
                 label="Dataset"
               >
-                {datasets.map(dataset => (
+                {withSelected(datasets, selectedDataset).map(dataset => (
                   <MenuItem key={dataset.id} value={dataset.id.toString()}>
                     ID: {dataset.id} - {dataset.name}
                   </MenuItem>
@@ -402,23 +437,30 @@ const JobsPage = () => {
   const [resultDialogOpen, setResultDialogOpen] = useState(false);
   const [newJobDialogOpen, setNewJobDialogOpen] = useState(false);
   const [jobs, setJobs] = useState([]);
-  const [models, setModels] = useState([]);
-  const [datasets, setDatasets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [openSnackbar, setOpenSnackbar] = useState(false);
   const [snackbarMessage, setSnackbarMessage] = useState('');
   
-  // Fetch jobs on component mount
+  // Number of jobs shown, so polling refreshes the pages already loaded and no more
+  const jobsShown = useRef(0);
+  useEffect(() => {
+    jobsShown.current = jobs.length;
+  }, [jobs]);
+
+  // If modelId is provided, open the new job dialog
   useEffect(() => {
-    debugLog("JobsPage useEffect triggered");
-    fetchJobs();
-    fetchModels();
-    
-    // If modelId is provided, open the new job dialog
     if (modelId) {
       setNewJobDialogOpen(true);
     }
+  }, [modelId]);
+
+  // Fetch the first page of jobs on mount and when the status tab changes
+  useEffect(() => {
+    debugLog("JobsPage useEffect triggered");
+    fetchJobs();
     
     // Set up polling for job status updates
     const intervalId = setInterval(() => {
@@ -427,33 +469,14 @@ const JobsPage = () => {
     
     // Clean up interval on unmount
     return () => clearInterval(intervalId);
-  }, [modelId]);
+  }, [tabValue]);
 
-  const fetchModels = async () => {
-    debugLog("Fetching models...");
-    try {
-      // Get token from local storage
-      const token = localStorage.getItem('token');
-      if (!token) {
-        navigate('/login');
-        return;
-      }
-
-      const response = await axios.get(`${API_URL}/models/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
-      
-      setModels(response.data);
-    } catch (error) {
-      console.error("Error fetching models:", error);
-    }
-  };
-
-  const fetchJobs = async (showLoading = true) => {
+  // Load the first page of jobs with the selected status, or the page after the loaded ones when
+  // given its cursor. Without the loading indicator (polling, actions) the shown jobs are reloaded
+  const fetchJobs = async (showLoading = true, cursor = null) => {
     debugLog("Fetching jobs...");
     if (showLoading) setLoading(true);
+    if (cursor) setLoadingMore(true);
     try {
       // Get token from local storage
       const token = localStorage.getItem('token');
@@ -462,18 +485,20 @@ const JobsPage = () => {
         return;
       }
 
-      const response = await axios.get(`${API_URL}/jobs/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
+      const status = JOB_STATUS_TABS[tabValue];
+      const limit = showLoading || cursor
+        ? PAGE_SIZE
+        : Math.min(MAX_PAGE_SIZE, Math.max(PAGE_SIZE, jobsShown.current));
+      const page = await fetchPage(`${API_URL}/jobs/`, token, { limit, ...(status ? { status } : {}) }, cursor);
 
-      setJobs(response.data);
+      setJobs(prevJobs => (cursor ? [...prevJobs, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error("Error fetching jobs:", error);
       setError("An error occurred while fetching jobs.");
     } finally {
       if (showLoading) setLoading(false);
+      if (cursor) setLoadingMore(false);
     }
   };
 
@@ -589,17 +614,6 @@ const JobsPage = () => {
     return <Chip color={color} label={status} size="small" />;
   };
 
-  // Filter jobs based on selected tab
-  const getFilteredJobs = () => {
-    if (tabValue === 0) return jobs;
-    
-    const statusFilters = ['all', 'completed', 'in_progress', 'failed'];
-    const statusFilter = statusFilters[tabValue];
-    
-    if (statusFilter === 'all') return jobs;
-    return jobs.filter(job => job.status === statusFilter);
-  };
-
   return (
     <>
       <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 4 }}>
@@ -651,7 +665,7 @@ const JobsPage = () => {
                 </TableRow>
               </TableHead>
               <TableBody>
-                {getFilteredJobs().map((job) => (
+                {jobs.map((job) => (
                   <TableRow key={job.id}>
                     <TableCell>{job.id}</TableCell>
                     <TableCell>{job.name}</TableCell>
@@ -695,7 +709,7 @@ const JobsPage = () => {
                             <PlayArrowIcon fontSize="small" />
                           </IconButton>
                         )}
-                        {job.status === 'in_progress' && (
+                        {(job.status === 'pending' || job.status === 'in_progress') && (
                           <IconButton 
                             color="warning" 
                             onClick={() => handleCancelJob(job.id)}
@@ -719,6 +733,11 @@ const JobsPage = () => {
                 ))}
               </TableBody>
             </Table>
+            <LoadMoreButton
+              nextCursor={nextCursor}
+              loading={loadingMore}
+              onClick={() => fetchJobs(false, nextCursor)}
+            />
           </TableContainer>
         )}
       </Paper>
@@ -734,7 +753,6 @@ const JobsPage = () => {
           <Typography variant="h6">Create New Training Job</Typography>
         </DialogTitle>
         <CreateJobDialog 
-          models={models}
           onClose={() => setNewJobDialogOpen(false)}
           onJobCreated={(newJob) => {
             fetchJobs();
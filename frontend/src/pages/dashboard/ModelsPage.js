@@ -41,6 +41,9 @@ import TuneIcon from '@mui/icons-material/Tune';
 import SettingsIcon from '@mui/icons-material/Settings';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { fetchPage } from '../../utils/pagination';
+import ListControls from '../../components/ListControls';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 // Backend API URL
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
@@ -103,7 +106,7 @@ const getMetricDescription = (metric) => {
 };
 
 // Create Model Dialog Component
-const CreateModelDialog = ({ datasets, onClose, onModelCreated }) => {
+const CreateModelDialog = ({ onClose, onModelCreated }) => {
   const [newModel, setNewModel] = useState({
     name: '',
     description: '',
@@ -597,22 +600,27 @@ const ModelsPage = () => {
   const [selectedModel, setSelectedModel] = useState(null);
   const [tabValue, setTabValue] = useState(0);
   const [models, setModels] = useState([]);
-  const [datasets, setDatasets] = useState([]);
+  const [nameFilter, setNameFilter] = useState('');
+  const [sort, setSort] = useState('-created_at');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [openSnackbar, setOpenSnackbar] = useState(false);
   const [snackbarMessage, setSnackbarMessage] = useState('');
   
-  // Fetch models on component mount
+  // Fetch the first page on mount and whenever the filters change (typing is debounced)
   useEffect(() => {
     debugLog("ModelsPage useEffect triggered");
-    fetchModels();
-    fetchDatasets();
-  }, []);
+    const timeoutId = setTimeout(() => fetchModels(), 300);
+    return () => clearTimeout(timeoutId);
+  }, [nameFilter, sort]);
 
-  const fetchModels = async () => {
+  // Load the first page of models, or the page after the loaded ones when given its cursor
+  const fetchModels = async (cursor = null) => {
     debugLog("Fetching models...");
-    setLoading(true);
+    const setBusy = cursor ? setLoadingMore : setLoading;
+    setBusy(true);
     setError(null);
     try {
       // Get token from local storage
@@ -622,41 +630,22 @@ const ModelsPage = () => {
         return;
       }
 
-      const response = await axios.get(`${API_URL}/models/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
+      const page = await fetchPage(
+        `${API_URL}/models/`,
+        token,
+        { sort, ...(nameFilter ? { name: nameFilter } : {}) },
+        cursor
+      );
       
-      debugLog("API response:", response.data);
-      setModels(response.data);
+      debugLog("API response:", page.rows);
+      setModels(prevModels => (cursor ? [...prevModels, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error('Error fetching models:', err);
       setError('Failed to load models. Please try again later.');
-      setModels([]);
+      if (!cursor) setModels([]);
     } finally {
-      setLoading(false);
-    }
-  };
-
-  const fetchDatasets = async () => {
-    try {
-      // Get token from local storage
-      const token = localStorage.getItem('token');
-      if (!token) {
-        navigate('/login');
-        return;
-      }
-
-      const response = await axios.get(`${API_URL}/datasets/`, {
-        headers: {
-          Authorization: `Bearer ${token}`
-        }
-      });
-      
-      setDatasets(response.data);
-    } catch (err) {
-      console.error('Error fetching datasets:', err);
+      setBusy(false);
     }
   };
 
@@ -780,6 +769,7 @@ const ModelsPage = () => {
       
       {/* Models table */}
       <Paper sx={{ p: 3, borderRadius: 2 }}>
+        <ListControls name={nameFilter} onNameChange={setNameFilter} sort={sort} onSortChange={setSort} />
         {loading ? (
           <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', py: 4 }}>
             <CircularProgress size={40} sx={{ mr: 2 }} />
@@ -849,6 +839,11 @@ const ModelsPage = () => {
                 ))}
               </TableBody>
             </Table>
+            <LoadMoreButton
+              nextCursor={nextCursor}
+              loading={loadingMore}
+              onClick={() => fetchModels(nextCursor)}
+            />
           </TableContainer>
         )}
       </Paper>
@@ -864,7 +859,6 @@ const ModelsPage = () => {
           <Typography variant="h6">Create New Model</Typography>
         </DialogTitle>
         <CreateModelDialog 
-          datasets={datasets} 
           onClose={() => setCreateModelOpen(false)}
           onModelCreated={(newModel) => {
             setModels(prevModels => [...prevModels, newModel]);
@@ -451,7 +451,7 @@ const NewDatasetPage = () => {
         
         <Alert severity="info" sx={{ mb: 4 }}>
           <Typography variant="body2">
-            Due to platform scaling limitations, datasets are limited to 20 columns and 5000 rows. 
+            Due to platform scaling limitations, datasets are limited to 20 columns and 1,000,000 rows. 
             All files will be converted to CSV format for storage.
           </Typography>
         </Alert>
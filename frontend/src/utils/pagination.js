@@ -0,0 +1,20 @@
+import axios from 'axios';
+
+// Rows per page of a list; further pages are loaded on demand
+export const PAGE_SIZE = 50;
+
+// The API's largest page size
+export const MAX_PAGE_SIZE = 1000;
+
+// Fetch one page of a list endpoint. Filters and the sort order are query parameters
+// handled by the server; the cursor of the next page comes back in the X-Next-Cursor
+// header (absent on the last page) and is passed back to load the page after it
+export const fetchPage = async (url, token, params = {}, cursor = null) => {
+  const response = await axios.get(url, {
+    headers: {
+      Authorization: `Bearer ${token}`
+    },
+    params: { limit: PAGE_SIZE, ...params, ...(cursor ? { cursor } : {}) }
+  });
+  return { rows: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};